@@ -1,39 +1,94 @@
 import sys
-from pathlib import Path
+import time
 
-from PyQt6.QtGui import QIcon
-from PyQt6.QtWidgets import QApplication
+# Taken before the GUI imports, so the startup timing includes them.
+_STARTED = time.perf_counter()
 
-from src.gui.main_window import MainWindow
-from src.gui.splash_screen import SplashScreen
 
+def main(startup_timing=False):
+    """Starts the GUI. Each startup stage is real work reported on the splash screen;
+    Pillow and NumPy are loaded on the worker thread after the window is shown.
+
+    With ``startup_timing`` the time of every stage up to the first paint of the main
+    window and the background library load is printed, and the application exits.
+    """
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+
+    from src.gui.startup import StartupTimer
+
+    timer = StartupTimer(_STARTED)
+    timer.mark("Qt import")
+
+    from PyQt6.QtGui import QIcon
+
+    from src.gui.splash_screen import SplashScreen
 
-def main():
     app = QApplication(sys.argv)
 
     # Set application icon
     app_icon = QIcon("assets/apply.png")  # Using apply.png as the main app icon
     app.setWindowIcon(app_icon)
+    timer.mark("application created")
 
-    # Create and show splash screen
     splash = SplashScreen()
     splash.show()
+    splash.set_stage("Loading user interface...", 30)
+    timer.mark("splash shown")
 
-    # Process events to make splash screen responsive
-    app.processEvents()
+    from src.gui.main_window import MainWindow
+    timer.mark("main window import")
+    splash.set_stage("Setting up user interface...", 70)
 
-    # Create main window but don't show it yet
     window = MainWindow()
     window.setWindowIcon(app_icon)
+    timer.mark("main window built")
 
-    # Connect splash screen finished signal to show main window
-    def show_main_window():
-        splash.close()
-        window.show()
+    def loaded(processor):
+        if startup_timing:
+            timer.mark("image libraries loaded (background)")
+            timer.print_report()
+            QTimer.singleShot(0, app.quit)
 
-    splash.finished.connect(show_main_window)
+    # The window is usable before the image libraries are; they load while it paints.
+    timer.watch_first_paint(window, on_painted=lambda: window.preload(on_done=loaded))
+    window.show()
+    splash.finish(window)
 
     sys.exit(app.exec())
 
+
+def run_headless(argv):
+    """Dispatches headless subcommands, which never import PyQt6, with the lean Pillow plugin registry."""
+    command, args = argv[0], argv[1:]
+    from src.core.codecs import lean_codecs_requested, use_lean_codecs
+    if lean_codecs_requested():
+        use_lean_codecs()
+    if command == "batch":
+        from src.cli.batch import main as batch_main
+        return batch_main(args)
+    if command == "watch":
+        from src.cli.watch import main as watch_main
+        return watch_main(args)
+    if command == "cache":
+        from src.cli.cache import main as cache_main
+        return cache_main(args)
+    if command == "manifest":
+        from src.cli.manifest import main as manifest_main
+        return manifest_main(args)
+    if command == "index":
+        from src.cli.index import main as index_main
+        return index_main(args)
+    raise SystemExit(f"Unknown command: {command}")
+
+
+HEADLESS_COMMANDS = ("batch", "watch", "cache", "manifest", "index")
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    if getattr(sys, "frozen", False):
+        # Lets worker processes of a frozen build start on Windows instead of running the app.
+        import multiprocessing
+        multiprocessing.freeze_support()
+    if len(sys.argv) > 1 and sys.argv[1] in HEADLESS_COMMANDS:
+        sys.exit(run_headless(sys.argv[1:]))
+    main(startup_timing="--startup-timing" in sys.argv)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark
+Times fresh processes with the lean Pillow plugin registry and with every plugin
+(BLURRIFY_ALL_CODECS=1), so each run pays the imports again:
+
+- first-image: imports the processor, opens a PNG and saves it as JPEG, which is
+  when Pillow would load all of its plugins
+- gui: ``Blurrify.py --startup-timing``, up to the first paint and the background
+  load of the image libraries (offscreen Qt platform)
+- frozen: the same for each cx_Freeze build passed with --frozen, e.g. one built
+  before and one after a change to setup.py
+
+Run from the project root:
+    python benchmarks/bench_cold_start.py
+    python benchmarks/bench_cold_start.py --frozen build/before --frozen build/Blurrify
+
+Each number is the best wall time of a few runs; the first run of a frozen build also
+warms the OS file cache and is not counted.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+
+REPEATS = 5
+VARIANTS = {"lean": {}, "all plugins": {"BLURRIFY_ALL_CODECS": "1"}}
+
+FIRST_IMAGE = """
+import sys
+from src.core.codecs import lean_codecs_requested, use_lean_codecs
+if lean_codecs_requested():
+    use_lean_codecs()
+from src.core.image_processor import ImageProcessor
+processor = ImageProcessor()
+processor.open_image(sys.argv[1])
+processor.save_image(sys.argv[2])
+"""
+
+
+def time_process(command, env, warmup=False):
+    """Best and median wall time of running ``command`` in milliseconds."""
+    times = []
+    for run in range(REPEATS + (1 if warmup else 0)):
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, timeout=120)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            raise RuntimeError(f"{command[0]} failed: {result.stderr.strip()}")
+        if warmup and run == 0:
+            continue
+        times.append(elapsed * 1000)
+    return min(times), statistics.median(times)
+
+
+def frozen_executable(directory):
+    for name in ("Blurrify.exe", "Blurrify"):
+        path = Path(directory) / name
+        if path.is_file():
+            return str(path)
+    raise SystemExit(f"No Blurrify executable in {directory}")
+
+
+def cases(directory, frozen):
+    source = str(Path(directory) / "input.png")
+    Image.effect_noise((1200, 800), 32).convert("RGB").save(source)
+    target = str(Path(directory) / "output.jpg")
+    yield "first-image", [sys.executable, "-c", FIRST_IMAGE, source, target], False
+    yield "gui", [sys.executable, "Blurrify.py", "--startup-timing"], False
+    for build in frozen:
+        yield f"frozen {build}", [frozen_executable(build), "--startup-timing"], True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Blurrify cold-start benchmark")
+    parser.add_argument("--frozen", action="append", default=[],
+                        help="Directory of a cx_Freeze build to time; may be given more than once")
+    args = parser.parse_args(argv)
+
+    base_env = {key: value for key, value in os.environ.items() if key != "BLURRIFY_ALL_CODECS"}
+    base_env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    print("| case | registry | best (ms) | median (ms) |")
+    print("|---|---|---:|---:|")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, command, warmup in cases(directory, args.frozen):
+            for variant, extra in VARIANTS.items():
+                best, median = time_process(command, dict(base_env, **extra), warmup)
+                print(f"| {name} | {variant} | {best:.0f} | {median:.0f} |", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Decoded-image cache benchmark
+Times opening a 24 MP PNG and JPEG through ImageProcessor: decoding with no cache, the
+first open that also fills the cache, and reopening from the memory-mapped cache. A
+mapped open reads nothing yet, so the time to the first display, which reads every
+pixel once, is shown as well.
+
+Run from the project root:
+    python benchmarks/bench_decode_cache.py
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.decode_cache import DecodeCache  # noqa: E402
+from src.core.image_processor import ImageProcessor  # noqa: E402
+
+IMAGE_SIZE = (6000, 4000)  # 24 MP
+VIEWER_SIZE = (1200, 800)
+REPEATS = 3
+
+
+def make_photo():
+    """Smooth areas, edges and sensor-like noise, which compress like a camera photo."""
+    return Image.merge("RGB", [
+        Image.linear_gradient("L").resize(IMAGE_SIZE),
+        Image.effect_mandelbrot(IMAGE_SIZE, (-2.0, -1.2, 1.0, 1.2), 60),
+        Image.effect_noise(IMAGE_SIZE, 8),
+    ])
+
+
+def open_ms(path, cache=None, display=False):
+    start = time.perf_counter()
+    processor = ImageProcessor(decode_cache=cache)
+    processor.open_image(path)
+    if display:
+        processor.get_display_image(VIEWER_SIZE)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    photo = make_photo()
+    print("| file | decode (ms) | first open + store (ms) | cached open (ms) | decode + display (ms) "
+          "| cached open + display (ms) |")
+    print("|---|---:|---:|---:|---:|---:|")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, options in (("24mp.png", {"compress_level": 1}), ("24mp.jpg", {"quality": 90})):
+            path = str(Path(directory) / name)
+            photo.save(path, **options)
+            cache = DecodeCache(str(Path(directory) / "cache"))
+            decode = min(open_ms(path) for _ in range(REPEATS))
+            first = open_ms(path, cache)
+            cached = min(open_ms(path, cache) for _ in range(REPEATS))
+            decode_display = min(open_ms(path, display=True) for _ in range(REPEATS))
+            cached_display = min(open_ms(path, cache, display=True) for _ in range(REPEATS))
+            print(f"| {name} | {decode:.0f} | {first:.0f} | {cached:.1f} | {decode_display:.0f} "
+                  f"| {cached_display:.0f} |")
+            cache.purge()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Display latency benchmark
+Times "make an edit, then get something to show" for growing source resolutions: the
+previous path (edit at full resolution, then convert the whole image for display)
+against deferred edits previewed on the display proxy pyramid.
+
+Run from the project root:
+    python benchmarks/bench_display_latency.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.image_processor import ImageProcessor  # noqa: E402
+
+IMAGE_SIDES = [1000, 2000, 4000, 8000]  # 1 MP .. 64 MP
+VIEWER_SIZE = (1280, 800)
+REPEATS = 3
+
+
+def make_processor(side, deferred):
+    small = np.random.default_rng(0).integers(0, 256, (side // 16, side // 16, 4), dtype=np.uint8)
+    processor = ImageProcessor()
+    processor._current_image = Image.fromarray(small, "RGBA").resize((side, side), Image.Resampling.BILINEAR)
+    processor.set_deferred(deferred)
+    return processor
+
+
+def best_of(edit, reset):
+    """Best-of-N wall time of ``edit`` in milliseconds, calling ``reset`` untimed after each run."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        edit()
+        best = min(best, time.perf_counter() - start)
+        reset()
+    return best * 1000
+
+
+def main():
+    print(f"Edit: blur r=10 and pixelate 20 over the central quarter; viewer {VIEWER_SIZE[0]}x{VIEWER_SIZE[1]}\n")
+    print("| image | full-res edit + display (ms) | proxy preview (ms) | pyramid build (ms) |")
+    print("|------:|-----------------------------:|-------------------:|-------------------:|")
+    for side in IMAGE_SIDES:
+        region = (side // 4, side // 4, 3 * side // 4, 3 * side // 4)
+
+        full = make_processor(side, deferred=False)
+
+        def full_res():
+            full.apply_blur(region, 10)
+            full.pixelate_region(region, 20)
+            full.get_current_image().tobytes("raw", "RGBA")
+
+        def full_reset():
+            full.undo()
+            full.undo()
+            full.effect_cache.clear()
+
+        full_ms = best_of(full_res, full_reset)
+        del full
+
+        proxy = make_processor(side, deferred=True)
+        start = time.perf_counter()
+        proxy.get_display_image(VIEWER_SIZE)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        def preview():
+            proxy.apply_blur(region, 10)
+            proxy.pixelate_region(region, 20)
+            proxy.get_display_image(VIEWER_SIZE).tobytes("raw", "RGBA")
+
+        def preview_reset():
+            proxy.undo()
+            proxy.undo()
+            proxy.get_display_image(VIEWER_SIZE)
+
+        proxy_ms = best_of(preview, preview_reset)
+        print(f"| {side}x{side} | {full_ms:28.1f} | {proxy_ms:18.1f} | {build_ms:18.1f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Export preset benchmark
+Encodes a 24 MP photo-like image with every export preset and reports encode time and
+output size. It then encodes the default PNG preset on a worker thread while the main
+thread tries to tick every millisecond, showing how long the GUI thread would stall.
+
+Run from the project root:
+    python benchmarks/bench_export.py
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.export import PRESETS, encode_image  # noqa: E402
+
+IMAGE_SIZE = (6000, 4000)  # 24 MP
+REPEATS = 3
+REPEAT_BUDGET = 10.0  # seconds; slow presets such as png-optimized are timed once
+
+
+def make_photo():
+    """Smooth areas, edges and sensor-like noise, which compress like a camera photo."""
+    return Image.merge("RGB", [
+        Image.linear_gradient("L").resize(IMAGE_SIZE),
+        Image.effect_mandelbrot(IMAGE_SIZE, (-2.0, -1.2, 1.0, 1.2), 60),
+        Image.effect_noise(IMAGE_SIZE, 8),
+    ])
+
+
+def time_preset(image, preset, directory):
+    path = str(Path(directory) / f"{preset.name}{preset.extension}")
+    best, spent = float("inf"), 0.0
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        encode_image(image, path, preset)
+        seconds = time.perf_counter() - start
+        best, spent = min(best, seconds), spent + seconds
+        if spent > REPEAT_BUDGET:
+            break
+    return best, Path(path).stat().st_size
+
+
+def worst_stall(image, preset, directory):
+    """Longest gap between 1 ms ticks of this thread while ``preset`` encodes on another."""
+    worker = threading.Thread(target=encode_image, args=(image, str(Path(directory) / "stall"), preset))
+    worst, last = 0.0, time.perf_counter()
+    worker.start()
+    while worker.is_alive():
+        time.sleep(0.001)
+        now = time.perf_counter()
+        worst, last = max(worst, now - last), now
+    worker.join()
+    return worst
+
+
+def main():
+    image = make_photo()
+    print("| preset | encode (ms) | size (MB) | MP/s |")
+    print("|---|---:|---:|---:|")
+    with tempfile.TemporaryDirectory() as directory:
+        for preset in PRESETS.values():
+            seconds, nbytes = time_preset(image, preset, directory)
+            megapixels = IMAGE_SIZE[0] * IMAGE_SIZE[1] / 1e6
+            print(f"| {preset.name} | {seconds * 1000:.0f} | {nbytes / (1024 * 1024):.1f} | "
+                  f"{megapixels / seconds:.1f} |")
+        stall = worst_stall(image, PRESETS["png"], directory)
+    print(f"\nLongest main-thread stall while png encodes on a worker: {stall * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Multi-frame streaming benchmark
+Redacts animated GIFs and APNGs of growing frame counts and reports the time and the
+peak resident memory of each run. The memory of ImageProcessor.stream_frames, which
+edits one frame at a time, is compared with Pillow's save_all, which is given every
+frame at once. Each case runs in a fresh process so the peaks do not mix.
+
+Run from the project root (peak memory is read on Linux and macOS, not on Windows):
+    python benchmarks/bench_frames.py
+"""
+
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.core.operations import Operation  # noqa: E402
+
+FRAME_SIZE = (640, 480)
+FRAME_COUNTS = [10, 40, 120]
+FORMATS = {"gif": "GIF", "apng": "PNG"}
+OPERATION = Operation("blur", (100, 100, 400, 300), radius=8.0)
+
+STREAM = """
+import sys
+from src.core.image_processor import ImageProcessor
+from src.core.operations import Operation
+ImageProcessor().stream_frames(sys.argv[1], sys.argv[2], [Operation.from_dict({operation})])
+"""
+
+# Decodes and edits every frame, then hands them all to Pillow's encoder.
+SAVE_ALL = """
+import sys
+from PIL import ImageFilter
+from src.core.frames import read_frames
+region = {operation}["region"]
+frames = []
+for frame, info in read_frames(sys.argv[1]):
+    frame.paste(frame.crop(region).filter(ImageFilter.GaussianBlur({operation}["radius"])), region[:2])
+    frames.append(frame)
+frames[0].save(sys.argv[2], save_all=True, append_images=frames[1:], duration=40, loop=0)
+"""
+
+# Peak RSS in KB. ru_maxrss survives exec on Linux, so it would include the parent's peak;
+# VmHWM belongs to the new process image alone.
+PEAK = """
+import resource, sys
+if sys.platform.startswith("linux"):
+    with open("/proc/self/status") as f:
+        print(next(int(line.split()[1]) for line in f if line.startswith("VmHWM")))
+else:
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1))
+"""
+
+
+def make_animation(path, format, count):
+    base = Image.merge("RGB", [Image.linear_gradient("L").resize(FRAME_SIZE),
+                               Image.effect_mandelbrot(FRAME_SIZE, (-2.0, -1.2, 1.0, 1.2), 60),
+                               Image.effect_noise(FRAME_SIZE, 16)])
+    frames = [base.rotate(i * 360 / count) for i in range(1, count)]
+    base.save(path, format=format, save_all=True, append_images=frames, duration=40, loop=0)
+
+
+def run(script, source, target):
+    """Wall time in ms and peak RSS in MB of running ``script`` on ``source``."""
+    code = script.format(operation=repr(OPERATION.to_dict())) + PEAK
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code, source, target], cwd=ROOT, capture_output=True,
+                            text=True, check=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, int(result.stdout.strip().splitlines()[-1]) / 1024
+
+
+def main():
+    print(f"Frames of {FRAME_SIZE[0]}x{FRAME_SIZE[1]}, blur of {OPERATION.region}")
+    print("| format | frames | stream (ms) | stream peak (MB) | save_all (ms) | save_all peak (MB) |")
+    print("|---|---:|---:|---:|---:|---:|")
+    with tempfile.TemporaryDirectory() as directory:
+        for label, format in FORMATS.items():
+            extension = ".gif" if format == "GIF" else ".png"
+            for count in FRAME_COUNTS:
+                source = str(Path(directory) / f"in{extension}")
+                make_animation(source, format, count)
+                target = str(Path(directory) / f"out{extension}")
+                stream_ms, stream_mb = run(STREAM, source, target)
+                save_ms, save_mb = run(SAVE_ALL, source, target)
+                print(f"| {label} | {count} | {stream_ms:.0f} | {stream_mb:.0f} | {save_ms:.0f} | {save_mb:.0f} |",
+                      flush=True)
+
+
+if __name__ == "__main__":
+    main()
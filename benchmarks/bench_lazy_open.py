@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Lazy open benchmark
+Compares time-to-first-pixel for a 24 MP JPEG: a full open followed by a viewer-sized
+thumbnail, against a lazy open with a draft-decoded preview.
+
+Run from the project root:
+    python benchmarks/bench_lazy_open.py
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.image_processor import ImageProcessor  # noqa: E402
+
+IMAGE_SIZE = (6000, 4000)  # 24 MP
+VIEWER_SIZE = (800, 600)
+REPEATS = 5
+
+
+def make_jpeg(path):
+    """A 24 MP JPEG with smooth areas, edges and sensor-like noise, similar in size to a camera photo."""
+    Image.merge("RGB", [
+        Image.linear_gradient("L").resize(IMAGE_SIZE),
+        Image.effect_mandelbrot(IMAGE_SIZE, (-2.0, -1.2, 1.0, 1.2), 60),
+        Image.effect_noise(IMAGE_SIZE, 8),
+    ]).save(path, quality=90)
+
+
+def eager(path):
+    processor = ImageProcessor()
+    processor.open_image(path)
+    image = processor.get_current_image()
+    image.thumbnail(VIEWER_SIZE)
+    return image
+
+
+def lazy(path):
+    processor = ImageProcessor()
+    processor.open_image(path, lazy=True)
+    return processor.get_preview(VIEWER_SIZE)
+
+
+def best_of(fn, path):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(path)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / "24mp.jpg")
+        make_jpeg(path)
+        eager_ms = best_of(eager, path)
+        lazy_ms = best_of(lazy, path)
+    print(f"eager open + thumbnail: {eager_ms:8.1f} ms")
+    print(f"lazy open + draft:      {lazy_ms:8.1f} ms")
+    print(f"speed-up:               {eager_ms / lazy_ms:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tile-parallel effect benchmark
+Blurs and pixelates the lower half of a large image in one process and then through
+a TilePool of 1 to N workers, where N is the number of CPUs, and reports the time,
+the speedup over the single process and whether the pixels are identical. Each pool
+is warmed up first, so process start-up is not counted.
+
+Run from the project root:
+    python benchmarks/bench_parallel.py [megapixels] [max workers]
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.image_processor import ImageProcessor  # noqa: E402
+from src.core.parallel import TilePool  # noqa: E402
+
+REPEATS = 3
+EFFECTS = {
+    "blur r=8 (pillow)": ("pillow", lambda processor, region: processor.apply_blur(region, 8.0)),
+    "blur r=24 (box)": ("box", lambda processor, region: processor.apply_blur(region, 24.0)),
+    "pixelate 16": ("pillow", lambda processor, region: processor.pixelate_region(region, 16)),
+}
+
+
+def make_image(megapixels):
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    rng = np.random.default_rng(0)
+    small = rng.integers(0, 256, (height // 8, width // 8, 4), dtype=np.uint8)
+    return Image.fromarray(small, "RGBA").resize((width, height), Image.Resampling.BILINEAR)
+
+
+def run(image, engine, edit, pool):
+    """Best time in ms of editing the lower half of ``image``, and the result."""
+    processor = ImageProcessor(blur_engine=engine, history_bytes=0, cache_bytes=0, tile_pool=pool)
+    width, height = image.size
+    region = (0, height // 2, width, height)
+    best = float("inf")
+    for _ in range(REPEATS):
+        processor._current_image = image.copy()
+        start = time.perf_counter()
+        edit(processor, region)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, processor._current_image
+
+
+def main():
+    megapixels = float(sys.argv[1]) if len(sys.argv) > 1 else 24
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    image = make_image(megapixels)
+    print(f"{image.size[0]}x{image.size[1]} image, lower half edited, {os.cpu_count()} CPUs")
+    print("| effect | workers | time (ms) | speedup | identical |")
+    print("|---|---:|---:|---:|:---:|")
+    for label, (engine, edit) in EFFECTS.items():
+        single, expected = run(image, engine, edit, None)
+        print(f"| {label} | single process | {single:.0f} | 1.00x | yes |", flush=True)
+        for workers in range(1, max_workers + 1):
+            # A pool of one worker still goes through shared memory, which shows its overhead.
+            with TilePool(workers, min_pixels=0) as pool:
+                run(image.crop((0, 0, 256, 256)), engine, edit, pool)
+                elapsed, result = run(image, engine, edit, pool)
+            same = "yes" if result.tobytes() == expected.tobytes() else "NO"
+            print(f"| {label} | {workers} | {elapsed:.0f} | {single / elapsed:.2f}x | {same} |", flush=True)
+
+
+if __name__ == "__main__":
+    main()
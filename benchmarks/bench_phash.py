@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Perceptual-hash lookup benchmark
+Fills a MultiIndexHash with synthetic dHashes, clustered like near-duplicate
+screenshots of a few thousand screens, and times looking up near-duplicates and
+unrelated images against a linear scan of every hash, for several index sizes.
+
+Run from the project root:
+    python benchmarks/bench_phash.py [max distance]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.phash import DEFAULT_MAX_DISTANCE, MultiIndexHash, hamming  # noqa: E402
+
+SIZES = (10_000, 100_000, 300_000)
+QUERIES = 200
+PER_SCREEN = 50  # near-duplicates of each screen
+
+
+def near(rng, key, bits):
+    for _ in range(bits):
+        key ^= 1 << rng.randrange(64)
+    return key
+
+
+def main():
+    max_distance = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MAX_DISTANCE
+    print(f"max distance {max_distance}")
+    print("| hashes | queries | linear scan (ms) | multi-index (ms) | speedup | same matches |")
+    print("|---:|---|---:|---:|---:|:---:|")
+    for entries in SIZES:
+        rng = random.Random(0)
+        screens = [rng.getrandbits(64) for _ in range(entries // PER_SCREEN)]
+        keys = [near(rng, rng.choice(screens), rng.randrange(4)) for _ in range(entries)]
+        hashes = MultiIndexHash()
+        for number, key in enumerate(keys):
+            hashes.add(key, number)
+        workloads = {
+            "near-duplicates": [near(rng, rng.choice(screens), 3) for _ in range(QUERIES)],
+            "unrelated": [rng.getrandbits(64) for _ in range(QUERIES)],
+        }
+        for label, queries in workloads.items():
+            start = time.perf_counter()
+            expected = [sorted(number for number, key in enumerate(keys) if hamming(query, key) <= max_distance)
+                        for query in queries]
+            linear = (time.perf_counter() - start) * 1000 / len(queries)
+            start = time.perf_counter()
+            found = [sorted(number for _, number in hashes.search(query, max_distance)) for query in queries]
+            indexed = (time.perf_counter() - start) * 1000 / len(queries)
+            same = "yes" if found == expected else "NO"
+            print(f"| {entries} | {label} | {linear:.2f} | {indexed:.3f} | {linear / indexed:.0f}x | {same} |",
+                  flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Pixelation benchmark
+Times the NumPy block-average engine in src.core.pixelate against the previous
+pixelation (two NEAREST resizes, which samples one pixel per block instead of
+averaging it) and against averaging with Pillow's reduce, for a range of region and
+block sizes.
+
+Run from the project root:
+    python benchmarks/bench_pixelate.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.pixelate import pixelate_image  # noqa: E402
+
+REGION_SIDES = [64, 256, 1000, 2000, 4000]
+BLOCK_SIZES = [5, 16, 50]
+REPEATS = 5
+
+
+def pixelate_nearest(image, pixel_size):
+    """The previous implementation: sample one pixel per block and scale it back up."""
+    w, h = image.size
+    small = image.resize((max(1, w // pixel_size), max(1, h // pixel_size)), resample=Image.Resampling.NEAREST)
+    return small.resize((w, h), resample=Image.Resampling.NEAREST)
+
+
+def pixelate_reduce(image, pixel_size):
+    """Block averages with Pillow: reduce, then scale back up."""
+    return image.reduce(pixel_size).resize(image.size, resample=Image.Resampling.NEAREST)
+
+
+def best_of(fn):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print("| region | block | nearest (ms) | pillow reduce (ms) | block average (ms) | vs reduce |")
+    print("|-------:|------:|-------------:|-------------------:|-------------------:|----------:|")
+    for side in REGION_SIDES:
+        # An odd size so the last row and column of blocks are ragged.
+        image = Image.fromarray(rng.integers(0, 256, (side + 3, side + 3, 4), dtype=np.uint8), "RGBA")
+        for block in BLOCK_SIZES:
+            nearest = best_of(lambda: pixelate_nearest(image, block))
+            reduce = best_of(lambda: pixelate_reduce(image, block))
+            average = best_of(lambda: pixelate_image(image, block))
+            print(f"| {side + 3:6} | {block:5} | {nearest:12.2f} | {reduce:18.2f} | {average:18.2f} "
+                  f"| {reduce / average:8.2f}x |")
+
+
+if __name__ == "__main__":
+    main()
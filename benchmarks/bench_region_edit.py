@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Region edit benchmark
+Shows that the cost of a blur/pixelate edit follows the region size, not the image size.
+
+Run from the project root:
+    python benchmarks/bench_region_edit.py
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.image_processor import ImageProcessor  # noqa: E402
+
+IMAGE_SIDES = [1000, 2000, 4000, 7750]  # 1 MP .. 60 MP
+REGION_SIDES = [40, 160, 640]
+REPEATS = 5
+
+
+def load_processor(side, directory):
+    """Write an uncompressed test image of side x side pixels and open it."""
+    path = Path(directory) / f"bench_{side}.bmp"
+    if not path.exists():
+        Image.new("RGB", (side, side), color=(200, 60, 30)).save(path)
+    processor = ImageProcessor()
+    processor.open_image(str(path))
+    return processor
+
+
+def time_edit(edit, repeats=REPEATS):
+    """Best-of-N wall time of a single edit, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        edit()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    print(f"{'image':>12} {'region':>8} {'blur r=5 (ms)':>14} {'pixelate 10 (ms)':>17}")
+    with tempfile.TemporaryDirectory() as directory:
+        for side in IMAGE_SIDES:
+            processor = load_processor(side, directory)
+            for region_side in REGION_SIDES:
+                region = (10, 10, 10 + region_side, 10 + region_side)
+                blur_ms = time_edit(lambda: processor.apply_blur(region, 5))
+                pixel_ms = time_edit(lambda: processor.pixelate_region(region, 10))
+                print(f"{side}x{side:<7} {region_side:>8} {blur_ms:>14.2f} {pixel_ms:>17.2f}")
+            del processor
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite
+Times the main ImageProcessor operations and the viewer upload, writes the results to
+a JSON baseline and compares a run against an earlier baseline, flagging regressions.
+
+Cases: open_image per format, apply_blur over a grid of radius x region size x image
+size, pixelate_region per region size, apply_crop, save_image per format, and
+ImageViewer.set_image under the offscreen Qt platform.
+
+Run from the project root:
+    python benchmarks/bench_suite.py --output baseline.json
+    python benchmarks/bench_suite.py --compare baseline.json --threshold 0.15
+    python benchmarks/bench_suite.py --quick --filter blur
+
+With --compare the exit status is 1 when any case got slower than the baseline by
+more than the threshold (and by more than --min-delta milliseconds, to ignore noise
+on very short cases). Baselines are only comparable on the same machine.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+
+import PIL
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.image_processor import ImageProcessor  # noqa: E402
+
+IMAGE_SIZES = {"1mp": (1200, 800), "12mp": (4000, 3000)}
+QUICK_IMAGE_SIZES = {"1mp": (1200, 800)}
+BLUR_RADII = [2, 8, 32]
+REGION_SIDES = [64, 256, 1024]
+PIXEL_SIZE = 16
+OPEN_FORMATS = {"png": {"compress_level": 1}, "jpeg": {"quality": 90}, "bmp": {}}
+SAVE_FORMATS = ["png", "jpeg", "bmp", "tiff", "webp"]
+VIEWER_SIZE = (1200, 800)
+
+REPEATS = 5
+REPEAT_BUDGET = 5.0  # seconds per case; slow cases are timed fewer times
+DEFAULT_THRESHOLD = 0.15
+DEFAULT_MIN_DELTA_MS = 1.0
+
+
+def make_photo(size):
+    """Smooth areas, edges and sensor-like noise, which compress like a camera photo."""
+    return Image.merge("RGB", [
+        Image.linear_gradient("L").resize(size),
+        Image.effect_mandelbrot(size, (-2.0, -1.2, 1.0, 1.2), 60),
+        Image.effect_noise(size, 8),
+    ])
+
+
+def measure(run, setup=None, teardown=None):
+    """Best and median wall time of ``run`` in milliseconds; ``setup`` and ``teardown`` are not timed."""
+    times = []
+    spent = 0.0
+    for _ in range(REPEATS):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        if teardown is not None:
+            teardown()
+        times.append(elapsed * 1000)
+        spent += elapsed
+        if spent > REPEAT_BUDGET:
+            break
+    return {"best_ms": min(times), "median_ms": statistics.median(times), "runs": len(times)}
+
+
+def open_processor(path):
+    # The effect cache would turn repeated edits into lookups, so it is disabled.
+    processor = ImageProcessor(cache_bytes=0)
+    processor.open_image(path)
+    return processor
+
+
+def processor_cases(directory, image_sizes):
+    """Yields (name, timer) for every ImageProcessor case; calling the timer runs the case.
+
+    Each timer must be called before the generator advances, as the cases share state.
+    """
+    for label, size in image_sizes.items():
+        photo = make_photo(size)
+        paths = {}
+        for format, options in OPEN_FORMATS.items():
+            paths[format] = str(Path(directory) / f"{label}.{format}")
+            photo.save(paths[format], **options)
+            yield f"open/{format}/{label}", partial(measure, lambda: ImageProcessor().open_image(paths[format]))
+
+        processor = open_processor(paths["bmp"])
+        for radius in BLUR_RADII:
+            for side in REGION_SIDES:
+                region = (10, 10, 10 + min(side, size[0] - 20), 10 + min(side, size[1] - 20))
+                yield (f"blur/r{radius}/region{side}/{label}",
+                       partial(measure, lambda: processor.apply_blur(region, radius)))
+        for side in REGION_SIDES:
+            region = (10, 10, 10 + min(side, size[0] - 20), 10 + min(side, size[1] - 20))
+            yield (f"pixelate/p{PIXEL_SIZE}/region{side}/{label}",
+                   partial(measure, lambda: processor.pixelate_region(region, PIXEL_SIZE)))
+
+        crop = (size[0] // 4, size[1] // 4, 3 * size[0] // 4, 3 * size[1] // 4)
+        yield f"crop/half/{label}", partial(measure, lambda: processor.apply_crop(crop), teardown=processor.undo)
+
+        processor = open_processor(paths["bmp"])
+        for format in SAVE_FORMATS:
+            target = str(Path(directory) / f"saved.{format}")
+            yield f"save/{format}/{label}", partial(measure, lambda: processor.save_image(target))
+
+
+def viewer_cases(image_sizes):
+    """Yields (name, timer) for uploading images into ImageViewer with the offscreen Qt platform."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+
+    from src.gui.image_viewer import ImageViewer
+
+    app = QApplication.instance() or QApplication([])
+    viewer = ImageViewer()
+    viewer.resize(*VIEWER_SIZE)
+    for label, size in image_sizes.items():
+        image = make_photo(size).convert("RGBA")
+
+        def upload():
+            viewer.set_image(image)
+            app.processEvents()
+
+        yield f"viewer/set_image/{label}", partial(measure, upload)
+
+
+def run_suite(quick=False, pattern=None):
+    image_sizes = QUICK_IMAGE_SIZES if quick else IMAGE_SIZES
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        cases = [processor_cases(directory, image_sizes), viewer_cases(image_sizes)]
+        for generator in cases:
+            for name, timer in generator:
+                if pattern and pattern not in name:
+                    continue
+                timing = results[name] = timer()
+                print(f"{name:<40} {timing['best_ms']:>10.2f} ms (median {timing['median_ms']:.2f}, "
+                      f"{timing['runs']} runs)", flush=True)
+    return results
+
+
+def machine_info():
+    return {"python": platform.python_version(), "pillow": PIL.__version__, "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(), "cpus": os.cpu_count()}
+
+
+def compare(baseline, results, threshold=DEFAULT_THRESHOLD, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    """Rows of (name, old ms, new ms, ratio, status) comparing best times; status is ok, REGRESSION,
+    faster, new or missing."""
+    rows = []
+    for name in sorted(set(baseline) | set(results)):
+        if name not in baseline:
+            rows.append((name, None, results[name]["best_ms"], None, "new"))
+            continue
+        if name not in results:
+            rows.append((name, baseline[name]["best_ms"], None, None, "missing"))
+            continue
+        old, new = baseline[name]["best_ms"], results[name]["best_ms"]
+        ratio = new / old if old else float("inf")
+        if ratio > 1 + threshold and new - old > min_delta_ms:
+            status = "REGRESSION"
+        elif ratio < 1 / (1 + threshold) and old - new > min_delta_ms:
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((name, old, new, ratio, status))
+    return rows
+
+
+def print_comparison(rows):
+    print("| case | baseline (ms) | now (ms) | ratio | |")
+    print("|---|---:|---:|---:|---|")
+    for name, old, new, ratio, status in rows:
+        old_text = f"{old:.2f}" if old is not None else "-"
+        new_text = f"{new:.2f}" if new is not None else "-"
+        ratio_text = f"{ratio:.2f}x" if ratio is not None else "-"
+        print(f"| {name} | {old_text} | {new_text} | {ratio_text} | {status} |")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Blurrify benchmark suite")
+    parser.add_argument("--output", help="Write the results to this JSON baseline")
+    parser.add_argument("--compare", help="Compare against this JSON baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slow-down counted as a regression (default: %(default)s)")
+    parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="Ignore differences smaller than this many ms (default: %(default)s)")
+    parser.add_argument("--quick", action="store_true", help="Only the small image size")
+    parser.add_argument("--filter", help="Only run cases whose name contains this text")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    results = run_suite(args.quick, args.filter)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"machine": machine_info(), "results": results}, f, indent=2, sort_keys=True)
+        print(f"\nWrote {len(results)} results to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("machine") != machine_info():
+            print("\nWarning: the baseline was recorded on another machine or software version")
+        baseline_results = baseline["results"]
+        if args.filter or args.quick:
+            # Cases this run skipped on purpose are not missing.
+            baseline_results = {name: timing for name, timing in baseline_results.items() if name in results}
+        rows = compare(baseline_results, results, args.threshold, args.min_delta)
+        print()
+        print_comparison(rows)
+        regressions = [row for row in rows if row[4] == "REGRESSION"]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
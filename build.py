@@ -140,7 +140,7 @@ def main():
     print("🚀 Blurrify Build Process Starting...")
 
     # Check if we're in the right directory
-    if not Path("src/main.py").exists():
+    if not Path("Blurrify.py").exists():
         print("✗ Error: Please run this script from the project root directory")
         sys.exit(1)
 
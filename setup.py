@@ -4,18 +4,25 @@ from cx_Freeze import Executable, setup
 
 # Dependencies - optimized for smaller size
 build_exe_options = {
-    "packages": ["PyQt6.QtCore", "PyQt6.QtGui", "PyQt6.QtWidgets", "PIL"],
+    # All of PIL is shipped so files in rare formats still open, but at runtime only the
+    # PNG, JPEG, WebP and TIFF plugins are imported (see src/core/codecs.py).
+    "packages": ["PyQt6.QtCore", "PyQt6.QtGui", "PyQt6.QtWidgets", "PIL", "numpy"],
     "include_files": [
         ("assets/", "assets/"),  # Copy assets folder
     ],
+    # multiprocessing (with concurrent, pickle and socket, which it imports) stays in: the
+    # batch and watch commands and the tile pool of src/core/parallel.py run worker processes.
     "excludes": [
         "tkinter", "unittest", "email", "http", "xml", "pydoc",
-        "sqlite3", "bz2", "lzma", "socket", "ssl", "urllib",
-        "multiprocessing", "concurrent", "asyncio", "pickle",
+        "sqlite3", "bz2", "lzma", "ssl", "urllib", "asyncio",
         "PyQt6.QtNetwork", "PyQt6.QtOpenGL", "PyQt6.QtSql",
         "PyQt6.QtTest", "PyQt6.QtXml", "PyQt6.QtSvg"
     ],
     "optimize": 2,  # Optimize bytecode
+    # Precompiled bytecode goes into one library.zip, which starts faster than thousands
+    # of loose files. PyQt6 (Qt plugins) and NumPy (bundled DLLs) need real directories.
+    "zip_include_packages": ["*"],
+    "zip_exclude_packages": ["PyQt6", "numpy"],
     "build_exe": "build/Blurrify",
 }
 
@@ -30,7 +37,7 @@ setup(
     options={"build_exe": build_exe_options},
     executables=[
         Executable(
-            "src/main.py",
+            "Blurrify.py",
             base=base,
             icon="assets/icon.ico",  # Using converted ICO icon
             target_name="Blurrify.exe",
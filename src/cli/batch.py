@@ -0,0 +1,349 @@
+"""
+Headless batch processing.
+
+Applies a JSON recipe of blur, pixelate and crop operations to many images through
+ImageProcessor, spreading files across a process pool. Never imports PyQt6.
+
+    python -m Blurrify batch recipe.json "scans/*.png" photos/ -o redacted/ --jobs 8
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.core.decode_cache import DecodeCache, default_cache_dir
+from src.core.codecs import format_for_extension
+from src.core.export import PRESETS
+from src.core.frames import MULTIFRAME_FORMATS, frame_count
+from src.core.image_processor import ImageProcessor
+from src.core.manifest import Manifest, recipe_digest
+from src.core.operations import Operation, apply_operations, load_frame_operations, load_recipe
+from src.core.parallel import TilePool
+from src.core.phash import (DEFAULT_MAX_DISTANCE, IndexEntry, RecipeIndex, default_index_path, fingerprint,
+                            merge_operations)
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff", ".webp")
+
+
+@dataclass
+class FileResult:
+    """Outcome of processing one input file."""
+    input_path: str
+    output_path: Optional[str]
+    input_bytes: int
+    seconds: float
+    error: Optional[str] = None
+    skipped: bool = False  # the output of an earlier run was reused
+    matched: Optional[str] = None  # the indexed image whose regions were applied as well as the recipe
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchSummary:
+    """Totals for a batch run."""
+    processed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    input_bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def images_per_second(self) -> float:
+        return self.processed / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.input_bytes / (1024 * 1024) / self.seconds if self.seconds > 0 else 0.0
+
+    def format(self) -> str:
+        skipped = f"{self.skipped} unchanged, " if self.skipped else ""
+        return (f"Processed {self.processed} image(s), {skipped}{self.failed} failed, in {self.seconds:.2f}s: "
+                f"{self.images_per_second:.1f} images/s, {self.megabytes_per_second:.1f} MB/s")
+
+
+def collect_inputs(patterns: Iterable[str]) -> List[str]:
+    """Expands directories and glob patterns into a sorted, de-duplicated list of image files."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern, recursive=True)
+        paths.extend(p for p in candidates if os.path.isfile(p) and p.lower().endswith(IMAGE_EXTENSIONS))
+    return sorted(set(paths))
+
+
+def output_path_for(input_path: str, output_dir: str, format: Optional[str] = None) -> str:
+    """Output file for an input: same name in ``output_dir``, with the extension of ``format`` if given."""
+    name = os.path.basename(input_path)
+    if format:
+        name = os.path.splitext(name)[0] + "." + format.lower().replace("jpeg", "jpg")
+    return os.path.join(output_dir, name)
+
+
+def _has_frames(input_path: str) -> bool:
+    """Whether the file holds several frames; unreadable files are left to ``open_image`` to report."""
+    try:
+        return frame_count(input_path) > 1
+    except Exception:
+        return False
+
+
+def process_file(input_path: str, operations: List[Operation], output_dir: str,
+                 format: Optional[str] = None, tiled: bool = False, preset: Optional[str] = None,
+                 decode_cache: Optional[str] = None, atomic: bool = False,
+                 frame_operations: Optional[Dict[int, List[Operation]]] = None,
+                 tile_pool: Optional[TilePool] = None) -> FileResult:
+    """Opens, edits and saves one file. Errors are captured in the result instead of raised.
+
+    Animated GIFs and APNGs and multi-page TIFFs saved to a format that holds several
+    frames are streamed frame by frame, with ``frame_operations`` applied to the frames
+    they name. ``decode_cache`` is a DecodeCache directory shared by all workers. With ``atomic``
+    the output is written to a hidden temporary file and renamed into place, so readers
+    of ``output_dir`` never see a partial file. A ``tile_pool`` splits large regions
+    across its workers.
+    """
+    start = time.perf_counter()
+    try:
+        input_bytes = os.path.getsize(input_path)
+    except OSError:
+        input_bytes = 0
+    output_path = output_path_for(input_path, output_dir, format)
+    # The temporary name keeps the extension, which picks the format when none is given.
+    save_path = (os.path.join(output_dir, f".writing-{os.getpid()}-{os.path.basename(output_path)}")
+                 if atomic else output_path)
+    try:
+        processor = ImageProcessor(tiled=tiled, decode_cache=DecodeCache(decode_cache) if decode_cache else None,
+                                   tile_pool=tile_pool)
+        output_format = (format or (PRESETS[preset].format if preset else None)
+                         or format_for_extension(os.path.splitext(output_path)[1]))
+        if output_format and output_format.upper() in MULTIFRAME_FORMATS and _has_frames(input_path):
+            processor.stream_frames(input_path, save_path, operations, frame_operations, format, preset)
+        else:
+            processor.open_image(input_path)
+            apply_operations(processor, operations)
+            processor.save_image(save_path, format=format, preset=preset)
+        if atomic:
+            os.replace(save_path, output_path)
+        return FileResult(input_path, output_path, input_bytes, time.perf_counter() - start)
+    except Exception as e:
+        if atomic and os.path.exists(save_path):
+            os.remove(save_path)
+        return FileResult(input_path, None, input_bytes, time.perf_counter() - start, error=str(e))
+
+
+def run_batch(inputs: List[str], operations: List[Operation], output_dir: str, jobs: int = 1,
+              ordered: bool = True, format: Optional[str] = None, tiled: bool = False,
+              preset: Optional[str] = None, decode_cache: Optional[str] = None,
+              frame_operations: Optional[Dict[int, List[Operation]]] = None,
+              tile_workers: int = 1, manifest: Optional[Manifest] = None,
+              index: Optional[RecipeIndex] = None) -> Iterator[FileResult]:
+    """Processes ``inputs`` and yields one FileResult per file.
+
+    With ``ordered`` results come back in input order, otherwise as soon as they finish.
+    ``jobs`` of 1 runs in-process without a pool; then ``tile_workers`` above 1 splits
+    each large blur or pixelation across that many processes instead. A ``preset``
+    without a ``format`` also sets the output format.
+
+    With a ``manifest``, an input whose contents were already processed with the same
+    recipe reuses that output and is yielded as skipped; every file written is recorded,
+    and the manifest is saved when the run ends, even if it is interrupted.
+
+    With an ``index``, every input is fingerprinted first. One that is a near-duplicate
+    of an indexed image also gets that image's regions, before ``operations``, and its
+    result names the image in ``matched``; the others are added to the index once processed.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if preset is not None and format is None:
+        format = PRESETS[preset].format
+    # Results decided before any processing: inputs whose output another input already
+    # claimed, and, with a manifest, inputs whose output an earlier run made.
+    settled: Dict[str, FileResult] = {
+        path: FileResult(path, None, 0, 0.0, error=f"has the same output file as {other}")
+        for path, other in output_collisions(inputs, output_dir, format).items()
+    }
+    fingerprints: Dict[str, Tuple[int, Tuple[int, int]]] = {}
+    file_operations: Dict[str, List[Operation]] = {}
+    matched: Dict[str, str] = {}
+    if index is not None:
+        fingerprints = _fingerprints([path for path in inputs if path not in settled], jobs)
+        for path, (key, size) in fingerprints.items():
+            found = index.match(key)
+            if found is not None:
+                file_operations[path] = merge_operations(operations, found[1].operations_for(size))
+                matched[path] = found[1].source
+
+    recipes: Dict[str, str] = {}
+    digests: Dict[str, str] = {}
+    if manifest is not None:
+        for path in inputs:
+            if path in settled:
+                continue
+            start = time.perf_counter()
+            recipes[path] = recipe_digest(file_operations.get(path, operations), frame_operations, format, preset)
+            try:
+                digests[path] = manifest.input_digest(path)
+                output_path = output_path_for(path, output_dir, format)
+                if manifest.reuse(path, digests[path], recipes[path], output_path):
+                    settled[path] = FileResult(path, output_path, os.path.getsize(path),
+                                               time.perf_counter() - start, skipped=True)
+            except OSError:
+                pass  # processed below, which reports the error
+
+    def finished(result: FileResult) -> FileResult:
+        result.matched = matched.get(result.input_path)
+        if result.ok and not result.skipped and result.input_path in fingerprints and result.matched is None:
+            key, size = fingerprints[result.input_path]
+            index.add(IndexEntry(key, size, operations, os.path.abspath(result.input_path)))
+        return result
+
+    try:
+        results = _run([path for path in inputs if path not in settled], operations, file_operations, output_dir,
+                       jobs, ordered, format, tiled, preset, decode_cache, frame_operations, tile_workers)
+        if not ordered:
+            for result in settled.values():
+                yield finished(result)
+        for path in inputs:
+            if path in settled:
+                if ordered:
+                    yield finished(settled[path])
+                continue
+            result = next(results)
+            if manifest is not None and result.ok and result.input_path in digests:
+                manifest.record(result.input_path, digests[result.input_path], recipes[result.input_path],
+                                result.output_path)
+            yield finished(result)
+    finally:
+        if manifest is not None:
+            manifest.save()
+
+
+def output_collisions(inputs: List[str], output_dir: str, format: Optional[str] = None) -> Dict[str, str]:
+    """Inputs whose output file is also the output of an earlier input, mapped to that input.
+
+    Outputs are named after the input's file name alone, so ``a/x.png`` and ``b/x.png``,
+    or ``x.png`` and ``x.jpg`` converted to one format, would overwrite each other.
+    """
+    claimed: Dict[str, str] = {}
+    collisions: Dict[str, str] = {}
+    for path in inputs:
+        output = os.path.normcase(os.path.abspath(output_path_for(path, output_dir, format)))
+        if output in claimed:
+            collisions[path] = claimed[output]
+        else:
+            claimed[output] = path
+    return collisions
+
+
+def _safe_fingerprint(path: str) -> Optional[Tuple[int, Tuple[int, int]]]:
+    """The fingerprint of an image file, or ``None`` for a file processing will report as unreadable."""
+    try:
+        return fingerprint(path)
+    except Exception:
+        return None
+
+
+def _fingerprints(inputs: List[str], jobs: int) -> Dict[str, Tuple[int, Tuple[int, int]]]:
+    if jobs <= 1:
+        values = [_safe_fingerprint(path) for path in inputs]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            values = list(executor.map(_safe_fingerprint, inputs, chunksize=16))
+    return {path: value for path, value in zip(inputs, values) if value is not None}
+
+
+def _run(inputs: List[str], operations: List[Operation], file_operations: Dict[str, List[Operation]],
+         output_dir: str, jobs: int, ordered: bool, format: Optional[str], tiled: bool, preset: Optional[str],
+         decode_cache: Optional[str], frame_operations: Optional[Dict[int, List[Operation]]],
+         tile_workers: int) -> Iterator[FileResult]:
+    if jobs <= 1:
+        with TilePool(tile_workers) as tile_pool:
+            for path in inputs:
+                yield process_file(path, file_operations.get(path, operations), output_dir, format, tiled, preset,
+                                   decode_cache, frame_operations=frame_operations,
+                                   tile_pool=tile_pool if tile_workers > 1 else None)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(process_file, path, file_operations.get(path, operations), output_dir, format,
+                                   tiled, preset, decode_cache, frame_operations=frame_operations)
+                   for path in inputs]
+        for future in (futures if ordered else as_completed(futures)):
+            yield future.result()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="Blurrify batch", description="Apply a recipe to many images.")
+    parser.add_argument("recipe", help="JSON recipe file with a list of operations")
+    parser.add_argument("inputs", nargs="+", help="Input directories, files or glob patterns")
+    parser.add_argument("-o", "--output", required=True, help="Output directory")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--unordered", action="store_true",
+                        help="Report files as they finish instead of in input order")
+    parser.add_argument("--format", help="Output format such as PNG or JPEG (default: keep extension)")
+    parser.add_argument("--preset", choices=list(PRESETS),
+                        help="Encoder preset, e.g. png-fast or jpeg-web (sets the format unless --format is given)")
+    parser.add_argument("--decode-cache", nargs="?", const=default_cache_dir(), metavar="DIR",
+                        help="Keep decoded pixels on disk so later runs memory-map them instead of decoding "
+                             "(default directory: %(const)s)")
+    parser.add_argument("--tiled", action="store_true",
+                        help="Keep images as tiles spilled to disk, for images too large for memory")
+    parser.add_argument("--tile-workers", type=int, default=1, metavar="N",
+                        help="With --jobs 1, split each large blur or pixelation across N processes")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Record inputs and recipe in a manifest in the output directory and skip inputs "
+                             "already processed with the same recipe")
+    parser.add_argument("--index", nargs="?", const=default_index_path(), metavar="FILE",
+                        help="Also give near-duplicates of images in this perceptual-hash index the regions "
+                             "used there, and add the other images with the recipe (default file: %(const)s)")
+    parser.add_argument("--max-distance", type=int, default=DEFAULT_MAX_DISTANCE, metavar="BITS",
+                        help="Largest hash distance, out of 64 bits, that counts as a near-duplicate "
+                             "(default: %(default)s)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        operations = load_recipe(args.recipe)
+        frame_operations = load_frame_operations(args.recipe)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read recipe {args.recipe}: {e}", file=sys.stderr)
+        return 2
+
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        print("No input images found", file=sys.stderr)
+        return 2
+
+    summary = BatchSummary()
+    start = time.perf_counter()
+    for result in run_batch(inputs, operations, args.output, jobs=args.jobs,
+                            ordered=not args.unordered, format=args.format, tiled=args.tiled,
+                            preset=args.preset, decode_cache=args.decode_cache,
+                            frame_operations=frame_operations, tile_workers=args.tile_workers,
+                            manifest=Manifest(args.output) if args.incremental else None,
+                            index=RecipeIndex(args.index, args.max_distance) if args.index else None):
+        if result.skipped:
+            summary.skipped += 1
+            print(f"skip  {result.input_path} -> {result.output_path} (unchanged)")
+        elif result.ok:
+            summary.processed += 1
+            summary.input_bytes += result.input_bytes
+            regions = f", regions of {result.matched}" if result.matched else ""
+            print(f"ok    {result.input_path} -> {result.output_path} ({result.seconds * 1000:.0f} ms{regions})")
+        else:
+            summary.failed += 1
+            print(f"error {result.input_path}: {result.error}", file=sys.stderr)
+    summary.seconds = time.perf_counter() - start
+    print(summary.format())
+    return 1 if summary.failed else 0
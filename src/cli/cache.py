@@ -0,0 +1,34 @@
+"""
+Decoded-image cache maintenance.
+
+Shows or clears the on-disk cache of decoded pixels used by ``batch --decode-cache``
+and the GUI. Never imports PyQt6.
+
+    python -m Blurrify cache info
+    python -m Blurrify cache purge --dir /tmp/blurrify-cache
+"""
+
+import argparse
+from typing import List, Optional
+
+from src.core.decode_cache import DecodeCache, default_cache_dir
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="Blurrify cache", description="Inspect or clear the decoded-image cache.")
+    parser.add_argument("action", choices=("info", "purge"))
+    parser.add_argument("--dir", default=default_cache_dir(), help="Cache directory (default: %(default)s)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    cache = DecodeCache(args.dir)
+    if args.action == "purge":
+        freed = cache.purge()
+        print(f"Removed {freed / (1024 * 1024):.1f} MB from {cache.directory}")
+    else:
+        entries = cache.entries()
+        total = sum(size for _, size, _ in entries)
+        print(f"{len(entries)} decoded image(s), {total / (1024 * 1024):.1f} MB in {cache.directory}")
+    return 0
@@ -0,0 +1,86 @@
+"""
+Perceptual-hash index of redacted images.
+
+Records the operations applied to images under their perceptual hash, and proposes
+them for near-duplicates, such as screenshots of the same screen with the sensitive
+boxes in the same spots. ``batch --index`` applies the proposals itself. Never
+imports PyQt6.
+
+    python -m Blurrify index add recipe.json "screens/login-*.png"
+    python -m Blurrify index match new/ --write proposed/
+    python -m Blurrify index info
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import List, Optional
+
+from src.cli.batch import collect_inputs
+from src.core.operations import load_recipe
+from src.core.phash import DEFAULT_MAX_DISTANCE, IndexEntry, RecipeIndex, default_index_path, fingerprint
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="Blurrify index",
+                                     description="Reuse the regions of indexed images for near-duplicates.")
+    parser.add_argument("--index", default=default_index_path(), metavar="FILE",
+                        help="Index file (default: %(default)s)")
+    parser.add_argument("--max-distance", type=int, default=DEFAULT_MAX_DISTANCE, metavar="BITS",
+                        help="Largest hash distance, out of 64 bits, that counts as a near-duplicate "
+                             "(default: %(default)s)")
+    actions = parser.add_subparsers(dest="action", required=True)
+    add = actions.add_parser("add", help="Index images with the operations of a recipe")
+    add.add_argument("recipe", help="JSON recipe whose operations were applied to the images")
+    add.add_argument("inputs", nargs="+", help="Input directories, files or glob patterns")
+    match = actions.add_parser("match", help="Propose the operations of the nearest indexed image")
+    match.add_argument("inputs", nargs="+", help="Input directories, files or glob patterns")
+    match.add_argument("--write", metavar="DIR", help="Write a recipe for each matched image to this directory")
+    actions.add_parser("info", help="Show the number of indexed images")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    index = RecipeIndex(args.index, args.max_distance)
+    if args.action == "info":
+        print(f"{len(index)} indexed image(s) in {index.path}")
+        return 0
+
+    if args.action == "add":
+        try:
+            operations = load_recipe(args.recipe)
+        except (OSError, ValueError) as e:
+            print(f"Cannot read recipe {args.recipe}: {e}", file=sys.stderr)
+            return 2
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        print("No input images found", file=sys.stderr)
+        return 2
+
+    failed = 0
+    for path in inputs:
+        try:
+            key, size = fingerprint(path)
+        except Exception as e:
+            failed += 1
+            print(f"error {path}: {e}", file=sys.stderr)
+            continue
+        if args.action == "add":
+            index.add(IndexEntry(key, size, operations, os.path.abspath(path)))
+            print(f"added {path} ({key:016x})")
+            continue
+        found = index.match(key)
+        if found is None:
+            print(f"none  {path}")
+            continue
+        distance, entry = found
+        print(f"match {path} <- {entry.source} (distance {distance})")
+        if args.write:
+            os.makedirs(args.write, exist_ok=True)
+            recipe = {"operations": [operation.to_dict() for operation in entry.operations_for(size)]}
+            name = os.path.splitext(os.path.basename(path))[0] + ".json"
+            with open(os.path.join(args.write, name), "w", encoding="utf-8") as f:
+                json.dump(recipe, f, indent=1)
+    return 1 if failed else 0
@@ -0,0 +1,49 @@
+"""
+Batch manifest maintenance.
+
+Checks or tidies the manifest that ``batch --incremental`` keeps in an output directory.
+``verify`` hashes every recorded input and output again and lists the ones that no
+longer match; ``prune`` drops the entries of deleted inputs, with their outputs, and of
+deleted outputs. Never imports PyQt6.
+
+    python -m Blurrify manifest verify redacted/
+    python -m Blurrify manifest prune redacted/
+"""
+
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+from src.core.manifest import MANIFEST_NAME, Manifest
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="Blurrify manifest",
+                                     description="Verify or prune the manifest of an incremental batch output directory.")
+    parser.add_argument("action", choices=("verify", "prune"))
+    parser.add_argument("output", help="Output directory of batch --incremental")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if not os.path.isfile(os.path.join(args.output, MANIFEST_NAME)):
+        print(f"No manifest in {args.output}", file=sys.stderr)
+        return 2
+    manifest = Manifest(args.output)
+    if args.action == "prune":
+        dropped, deleted, freed = manifest.prune()
+        manifest.save()
+        print(f"Dropped {dropped} entry(ies), deleted {deleted} output(s), {freed / (1024 * 1024):.1f} MB; "
+              f"{len(manifest)} left")
+        return 0
+
+    check = manifest.verify()
+    for label, paths in (("missing", check.missing), ("modified", check.modified),
+                         ("stale", check.stale), ("orphaned", check.orphaned)):
+        for path in paths:
+            print(f"{label:9} {path}")
+    print(f"Checked {len(manifest)} entry(ies): {len(check.missing)} missing, {len(check.modified)} modified, "
+          f"{len(check.stale)} stale, {len(check.orphaned)} orphaned")
+    return 0 if check.ok else 1
@@ -0,0 +1,403 @@
+"""
+Watch-folder processing.
+
+Watches an input directory, waits until each new image has stopped changing, applies
+a JSON recipe to it on a pool of workers and writes the result atomically to an output
+directory. Originals move to a processed directory (or are deleted); files that keep
+failing move to a quarantine directory next to a note with the error. Never imports
+PyQt6.
+
+    python -m Blurrify watch recipe.json inbox/ -o redacted/ --jobs 4 --max-in-flight 8
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.cli.batch import IMAGE_EXTENSIONS, FileResult, output_path_for, process_file
+from src.core.export import PRESETS
+from src.core.operations import Operation, load_frame_operations, load_recipe
+
+DEFAULT_SETTLE_SECONDS = 1.0
+DEFAULT_POLL_SECONDS = 0.5
+DEFAULT_RETRIES = 2
+DEFAULT_RETRY_DELAY = 1.0
+DEFAULT_STATS_INTERVAL = 10.0
+LATENCY_WINDOW = 1000  # latencies kept for the percentiles
+
+
+@dataclass
+class WatchStats:
+    """Counters of a watch run, and the latencies of recent files.
+
+    A file's latency runs from when it was first seen to when its output was written,
+    so it includes the settle time and any time spent waiting for a free worker.
+    """
+    processed: int = 0
+    quarantined: int = 0
+    retried: int = 0
+    input_bytes: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    waiting: int = 0  # settled files held back because every slot was busy
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+    _interval_start: float = field(default_factory=time.monotonic)
+    _interval_processed: int = 0
+    _interval_bytes: int = 0
+
+    def record(self, result: FileResult, latency: float) -> None:
+        self.processed += 1
+        self.input_bytes += result.input_bytes
+        self._interval_processed += 1
+        self._interval_bytes += result.input_bytes
+        self.latencies.append(latency)
+
+    def latency(self, percentile: float) -> Optional[float]:
+        """The ``percentile`` (0 to 100) of recent latencies in seconds, or ``None`` before any file."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+    def interval(self, now: Optional[float] = None) -> Tuple[float, float]:
+        """Files/s and MB/s since the previous call, which starts a new interval."""
+        now = time.monotonic() if now is None else now
+        seconds = max(now - self._interval_start, 1e-9)
+        rates = (self._interval_processed / seconds, self._interval_bytes / (1024 * 1024) / seconds)
+        self._interval_start, self._interval_processed, self._interval_bytes = now, 0, 0
+        return rates
+
+    def format(self, now: Optional[float] = None) -> str:
+        files_per_second, megabytes_per_second = self.interval(now)
+        p50, p95 = self.latency(50), self.latency(95)
+        latency = f"latency p50 {p50 * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms" if p50 is not None else "latency -"
+        return (f"{self.processed} processed, {self.quarantined} quarantined, {self.retried} retried; "
+                f"{files_per_second:.1f} files/s, {megabytes_per_second:.1f} MB/s; {latency}; "
+                f"{self.in_flight} in flight, {self.waiting} waiting")
+
+
+@dataclass
+class _Job:
+    path: str
+    first_seen: float
+    attempt: int = 0
+    isolated: bool = False  # in flight with others when a worker died; runs alone next
+
+
+class Watcher:
+    """Processes the images that appear in ``input_dir``; call ``step`` repeatedly, or ``run``.
+
+    A file is read only once its size and modification time stayed the same for
+    ``settle`` seconds across polls, so files still being copied in are left alone.
+    Names starting with a dot are ignored, which lets writers stage files under such a
+    name and rename them when done. At most ``max_in_flight`` files are submitted to the
+    workers at a time; the others stay untouched in the directory until a slot frees
+    up, so a burst of files never queues unbounded work in memory. A file that fails
+    is tried again up to ``retries`` times, waiting ``retry_delay`` seconds doubled on
+    each attempt, and is then moved to ``quarantine_dir``.
+
+    A worker process that dies, killed for running out of memory say, breaks the pool,
+    which is then replaced. The file that killed it cannot be told apart from the others
+    in flight, so those are tried again alone, without counting an attempt, and nothing
+    else is submitted until they are done; a worker dying on a file processed alone counts
+    as a failed attempt of that file.
+    """
+
+    def __init__(self, input_dir: str, output_dir: str, operations: List[Operation], jobs: int = 1,
+                 max_in_flight: Optional[int] = None, settle: float = DEFAULT_SETTLE_SECONDS,
+                 poll_interval: float = DEFAULT_POLL_SECONDS, retries: int = DEFAULT_RETRIES,
+                 retry_delay: float = DEFAULT_RETRY_DELAY, format: Optional[str] = None,
+                 preset: Optional[str] = None, processed_dir: Optional[str] = None,
+                 quarantine_dir: Optional[str] = None, delete_originals: bool = False,
+                 stats_interval: float = DEFAULT_STATS_INTERVAL,
+                 report: Callable[[str], None] = print,
+                 frame_operations: Optional[Dict[int, List[Operation]]] = None):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.operations = operations
+        self.frame_operations = frame_operations
+        self.jobs = max(1, jobs)
+        self.max_in_flight = max_in_flight or 2 * self.jobs
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.format = PRESETS[preset].format if preset is not None and format is None else format
+        self.preset = preset
+        self.processed_dir = processed_dir or os.path.join(input_dir, "processed")
+        self.quarantine_dir = quarantine_dir or os.path.join(input_dir, "quarantine")
+        self.delete_originals = delete_originals
+        self.stats_interval = stats_interval
+        self.report = report
+        self.stats = WatchStats()
+        self._executor: Optional[Executor] = None
+        self._seen: Dict[str, Tuple[int, int, float, float]] = {}  # path: size, mtime, first seen, unchanged since
+        self._running: Dict[Future, _Job] = {}
+        self._retrying: List[Tuple[float, _Job]] = []
+        self._next_report = time.monotonic() + stats_interval
+
+    def __enter__(self) -> "Watcher":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> "Watcher":
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self._executor is None:
+            self._executor = self._new_executor()
+        return self
+
+    def _new_executor(self) -> Executor:
+        # One job runs on a thread, which keeps polling responsive without a process pool.
+        return ProcessPoolExecutor(max_workers=self.jobs) if self.jobs > 1 else ThreadPoolExecutor(max_workers=1)
+
+    def close(self) -> None:
+        """Waits for the files in flight, then stops the workers."""
+        while self._running:
+            self._collect(block=True)
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _busy(self) -> Set[str]:
+        return {job.path for job in self._running.values()} | {job.path for _, job in self._retrying}
+
+    def scan(self, now: Optional[float] = None) -> List[_Job]:
+        """Polls ``input_dir`` and returns jobs for the files that have settled, oldest first."""
+        now = time.monotonic() if now is None else now
+        try:
+            names = os.listdir(self.input_dir)
+        except OSError:
+            return []
+        busy = self._busy()
+        seen = {}
+        ready = []
+        for name in names:
+            if name.startswith(".") or not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            path = os.path.join(self.input_dir, name)
+            if path in busy:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if not os.path.isfile(path):
+                continue
+            previous = self._seen.get(path)
+            if previous is not None and previous[:2] == (stat.st_size, stat.st_mtime_ns):
+                seen[path] = previous
+                if now - previous[3] >= self.settle:
+                    ready.append(_Job(path, previous[2]))
+            else:
+                first_seen = previous[2] if previous is not None else now
+                seen[path] = (stat.st_size, stat.st_mtime_ns, first_seen, now)
+        self._seen = seen
+        return sorted(ready, key=lambda job: (job.first_seen, job.path))
+
+    def step(self, now: Optional[float] = None) -> None:
+        """Collects finished files, then fills the free slots with retries and settled files."""
+        self._collect()
+        now = time.monotonic() if now is None else now
+        settled = self.scan(now)
+        due = [job for when, job in self._retrying if when <= now]
+        self._retrying = [(when, job) for when, job in self._retrying if when > now]
+        waiting = 0
+        for job in due + settled:
+            if self._can_submit(job, due):
+                self._submit(job)
+                continue
+            waiting += 1
+            if job in due:
+                self._retrying.append((now, job))
+        self.stats.waiting = waiting
+        if now >= self._next_report:
+            self.report(self.stats.format(now))
+            self._next_report = now + self.stats_interval
+
+    def _can_submit(self, job: _Job, due: Iterable[_Job]) -> bool:
+        pending = [job for _, job in self._retrying] + list(due) + list(self._running.values())
+        if any(other.isolated for other in pending):
+            return job.isolated and not self._running
+        return len(self._running) < self.max_in_flight
+
+    def _submit(self, job: _Job) -> None:
+        self._seen.pop(job.path, None)
+        try:
+            future = self._executor.submit(process_file, job.path, self.operations,  # type: ignore
+                                           self.output_dir, format=self.format, preset=self.preset,
+                                           atomic=True, frame_operations=self.frame_operations)
+        except BrokenProcessPool:  # a worker died since the last collect
+            self._restart([])
+            self._retrying.append((time.monotonic(), job))
+            return
+        self._running[future] = job
+        self.stats.in_flight = len(self._running)
+        self.stats.peak_in_flight = max(self.stats.peak_in_flight, self.stats.in_flight)
+
+    def _collect(self, block: bool = False) -> None:
+        if block and self._running:
+            done = wait(self._running, return_when=FIRST_COMPLETED).done
+        else:
+            done = [future for future in self._running if future.done()]
+        crashed = []
+        for future in done:
+            job = self._running.pop(future)
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                crashed.append(job)
+                continue
+            except Exception as e:
+                result = FileResult(job.path, None, 0, 0.0, error=f"{type(e).__name__}: {e}")
+            self._finish(job, result)
+        if crashed:
+            self._restart(crashed)
+        self.stats.in_flight = len(self._running)
+
+    def _restart(self, crashed: List[_Job]) -> None:
+        """Replaces the broken pool; ``crashed`` and the jobs still running on it are tried again."""
+        crashed = crashed + list(self._running.values())  # every future of a broken pool fails
+        self._running.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)  # type: ignore
+        self._executor = self._new_executor()
+        self.report(f"a worker process died; restarted the pool ({len(crashed)} in flight)")
+        for job in crashed:
+            # The pool kills the other workers too, so their temporary outputs are left behind.
+            name = os.path.basename(output_path_for(job.path, self.output_dir, self.format))
+            for path in glob.glob(os.path.join(glob.escape(self.output_dir), f".writing-*-{glob.escape(name)}")):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        if len(crashed) == 1:
+            self._finish(crashed[0], FileResult(crashed[0].path, None, 0, 0.0,
+                                                error="the worker process died while processing it"))
+            return
+        for job in crashed:
+            job.isolated = True
+            self._retrying.append((time.monotonic(), job))
+
+    def _finish(self, job: _Job, result: FileResult) -> None:
+        job.isolated = False
+        if result.ok:
+            self.stats.record(result, time.monotonic() - job.first_seen)
+            self._move_original(job.path)
+            return
+        if job.attempt < self.retries:
+            self.stats.retried += 1
+            job.attempt += 1
+            self._retrying.append((time.monotonic() + self.retry_delay * 2 ** (job.attempt - 1), job))
+            return
+        self.stats.quarantined += 1
+        self._quarantine(job.path, result.error or "unknown error")
+        self.report(f"quarantined {job.path}: {result.error}")
+
+    def _move_original(self, path: str) -> None:
+        try:
+            if self.delete_originals:
+                os.remove(path)
+            else:
+                os.makedirs(self.processed_dir, exist_ok=True)
+                shutil.move(path, os.path.join(self.processed_dir, os.path.basename(path)))
+        except OSError as e:
+            self.report(f"cannot move {path} out of the watched directory: {e}")
+
+    def _quarantine(self, path: str, error: str) -> None:
+        target = os.path.join(self.quarantine_dir, os.path.basename(path))
+        try:
+            os.makedirs(self.quarantine_dir, exist_ok=True)
+            shutil.move(path, target)
+            with open(target + ".error.txt", "w", encoding="utf-8") as f:
+                f.write(error + "\n")
+        except OSError as e:
+            self.report(f"cannot quarantine {path}: {e}")
+
+    @property
+    def idle(self) -> bool:
+        """No file in flight, waiting for a retry or seen but not settled yet."""
+        return not self._running and not self._retrying and not self._seen
+
+    def run(self, stop: Optional[Callable[[], bool]] = None, until_idle: bool = False) -> WatchStats:
+        """Steps every ``poll_interval`` seconds until ``stop()`` is true, or the directory is
+        drained with ``until_idle``; Ctrl+C also stops. Files in flight are always finished."""
+        self.start()
+        try:
+            while not (stop is not None and stop()):
+                self.step()
+                if until_idle and self.idle:
+                    break
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+        return self.stats
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="Blurrify watch",
+                                     description="Apply a recipe to every image that appears in a directory.")
+    parser.add_argument("recipe", help="JSON recipe file with a list of operations")
+    parser.add_argument("input", help="Directory to watch")
+    parser.add_argument("-o", "--output", required=True, help="Output directory")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--max-in-flight", type=int,
+                        help="Files processed or queued for a worker at once (default: twice --jobs)")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help="Seconds a file must stay unchanged before it is read (default: %(default)s)")
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL_SECONDS,
+                        help="Seconds between directory scans (default: %(default)s)")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help="Attempts after the first before a file is quarantined (default: %(default)s)")
+    parser.add_argument("--retry-delay", type=float, default=DEFAULT_RETRY_DELAY,
+                        help="Seconds before the first retry, doubled for each further one (default: %(default)s)")
+    parser.add_argument("--format", help="Output format such as PNG or JPEG (default: keep extension)")
+    parser.add_argument("--preset", choices=list(PRESETS),
+                        help="Encoder preset, e.g. png-fast or jpeg-web (sets the format unless --format is given)")
+    parser.add_argument("--processed", metavar="DIR",
+                        help="Where originals go once processed (default: INPUT/processed)")
+    parser.add_argument("--quarantine", metavar="DIR",
+                        help="Where files that keep failing go (default: INPUT/quarantine)")
+    parser.add_argument("--delete-originals", action="store_true", help="Delete originals once processed")
+    parser.add_argument("--stats-interval", type=float, default=DEFAULT_STATS_INTERVAL,
+                        help="Seconds between throughput and latency reports (default: %(default)s)")
+    parser.add_argument("--once", action="store_true", help="Exit once the directory is drained")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        operations = load_recipe(args.recipe)
+        frame_operations = load_frame_operations(args.recipe)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read recipe {args.recipe}: {e}", file=sys.stderr)
+        return 2
+    if not os.path.isdir(args.input):
+        print(f"Not a directory: {args.input}", file=sys.stderr)
+        return 2
+
+    def report(line: str) -> None:
+        print(line, flush=True)
+
+    watcher = Watcher(args.input, args.output, operations, jobs=args.jobs, max_in_flight=args.max_in_flight,
+                      settle=args.settle, poll_interval=args.poll, retries=args.retries,
+                      retry_delay=args.retry_delay, format=args.format, preset=args.preset,
+                      processed_dir=args.processed, quarantine_dir=args.quarantine,
+                      delete_originals=args.delete_originals, stats_interval=args.stats_interval, report=report,
+                      frame_operations=frame_operations)
+    print(f"Watching {args.input}, writing to {args.output}", flush=True)
+    stats = watcher.run(until_idle=args.once)
+    print(stats.format(), flush=True)
+    return 1 if stats.quarantined else 0
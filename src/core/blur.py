@@ -0,0 +1,189 @@
+import math
+from typing import Dict, List
+
+import numpy as np
+import PIL.Image
+import PIL.ImageFilter
+
+# Mean absolute error, in 8-bit levels, an automatically chosen engine may add over the
+# Pillow reference.
+DEFAULT_TOLERANCE = 1.0
+
+# Below this many pixels the fixed costs of the alternative engines outweigh any gain.
+MIN_FAST_AREA = 256 * 256
+
+# Worst mean absolute error against Pillow measured for each engine, as (first radius,
+# bound) bands: over whole regions of 256x256 to 2000x1500 pixels of uniform and smooth
+# noise, gradients and hard-edged stripes, with about 10% added. Most of the error is
+# along the region's edges, where every engine extends the edge differently than Pillow's
+# three box passes do, so it grows as the radius nears the region's size. Radii past the
+# last band were not measured.
+_BOX2_BOUNDS = ((5, 0.95), (28, 1.9), (120, math.inf))
+_BOX3_BOUNDS = ((5, 0.5), (120, math.inf))
+_DOWNSAMPLE_BOUNDS = ((16, 1.25), (24, 1.5), (32, 1.6), (48, 2.2), (72, 4.0), (120, math.inf))
+
+
+def _banded(radius: float, bands) -> float:
+    """The bound of the band ``radius`` falls in; below the first band there is none."""
+    bound = math.inf
+    for start, band_bound in bands:
+        if radius < start:
+            break
+        bound = band_bound
+    return bound
+
+
+def blur_halo(radius: float) -> int:
+    """Number of context pixels a Gaussian blur of ``radius`` reads around a region.
+
+    Pillow's GaussianBlur is three box passes whose combined support stays within
+    ``3 * radius`` plus rounding, so a crop padded by this halo blurs to exactly the
+    same pixels as blurring the whole image.
+    """
+    return int(math.ceil(3 * radius)) + 2
+
+
+class BlurEngine:
+    """Blurs a whole image with a Gaussian-like kernel of standard deviation ``radius``."""
+    name = "base"
+    # Whether every output pixel depends only on the pixels within the halo around it, so
+    # an image can be blurred in halo-overlapped bands with the same result.
+    tileable = True
+
+    def halo(self, radius: float) -> int:
+        """Context pixels needed around a region so that blurring a padded crop is seamless."""
+        return blur_halo(radius)
+
+    def error_bound(self, radius: float) -> float:
+        """Worst mean absolute error against the Pillow reference measured at this radius."""
+        return math.inf
+
+    def blur(self, image: PIL.Image.Image, radius: float) -> PIL.Image.Image:
+        raise NotImplementedError
+
+
+class PillowBlurEngine(BlurEngine):
+    """The reference: ``PIL.ImageFilter.GaussianBlur``."""
+    name = "pillow"
+
+    def error_bound(self, radius: float) -> float:
+        return 0.0
+
+    def blur(self, image: PIL.Image.Image, radius: float) -> PIL.Image.Image:
+        return image.filter(PIL.ImageFilter.GaussianBlur(radius))
+
+
+class SeparableGaussianEngine(BlurEngine):
+    """A true sampled Gaussian applied as two 1-D NumPy convolutions, truncated at 3 sigma.
+
+    Exact rather than a box approximation, but its cost grows with the radius, so it is
+    only used when asked for by name.
+    """
+    name = "separable"
+
+    def blur(self, image: PIL.Image.Image, radius: float) -> PIL.Image.Image:
+        if radius <= 0:
+            return image.copy()
+        pixels = np.asarray(image, dtype=np.float32)
+        reach = int(math.ceil(3 * radius))
+        offsets = np.arange(-reach, reach + 1, dtype=np.float32)
+        weights = np.exp(-offsets * offsets / (2 * radius * radius))
+        weights /= weights.sum()
+        for axis in (0, 1):
+            padding = [(0, 0)] * pixels.ndim
+            padding[axis] = (reach, reach)
+            padded = np.pad(pixels, padding, mode="edge")
+            length = pixels.shape[axis]
+            result = np.zeros_like(pixels)
+            for index, weight in enumerate(weights):
+                result += weight * np.take(padded, np.arange(index, index + length), axis=axis)
+            pixels = result
+        return PIL.Image.fromarray(np.clip(np.rint(pixels), 0, 255).astype(np.uint8), image.mode)
+
+
+class BoxBlurEngine(BlurEngine):
+    """``passes`` box blurs whose combined variance matches the Gaussian.
+
+    Pillow's GaussianBlur uses three passes; two are cheaper and, from a radius of
+    5 up to 28, stay within one level of it on average.
+    """
+    name = "box"
+
+    def __init__(self, passes: int = 2):
+        self.passes = passes
+
+    def error_bound(self, radius: float) -> float:
+        return _banded(radius, _BOX3_BOUNDS if self.passes >= 3 else _BOX2_BOUNDS)
+
+    def blur(self, image: PIL.Image.Image, radius: float) -> PIL.Image.Image:
+        box_radius = (math.sqrt(12 * radius * radius / self.passes + 1) - 1) / 2
+        for _ in range(self.passes):
+            image = image.filter(PIL.ImageFilter.BoxBlur(box_radius))
+        return image
+
+
+class DownsampleBlurEngine(BlurEngine):
+    """Averages the image down, blurs the small copy and scales it back up bilinearly.
+
+    The reduction factor keeps the radius at the reduced scale near ``level_radius``, so
+    the work shrinks with the square of the factor while a large blur hides the resampling.
+    """
+    name = "downsample"
+    tileable = False  # the reduction grid and the resize follow the crop's origin and size
+
+    def __init__(self, level_radius: float = 8.0):
+        self.level_radius = level_radius
+
+    def factor(self, radius: float) -> int:
+        return max(1, int(radius // self.level_radius))
+
+    def halo(self, radius: float) -> int:
+        return blur_halo(radius) + 2 * self.factor(radius)
+
+    def error_bound(self, radius: float) -> float:
+        # Measured with the default level radius only; below a factor of 2 it is the reference.
+        if self.level_radius != 8.0 or self.factor(radius) < 2:
+            return math.inf
+        return _banded(radius, _DOWNSAMPLE_BOUNDS)
+
+    def blur(self, image: PIL.Image.Image, radius: float) -> PIL.Image.Image:
+        factor = self.factor(radius)
+        if factor < 2:
+            return image.filter(PIL.ImageFilter.GaussianBlur(radius))
+        width, height = image.size
+        small = image.reduce(factor).filter(PIL.ImageFilter.GaussianBlur(radius / factor))
+        # Scaling by exactly ``factor`` keeps every reduced pixel over the block it averages;
+        # scaling to the image size would stretch a partial last block across the whole image.
+        large = small.resize((small.width * factor, small.height * factor), resample=PIL.Image.Resampling.BILINEAR)
+        return large.crop((0, 0, width, height))
+
+
+ENGINES: Dict[str, BlurEngine] = {
+    engine.name: engine
+    for engine in (PillowBlurEngine(), SeparableGaussianEngine(), BoxBlurEngine(), DownsampleBlurEngine())
+}
+
+# Candidates for automatic selection, fastest first.
+_AUTO_ORDER: List[str] = ["downsample", "box", "pillow"]
+
+
+def get_engine(name: str) -> BlurEngine:
+    """Looks up an engine by name."""
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown blur engine {name!r}, expected one of {', '.join(ENGINES)}")
+
+
+def select_engine(radius: float, area: int, tolerance: float = DEFAULT_TOLERANCE) -> BlurEngine:
+    """Picks the fastest engine whose measured error at ``radius`` is within ``tolerance``.
+
+    Regions smaller than MIN_FAST_AREA pixels always use the Pillow reference.
+    """
+    if area < MIN_FAST_AREA:
+        return ENGINES["pillow"]
+    for name in _AUTO_ORDER:
+        engine = ENGINES[name]
+        if engine.error_bound(radius) <= tolerance:
+            return engine
+    return ENGINES["pillow"]
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import PIL.Image
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def image_nbytes(image: PIL.Image.Image) -> int:
+    """Approximate memory held by the pixels of ``image``."""
+    width, height = image.size
+    return width * height * len(image.getbands())
+
+
+class EffectCache:
+    """Least-recently-used cache of processed regions with a byte budget.
+
+    Keys are hashable descriptions of how a region was produced, such as the source
+    content version together with the operation. Cached values are shared, so callers
+    must not modify what ``get`` returns; pasting it elsewhere is fine. Values other
+    than images, such as history snapshots, are stored with an explicit size. A
+    ``max_bytes`` of 0 disables the cache.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """The value stored under ``key``, marked as recently used, or ``None``."""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any, nbytes: Optional[int] = None) -> None:
+        """Stores ``value`` under ``key``, evicting the least recently used entries to stay within budget.
+
+        ``nbytes`` defaults to the pixel size of an image value. Values larger than the
+        whole budget are not stored.
+        """
+        size = image_nbytes(value) if nbytes is None else nbytes
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            del self._entries[key]
+            self.nbytes -= self._sizes.pop(key)
+        self._entries[key] = value
+        self._sizes[key] = size
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            evicted, _ = self._entries.popitem(last=False)
+            self.nbytes -= self._sizes.pop(evicted)
+
+    def clear(self) -> None:
+        """Drops every entry; the hit and miss counters are kept."""
+        self._entries.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
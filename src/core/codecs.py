@@ -0,0 +1,100 @@
+import importlib
+import os
+import threading
+from typing import List, Optional, Sequence
+
+import PIL
+import PIL.Image
+
+# Pillow plugins of the formats Blurrify reads and writes: PNG and JPEG, and the BMP, GIF
+# and PPM plugins Pillow always preloads. OPTIONAL_PLUGINS are skipped when Pillow was
+# built without them.
+LEAN_PLUGINS = ("PngImagePlugin", "JpegImagePlugin", "BmpImagePlugin", "GifImagePlugin", "PpmImagePlugin")
+OPTIONAL_PLUGINS = ("WebPImagePlugin", "TiffImagePlugin")
+
+_lean = False
+_lock = threading.Lock()
+
+
+def lean_codecs_requested() -> bool:
+    """Whether the lean registry should be used; ``BLURRIFY_ALL_CODECS=1`` turns it off."""
+    return os.environ.get("BLURRIFY_ALL_CODECS", "") in ("", "0")
+
+
+def use_lean_codecs(plugins: Sequence[str] = LEAN_PLUGINS + OPTIONAL_PLUGINS) -> List[str]:
+    """Registers only ``plugins`` and stops Pillow from importing all of its others.
+
+    ``PIL.Image.open`` and ``save`` import every format plugin Pillow has, some 45 of
+    them, as soon as a file is not one of the five it preloads (newer Pillow first tries
+    the plugin its extension names), and so does ``registered_extensions``, which
+    export needs for every save. This marks Pillow as initialized after importing the
+    listed plugins, which works through Pillow's private ``_initialized`` flag. Files in
+    any other format still open: ``open_file`` and ``ensure_format`` load the remaining
+    plugins on first need. Returns the plugins that were registered. Has no effect once
+    Pillow loaded all plugins, or if this Pillow does not honour the flag, in which case
+    all plugins are loaded.
+    """
+    global _lean
+    with _lock:
+        if not isinstance(getattr(PIL.Image, "_initialized", None), int):
+            PIL.Image.init()  # not the Pillow this was written against: use the full registry
+            return []
+        if PIL.Image._initialized >= 2:
+            return []
+        registered = []
+        for plugin in plugins:
+            try:
+                importlib.import_module(f"PIL.{plugin}")
+            except ImportError:
+                if plugin not in OPTIONAL_PLUGINS:
+                    raise
+                continue
+            registered.append(plugin)
+        PIL.Image._initialized = 2
+        # ``init`` returns early once the flag is set; if this Pillow ignores it, it has
+        # just registered every plugin and the lean registry is gone.
+        if PIL.Image.init():
+            return []
+        _lean = True
+        return registered
+
+
+def load_all_codecs() -> bool:
+    """Registers every Pillow plugin after ``use_lean_codecs``; False if they all were already."""
+    global _lean
+    with _lock:
+        if not _lean:
+            return False
+        PIL.Image._initialized = 1
+        PIL.Image.init()
+        _lean = False
+        return True
+
+
+def lean_codecs_enabled() -> bool:
+    return _lean
+
+
+def open_file(file_path: str) -> PIL.Image.Image:
+    """``PIL.Image.open``, loading the remaining plugins if the lean registry cannot identify the file."""
+    try:
+        return PIL.Image.open(file_path)
+    except PIL.UnidentifiedImageError:
+        if not load_all_codecs():
+            raise
+    return PIL.Image.open(file_path)
+
+
+def ensure_format(format: str) -> None:
+    """Loads the remaining plugins if ``format`` cannot be written with the registered ones."""
+    if format.upper() not in PIL.Image.SAVE:
+        load_all_codecs()
+
+
+def format_for_extension(extension: str) -> Optional[str]:
+    """The Pillow format that ``extension`` (with its dot) is saved as, or ``None``."""
+    extension = extension.lower()
+    format = PIL.Image.registered_extensions().get(extension)
+    if format is None and load_all_codecs():
+        format = PIL.Image.registered_extensions().get(extension)
+    return format
@@ -0,0 +1,165 @@
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+from typing import List, Optional, Tuple
+
+import PIL.Image
+
+DEFAULT_DECODE_CACHE_BYTES = 2 * 1024 * 1024 * 1024
+
+# Header of a cache file: magic, mode name and size; the raw pixels follow it.
+_MAGIC = b"BLRDEC01"
+_HEADER = struct.Struct("<8s8sII")
+_SUFFIX = ".pixels"
+
+# Rows written at a time, so storing an image never needs a second full copy of it.
+_BAND_ROWS = 256
+
+
+def decode_cache_requested() -> bool:
+    """Whether the GUI should cache decoded pixels; off unless ``BLURRIFY_DECODE_CACHE=1``.
+
+    The cache holds the unredacted pixels of every image opened, so it is opt-in.
+    """
+    return os.environ.get("BLURRIFY_DECODE_CACHE", "") not in ("", "0")
+
+
+def default_cache_dir() -> str:
+    """``$BLURRIFY_CACHE_DIR``, or ``decoded`` in the user's cache directory."""
+    if os.environ.get("BLURRIFY_CACHE_DIR"):
+        return os.environ["BLURRIFY_CACHE_DIR"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "blurrify", "decoded")
+
+
+class DecodeCache:
+    """Decoded pixels of image files, kept on disk so reopening a file is a memory map.
+
+    Entries are keyed on the file's absolute path, modification time and size, so an
+    edited file is decoded again. Each entry holds the raw pixels after a small header;
+    ``get`` maps it copy-on-write, so every process opening the same file shares the
+    page-cache pages and edits stay private. Files are replaced atomically, and entries
+    are only unlinked, never truncated, so evicting a file another process has mapped
+    is safe. Opening an entry refreshes its modification time, which orders the
+    least-recently-used eviction that keeps the directory within ``max_bytes``.
+    Failures to read or write the cache are not errors; the file is decoded instead.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_DECODE_CACHE_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, file_path: str) -> Optional[str]:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(file_path)}\0{stat.st_mtime_ns}\0{stat.st_size}"
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + _SUFFIX)
+
+    def get(self, file_path: str) -> Optional[PIL.Image.Image]:
+        """The cached pixels of ``file_path`` as an image backed by a private mapping, or ``None``."""
+        entry = self._entry_path(file_path)
+        image = self._map(entry) if entry is not None else None
+        if image is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            os.utime(entry)  # type: ignore
+        except OSError:
+            pass
+        return image
+
+    @staticmethod
+    def _map(entry: str) -> Optional[PIL.Image.Image]:
+        try:
+            with open(entry, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            return None
+        if len(mapped) < _HEADER.size:
+            return None
+        magic, mode, width, height = _HEADER.unpack_from(mapped)
+        if magic != _MAGIC:
+            return None
+        mode = mode.rstrip(b"\0").decode("ascii", "replace")
+        try:
+            image = PIL.Image.frombuffer(mode, (width, height), memoryview(mapped)[_HEADER.size:],
+                                         "raw", mode, 0, 1)
+        except (ValueError, KeyError):
+            return None
+        # The mapping is copy-on-write, so pasting into it only copies the touched pages.
+        image.readonly = 0
+        return image
+
+    def put(self, file_path: str, image: PIL.Image.Image) -> None:
+        """Stores the decoded ``image`` of ``file_path``, then evicts entries beyond the budget."""
+        entry = self._entry_path(file_path)
+        if entry is None:
+            return
+        width, height = image.size
+        nbytes = _HEADER.size + width * height * len(image.getbands())
+        if nbytes > self.max_bytes:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix=".writing-", dir=self.directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(_HEADER.pack(_MAGIC, image.mode.encode("ascii"), width, height))
+                    for top in range(0, height, _BAND_ROWS):
+                        f.write(image.crop((0, top, width, min(top + _BAND_ROWS, height))).tobytes())
+                os.replace(temp_path, entry)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except OSError:
+            return
+        self.evict()
+
+    def entries(self) -> List[Tuple[str, int, int]]:
+        """(path, bytes, last use in ns) of every cache entry, least recently used first."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        found = []
+        for name in names:
+            if not name.endswith(_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            found.append((path, stat.st_size, stat.st_mtime_ns))
+        return sorted(found, key=lambda entry: entry[2])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """Removes the least recently used entries until at most ``max_bytes`` remain; returns bytes freed."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for path, size, _ in entries:
+            if total - freed <= limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            freed += size
+        return freed
+
+    def purge(self) -> int:
+        """Removes every entry; returns the bytes freed."""
+        return self.evict(0)
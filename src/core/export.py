@@ -0,0 +1,106 @@
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import PIL.Image
+
+from src.core.codecs import ensure_format, format_for_extension
+
+# Modes the JPEG encoder accepts; anything else, such as RGBA, is flattened to RGB.
+JPEG_MODES = ("L", "RGB", "CMYK")
+
+
+@dataclass(frozen=True)
+class ExportPreset:
+    """A named output format together with the encoder options passed to Pillow."""
+    name: str
+    format: str
+    description: str
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def extension(self) -> str:
+        return ".jpg" if self.format == "JPEG" else "." + self.format.lower()
+
+    def matches(self, file_path: str) -> bool:
+        """Whether the extension of ``file_path`` belongs to this preset's format."""
+        extension = os.path.splitext(file_path)[1].lower()
+        return format_for_extension(extension) == self.format
+
+
+PRESETS: Dict[str, ExportPreset] = {preset.name: preset for preset in [
+    ExportPreset("png", "PNG", "PNG, default compression"),
+    ExportPreset("png-fast", "PNG", "PNG, fast (larger file)", {"compress_level": 1}),
+    ExportPreset("png-optimized", "PNG", "PNG, optimized (smallest, slowest)", {"optimize": True}),
+    ExportPreset("jpeg", "JPEG", "JPEG, default quality"),
+    ExportPreset("jpeg-high", "JPEG", "JPEG, high quality, full chroma",
+                 {"quality": 95, "subsampling": 0}),
+    ExportPreset("jpeg-web", "JPEG", "JPEG, progressive, optimized for size",
+                 {"quality": 80, "subsampling": 2, "progressive": True, "optimize": True}),
+]}
+
+# The preset used for a format when none is chosen; these keep Pillow's defaults.
+DEFAULT_PRESETS = {"PNG": "png", "JPEG": "jpeg"}
+
+
+@dataclass
+class ExportResult:
+    """What an export wrote and how long encoding took."""
+    path: str
+    preset: str
+    seconds: float
+    nbytes: int
+
+    def format(self) -> str:
+        return f"{self.nbytes / (1024 * 1024):.1f} MB in {self.seconds * 1000:.0f} ms ({self.preset})"
+
+
+def _normalize_format(format: str) -> str:
+    format = format.upper()
+    return "JPEG" if format == "JPG" else format
+
+
+def resolve_preset(file_path: str, format: Optional[str] = None, preset: Optional[str] = None) -> ExportPreset:
+    """The preset named ``preset``, or else the default one for ``format`` or the extension of ``file_path``.
+
+    Formats without presets get one with Pillow's defaults.
+    """
+    if preset is not None:
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown export preset {preset!r}, expected one of {', '.join(PRESETS)}")
+        if format is not None and _normalize_format(format) != PRESETS[preset].format:
+            raise ValueError(f"Export preset {preset!r} writes {PRESETS[preset].format}, not {format}")
+        return PRESETS[preset]
+    if format is None:
+        extension = os.path.splitext(file_path)[1].lower()
+        format = format_for_extension(extension)
+        if format is None:
+            raise ValueError(f"Cannot tell the image format of {file_path} from its extension")
+    format = _normalize_format(format)
+    if format in DEFAULT_PRESETS:
+        return PRESETS[DEFAULT_PRESETS[format]]
+    return ExportPreset(format.lower(), format, f"{format}, default options")
+
+
+def prepare_image(image: PIL.Image.Image, preset: ExportPreset) -> PIL.Image.Image:
+    """``image`` in a mode the preset's encoder can write."""
+    if preset.format == "JPEG" and image.mode not in JPEG_MODES:
+        return image.convert("RGB")
+    return image
+
+
+def encode_image(image: PIL.Image.Image, file_path: str, preset: ExportPreset) -> None:
+    """Writes ``image`` to ``file_path`` with the preset's format and options.
+
+    Pillow releases the GIL while its encoders run, so this can run on a worker thread
+    without stalling the GUI thread.
+    """
+    ensure_format(preset.format)
+    prepare_image(image, preset).save(file_path, format=preset.format, **preset.options)
+
+
+def png_compress_level(preset: ExportPreset) -> int:
+    """The zlib level a PNG preset asks for, for encoders other than Pillow's."""
+    if preset.options.get("optimize"):
+        return 9
+    return preset.options.get("compress_level", 6)
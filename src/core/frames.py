@@ -0,0 +1,151 @@
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+import PIL.Image
+from PIL import GifImagePlugin, TiffImagePlugin
+
+from src.core.codecs import open_file
+from src.core.pngwriter import ApngWriter
+
+# Formats whose files can hold several frames, and that ``FrameWriter`` writes.
+MULTIFRAME_FORMATS = ("GIF", "PNG", "TIFF")
+
+# Disposal methods, numbered as in GIF: what happens to a frame's area before the next
+# frame is drawn. APNG dispose ops are the last three, numbered from 0.
+DISPOSE_UNSPECIFIED = 0
+DISPOSE_NONE = 1
+DISPOSE_BACKGROUND = 2
+DISPOSE_PREVIOUS = 3
+
+# TIFF compressions that only apply to bilevel pages; redacted pages are grayscale.
+_BILEVEL_COMPRESSIONS = ("group3", "group4", "tiff_ccitt", "tiff_raw_16")
+
+
+@dataclass
+class FrameInfo:
+    """Timing and page settings of one frame, kept when the frame is written again."""
+    index: int
+    duration: Optional[float] = None  # milliseconds
+    disposal: int = DISPOSE_UNSPECIFIED
+    mode: str = "RGBA"  # mode of the frame in the source file
+    compression: Optional[str] = None  # TIFF only
+    dpi: Optional[Tuple[float, float]] = None
+
+
+@dataclass
+class FrameSource:
+    """What is known about a multi-frame file after reading its header."""
+    format: str
+    size: Tuple[int, int]
+    frames: int
+    loop: Optional[int] = None  # None plays once
+
+
+def read_header(file_path: str) -> FrameSource:
+    with open_file(file_path) as img:
+        return FrameSource(img.format, img.size, getattr(img, "n_frames", 1), img.info.get("loop"))
+
+
+def frame_count(file_path: str) -> int:
+    """Number of frames or pages in an image file; 1 for single images."""
+    return read_header(file_path).frames
+
+
+def _frame_info(img: PIL.Image.Image, index: int) -> FrameInfo:
+    disposal = DISPOSE_UNSPECIFIED
+    if img.format == "GIF":
+        disposal = getattr(img, "disposal_method", DISPOSE_UNSPECIFIED)
+    elif img.format == "PNG" and "disposal" in img.info:
+        disposal = img.info["disposal"] + DISPOSE_NONE
+    return FrameInfo(index, img.info.get("duration"), disposal, img.mode,
+                     img.info.get("compression"), img.info.get("dpi"))
+
+
+def read_frames(file_path: str) -> Iterator[Tuple[PIL.Image.Image, FrameInfo]]:
+    """Yields every frame of ``file_path`` as a full RGBA image, with its settings.
+
+    Only the current frame is decoded. GIF and APNG frames come composited onto what the
+    previous frames left, as they would be displayed, so each one is a whole picture.
+    """
+    with open_file(file_path) as img:
+        for index in range(getattr(img, "n_frames", 1)):
+            img.seek(index)
+            yield img.convert("RGBA"), _frame_info(img, index)
+
+
+class FrameWriter:
+    """Writes full frames one at a time into a multi-frame GIF, APNG or TIFF file.
+
+    Encoding each frame as it is handed over keeps memory at about one frame, which
+    Pillow's ``save_all`` does not for GIF and APNG, as it collects every frame first to
+    optimize the differences between them.
+    """
+
+    def __init__(self, fp: BinaryIO, format: str, source: FrameSource, compress_level: int = 6):
+        if format not in MULTIFRAME_FORMATS:
+            raise ValueError(f"Cannot write several frames as {format}, expected one of "
+                             f"{', '.join(MULTIFRAME_FORMATS)}")
+        self.format = format
+        self.size = source.size
+        self._fp = fp
+        self._loop = source.loop
+        self._first = True
+        self._apng: Optional[ApngWriter] = None
+        self._tiff: Optional[TiffImagePlugin.AppendingTiffWriter] = None
+        if format == "PNG":
+            self._apng = ApngWriter(fp, source.size, source.frames, source.loop or 0, compress_level=compress_level)
+        elif format == "TIFF":
+            self._tiff = TiffImagePlugin.AppendingTiffWriter(fp)
+
+    def write(self, frame: PIL.Image.Image, info: FrameInfo) -> None:
+        if frame.size != self.size:
+            raise ValueError(f"Frame {info.index} is {frame.size}, but the animation is {self.size}")
+        if self._apng is not None:
+            dispose = max(info.disposal - DISPOSE_NONE, 0)
+            self._apng.write_frame(frame, info.duration or 0.0, dispose)
+        elif self._tiff is not None:
+            self._write_page(frame, info)
+        else:
+            self._write_gif_frame(frame, info)
+        self._first = False
+
+    def _write_page(self, frame: PIL.Image.Image, info: FrameInfo) -> None:
+        options = {}
+        compression = info.compression
+        if compression and compression != "raw":
+            options["compression"] = "tiff_lzw" if compression in _BILEVEL_COMPRESSIONS else compression
+        if info.dpi:
+            options["dpi"] = info.dpi
+        if info.mode in ("1", "L"):
+            frame = frame.convert("L")
+        elif "A" not in info.mode and frame.getextrema()[3][0] == 255:
+            frame = frame.convert("RGB")
+        frame.save(self._tiff, format="TIFF", **options)
+        self._tiff.newFrame()  # type: ignore
+
+    def _write_gif_frame(self, frame: PIL.Image.Image, info: FrameInfo) -> None:
+        """Quantizes ``frame`` to its own palette; mostly transparent pixels use the last entry."""
+        alpha = frame.getchannel("A")
+        transparent = alpha.getextrema()[0] < 128
+        # Fast octree is what Pillow's own GIF encoder uses for RGBA frames; median cut is 5x slower.
+        indexed = frame.convert("RGB").quantize(255 if transparent else 256, method=PIL.Image.Quantize.FASTOCTREE)
+        params = {"include_color_table": True, "optimize": False, "disposal": info.disposal}
+        if info.duration:
+            params["duration"] = info.duration
+        if transparent:
+            indexed.paste(255, mask=alpha.point(lambda a: 255 if a < 128 else 0))
+            params["transparency"] = 255
+        if self._first:
+            header_info = {"optimize": False} if self._loop is None else {"optimize": False, "loop": self._loop}
+            header, _ = GifImagePlugin.getheader(indexed, info=header_info)
+            for chunk in header:
+                self._fp.write(chunk)
+        for chunk in GifImagePlugin.getdata(indexed, (0, 0), **params):
+            self._fp.write(chunk)
+
+    def close(self) -> None:
+        """Finishes the file; ``fp`` stays open."""
+        if self._apng is not None:
+            self._apng.close()
+        elif self._tiff is None:
+            self._fp.write(b";")  # GIF trailer
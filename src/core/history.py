@@ -0,0 +1,186 @@
+import zlib
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+import PIL.Image
+
+TILE_SIZE = 256
+DEFAULT_HISTORY_BYTES = 256 * 1024 * 1024
+
+
+def _new_like(image, size: Tuple[int, int]):
+    """A blank image of the same kind as ``image`` (PIL or tiled)."""
+    if isinstance(image, PIL.Image.Image):
+        return PIL.Image.new(image.mode, size)
+    return image.new_like(size)
+
+
+def _cropped(image, box: Tuple[int, int, int, int]):
+    """``image`` cropped to ``box``, keeping its kind (PIL or tiled)."""
+    if isinstance(image, PIL.Image.Image):
+        return image.crop(box)
+    return image.cropped(box)
+
+
+class RegionSnapshot:
+    """Pixels of one box of an image, kept as zlib-compressed tiles."""
+
+    def __init__(self, image: PIL.Image.Image, box: Tuple[int, int, int, int],
+                 origin: Tuple[int, int] = (0, 0), tile_size: int = TILE_SIZE):
+        """``box`` is in full-image coordinates; ``image`` may be a crop whose top-left is at ``origin``."""
+        self.box = box
+        self.mode = image.mode
+        self.tiles: List[Tuple[Tuple[int, int, int, int], bytes]] = []
+        left, upper, right, lower = box
+        origin_x, origin_y = origin
+        for y in range(upper, lower, tile_size):
+            for x in range(left, right, tile_size):
+                tile_box = (x, y, min(x + tile_size, right), min(y + tile_size, lower))
+                tile = image.crop((tile_box[0] - origin_x, tile_box[1] - origin_y,
+                                   tile_box[2] - origin_x, tile_box[3] - origin_y))
+                self.tiles.append((tile_box, zlib.compress(tile.tobytes(), 1)))
+        self.nbytes = sum(len(data) for _, data in self.tiles)
+
+    def restore(self, image: PIL.Image.Image) -> None:
+        """Pastes the stored pixels back into ``image`` at their original position."""
+        for (left, upper, right, lower), data in self.tiles:
+            tile = PIL.Image.frombytes(self.mode, (right - left, lower - upper), zlib.decompress(data))
+            image.paste(tile, (left, upper))
+
+
+class HistoryEntry:
+    """One undoable step: the pre-edit pixels of the touched boxes, plus the crop box for crops."""
+
+    def __init__(self, before: List[RegionSnapshot], image_size: Tuple[int, int],
+                 crop_box: Optional[Tuple[int, int, int, int]] = None):
+        self.before = before
+        self.image_size = image_size
+        self.crop_box = crop_box
+        self.after: Optional[List[RegionSnapshot]] = None
+        self.versions = (0, 0)  # content versions before and after the step
+
+    @property
+    def nbytes(self) -> int:
+        return sum(snapshot.nbytes for snapshot in self.before + (self.after or []))
+
+    @property
+    def box(self) -> Tuple[int, int, int, int]:
+        """Bounding box of everything this step touched."""
+        boxes = [snapshot.box for snapshot in self.before]
+        return (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+
+class EditHistory:
+    """Multi-level undo/redo stack of region deltas with a byte budget.
+
+    When the compressed deltas exceed ``max_bytes`` the oldest undo steps are dropped
+    and ``truncated`` is set, so callers know the original can no longer be rebuilt by
+    undoing every step.
+
+    ``version`` identifies the current image content: every recorded step and every
+    ``clear`` moves to a new number, while undo and redo return to the number the
+    content had before, so it can key caches of derived results.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_HISTORY_BYTES):
+        self.max_bytes = max_bytes
+        self.truncated = False
+        self.version = 0
+        self._last_version = 0
+        self._undo: Deque[HistoryEntry] = deque()
+        self._redo: List[HistoryEntry] = []
+
+    @property
+    def nbytes(self) -> int:
+        return sum(entry.nbytes for entry in self._undo) + sum(entry.nbytes for entry in self._redo)
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def clear(self) -> None:
+        self._undo.clear()
+        self._redo.clear()
+        self.truncated = False
+        self.version = self._new_version()
+
+    def _new_version(self) -> int:
+        self._last_version += 1
+        return self._last_version
+
+    def record_edit(self, pixels: PIL.Image.Image, box: Tuple[int, int, int, int],
+                    image_size: Tuple[int, int]) -> None:
+        """Records ``pixels``, the content of ``box`` before it was edited in place."""
+        self.record_edits([(box, pixels)], image_size)
+
+    def record_edits(self, backups: List[Tuple[Tuple[int, int, int, int], PIL.Image.Image]],
+                     image_size: Tuple[int, int]) -> None:
+        """Records several ``(box, pixels)`` backups as a single undoable step."""
+        self.record_snapshots([RegionSnapshot(pixels, box, origin=box[:2]) for box, pixels in backups], image_size)
+
+    def record_snapshots(self, snapshots: List[RegionSnapshot], image_size: Tuple[int, int]) -> None:
+        """Records already compressed pre-edit snapshots as a single undoable step."""
+        self._push(HistoryEntry(snapshots, image_size))
+
+    def record_crop(self, image: PIL.Image.Image, crop_box: Tuple[int, int, int, int]) -> None:
+        """Records the whole image before it is cropped to ``crop_box``."""
+        self._push(HistoryEntry([RegionSnapshot(image, (0, 0) + image.size)], image.size, crop_box))
+
+    def undo(self, image: PIL.Image.Image) -> Tuple[PIL.Image.Image, Optional[Tuple[int, int, int, int]]]:
+        """Reverts the newest step on ``image``.
+
+        Returns the resulting image (a new object when the step was a crop) and the box
+        that changed, or ``None`` when the whole image changed.
+        """
+        entry = self._undo.pop()
+        self._redo.append(entry)
+        self.version = entry.versions[0]
+        if entry.crop_box is not None:
+            restored = _new_like(image, entry.image_size)
+            entry.before[0].restore(restored)
+            return restored, None
+        if entry.after is None:
+            entry.after = [RegionSnapshot(image, snapshot.box) for snapshot in entry.before]
+        for snapshot in reversed(entry.before):
+            snapshot.restore(image)
+        self._evict()
+        return image, entry.box
+
+    def redo(self, image: PIL.Image.Image) -> Tuple[PIL.Image.Image, Optional[Tuple[int, int, int, int]]]:
+        """Re-applies the most recently undone step on ``image``."""
+        entry = self._redo.pop()
+        self._undo.append(entry)
+        self.version = entry.versions[1]
+        if entry.crop_box is not None:
+            return _cropped(image, entry.crop_box), None
+        for snapshot in entry.after:  # type: ignore
+            snapshot.restore(image)
+        return image, entry.box
+
+    def rewind(self, image: PIL.Image.Image) -> PIL.Image.Image:
+        """Undoes every step without keeping redo data and returns the oldest recorded state."""
+        while self._undo:
+            entry = self._undo.pop()
+            if entry.crop_box is not None:
+                image = _new_like(image, entry.image_size)
+            for snapshot in reversed(entry.before):
+                snapshot.restore(image)
+        self.clear()
+        return image
+
+    def _push(self, entry: HistoryEntry) -> None:
+        entry.versions = (self.version, self._new_version())
+        self.version = entry.versions[1]
+        self._redo.clear()
+        self._undo.append(entry)
+        self._evict()
+
+    def _evict(self) -> None:
+        total = self.nbytes
+        while total > self.max_bytes and self._undo:
+            total -= self._undo.popleft().nbytes
+            self.truncated = True
+        while total > self.max_bytes and self._redo:
+            total -= self._redo.pop(0).nbytes
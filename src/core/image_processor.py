@@ -1,45 +1,404 @@
 import os
-from typing import Optional, Tuple
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import PIL.Image
 import PIL.Image as pil_image
-import PIL.ImageFilter
+
+from src.core.blur import DEFAULT_TOLERANCE, BlurEngine, blur_halo, get_engine, select_engine  # noqa: F401
+from src.core.cache import DEFAULT_CACHE_BYTES, EffectCache
+from src.core.codecs import open_file
+from src.core.decode_cache import DecodeCache
+from src.core.export import ExportPreset, ExportResult, encode_image, png_compress_level, resolve_preset
+from src.core.frames import FrameSource, FrameWriter, read_frames, read_header
+from src.core.history import DEFAULT_HISTORY_BYTES, EditHistory, RegionSnapshot
+from src.core.operations import Box, Operation, RenderPass, apply_operations, plan_operations
+from src.core.parallel import TileEffect, TilePool
+from src.core.pixelate import pixelate_image  # noqa: F401
+from src.core.pngwriter import PngWriter
+from src.core.profiling import box_pixels, profiled
+from src.core.progress import OperationCancelled, ProgressCallback  # noqa: F401
+from src.core.proxy import ProxyPyramid, scale_box
+from src.core.tiled import DEFAULT_MAX_RESIDENT_TILES, DEFAULT_TILE_SIZE, TiledImage
 
 
 class ImageProcessingError(Exception):
     """Custom exception for image processing failures."""
     pass
 
+# How many proxy levels below the display a coarse preview is computed.
+COARSE_LEVELS = 2
+
+
+def _image_pixels(processor: "ImageProcessor", *args, **kwargs) -> Optional[int]:
+    """Pixels of the processor's image, for profiling whole-image operations."""
+    size = processor.image_size()
+    return size[0] * size[1] if size is not None else None
+
+
+def _region_pixels(processor: "ImageProcessor", region: Box, *args, **kwargs) -> int:
+    return box_pixels(region)
+
+
+def _tile_pixels(processor: "ImageProcessor", level: int, box: Box, *args, **kwargs) -> int:
+    return box_pixels(box)
+
+
+def _operation_pixels(processor: "ImageProcessor", operation: Operation, *args, **kwargs) -> int:
+    return box_pixels(operation.region)
+
 class ImageProcessor:
-    def __init__(self):
-        self._current_image: Optional[PIL.Image.Image] = None
+    def __init__(self, history_bytes: int = DEFAULT_HISTORY_BYTES, tiled: bool = False,
+                 tile_size: int = DEFAULT_TILE_SIZE, max_resident_tiles: int = DEFAULT_MAX_RESIDENT_TILES,
+                 blur_engine: str = "auto", blur_tolerance: float = DEFAULT_TOLERANCE,
+                 cache_bytes: int = DEFAULT_CACHE_BYTES, decode_cache: Optional[DecodeCache] = None,
+                 tile_pool: Optional[TilePool] = None):
+        """With ``tiled`` the image is kept as a TiledImage: tiles are read lazily where the
+        format allows, at most ``max_resident_tiles`` stay in memory and the rest spill to disk.
+
+        ``blur_engine`` names an engine from ``src.core.blur``, or ``"auto"`` to pick the
+        fastest one within ``blur_tolerance`` of Pillow's GaussianBlur for each region.
+
+        Processed regions are kept in an LRU cache of up to ``cache_bytes``, so applying
+        an effect again to the same content, for example after an undo, is a lookup. The
+        compressed undo snapshots of edited boxes get a cache of the same budget.
+
+        With a ``decode_cache``, decoded pixels are stored on disk and a file opened
+        again, by this or another process, is memory-mapped instead of decoded. Tiled
+        mode does not use it.
+
+        With a ``tile_pool``, blurs and pixelations of large regions are split into bands
+        processed by its worker processes, with the same result. It can be shared by
+        several processors and is closed by its owner.
+        """
+        self._current_image: Optional[Union[PIL.Image.Image, TiledImage]] = None
         self._file_path: Optional[str] = None
-        self._original_image: Optional[PIL.Image.Image] = None
+        self._pending_size: Optional[Tuple[int, int]] = None
+        self._history = EditHistory(history_bytes)
+        self._tiled = tiled
+        self._tile_size = tile_size
+        self._max_resident_tiles = max_resident_tiles
+        self._blur_engine: Optional[BlurEngine] = None if blur_engine == "auto" else get_engine(blur_engine)
+        self._blur_tolerance = blur_tolerance
+        self._decode_cache = decode_cache
+        self._tile_pool = tile_pool
+        self._deferred = False
+        self._pending_ops: List[Operation] = []
+        self._undone_ops: List[Operation] = []
+        self._cache = EffectCache(cache_bytes)
+        self._snapshots = EffectCache(cache_bytes)
+        self._pyramid: Optional[ProxyPyramid] = None
+        self._display: Optional[Tuple[int, int, List[Operation], PIL.Image.Image]] = None
+        self._display_dirty: Optional[List[Box]] = None
 
-    def open_image(self, file_path: str) -> bool:
-        """Opens an image file."""
+    def _decode(self, file_path: str) -> Union[PIL.Image.Image, TiledImage]:
+        """Decodes an image file into an RGBA image, or a tiled image in tiled mode."""
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found at {file_path}")
 
         try:
-            img = PIL.Image.open(file_path)
+            if self._tiled:
+                return TiledImage.open(file_path, self._tile_size, self._max_resident_tiles)
+            if self._decode_cache is not None:
+                cached = self._decode_cache.get(file_path)
+                if cached is not None and cached.mode == 'RGBA':
+                    return cached
+            img = open_file(file_path)
             # Convert to RGBA for consistency
             img = img.convert('RGBA')
-            self._current_image = img
-            self._file_path = file_path
-            self._original_image = self._current_image.copy()
-            return True
+            if self._decode_cache is not None:
+                self._decode_cache.put(file_path, img)
+            return img
         except PIL.UnidentifiedImageError:
             raise ImageProcessingError(f"Cannot identify image file: {file_path}")
         except Exception as e:
             raise ImageProcessingError(f"An unexpected error occurred opening {file_path}: {e}")
 
+    @profiled("open_image", pixels=_image_pixels)
+    def open_image(self, file_path: str, lazy: bool = False) -> bool:
+        """Opens an image file.
+
+        With ``lazy`` only the header is read; the full decode is deferred until the first
+        edit, save or ``get_current_image`` call, and ``get_preview`` can show a reduced
+        decode in the meantime.
+        """
+        if lazy:
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(f"File not found at {file_path}")
+            try:
+                with open_file(file_path) as img:
+                    self._pending_size = img.size
+            except PIL.UnidentifiedImageError:
+                raise ImageProcessingError(f"Cannot identify image file: {file_path}")
+            except Exception as e:
+                raise ImageProcessingError(f"An unexpected error occurred opening {file_path}: {e}")
+            self._current_image = None
+        else:
+            self._current_image = self._decode(file_path)
+            self._pending_size = None
+        self._file_path = file_path
+        self._reset_edits()
+        return True
+
+    def _reset_edits(self) -> None:
+        """Forgets the history, caches and pending edits, for a newly loaded image."""
+        self._history.clear()
+        self._cache.clear()
+        self._snapshots.clear()
+        self._drop_proxies()
+        self._pending_ops.clear()
+        self._undone_ops.clear()
+
+    def _ensure_loaded(self) -> None:
+        """Performs the full decode deferred by a lazy open."""
+        if self._pending_size is not None and self._file_path is not None:
+            self._current_image = self._decode(self._file_path)
+            self._pending_size = None
+
+    def is_loaded(self) -> bool:
+        """True once the full-resolution image has been decoded."""
+        return self._current_image is not None
+
+    def image_size(self) -> Optional[Tuple[int, int]]:
+        """Size of the image, known from the header even before a lazy open has decoded it."""
+        if self._current_image is not None:
+            return self._current_image.size
+        return self._pending_size
+
+    def get_preview(self, max_size: Tuple[int, int]) -> Optional[PIL.Image.Image]:
+        """Returns the image scaled down to fit ``max_size``.
+
+        Before a lazy open has decoded the file, JPEGs are decoded with Pillow's draft
+        mode at 1/2, 1/4 or 1/8 scale, which is far cheaper than a full decode.
+        """
+        if self._current_image is None and self._pending_size is not None:
+            try:
+                with open_file(self._file_path) as img:  # type: ignore
+                    if img.format == "JPEG":
+                        img.draft("RGB", max_size)
+                    preview = img.convert("RGBA")
+            except Exception as e:
+                raise ImageProcessingError(f"Error decoding preview of {self._file_path}: {e}")
+        else:
+            preview = self.get_current_image()
+            if preview is None:
+                return None
+        preview.thumbnail(max_size, resample=PIL.Image.Resampling.BILINEAR)
+        return preview
+
+    def get_display_image(self, max_size: Tuple[int, int]) -> Optional[PIL.Image.Image]:
+        """Returns the image with pending edits at the proxy resolution that covers ``max_size``.
+
+        The result is the smallest level of the proxy pyramid that still fills
+        ``max_size``, so it is at most about twice as large as needed and its cost does
+        not depend on the source resolution. Deferred edits are previewed on it without
+        being rendered; full-resolution work only happens on ``render`` or save. Before a
+        lazy open has decoded the file this is ``get_preview``.
+        """
+        if self._current_image is None:
+            return self.get_preview(max_size) if self._pending_size is not None else None
+        return self._refresh_display(max_size).copy()
+
+    @profiled("display_update")
+    def display_update(self, max_size: Tuple[int, int], progress: Optional[ProgressCallback] = None
+                       ) -> Tuple[Optional[PIL.Image.Image], Optional[List[Box]]]:
+        """Like ``get_display_image``, but returns the internal display image with the boxes changed since the last call.
+
+        The boxes are in display coordinates; ``None`` means the whole image changed,
+        for example because another proxy level was chosen. The image is owned by the
+        processor and must not be modified. ``progress`` is called after each previewed
+        edit; if it cancels, the edits previewed so far are kept for the next call.
+        """
+        if self._current_image is None:
+            return self.get_display_image(max_size), None
+        display = self._refresh_display(max_size, progress)
+        dirty, self._display_dirty = self._display_dirty, []
+        return display, dirty
+
+    def _refresh_display(self, max_size: Tuple[int, int], progress: Optional[ProgressCallback] = None
+                         ) -> PIL.Image.Image:
+        """Brings the display image for ``max_size`` up to date, collecting changed boxes in ``_display_dirty``."""
+        if self._pyramid is None:
+            self._pyramid = ProxyPyramid(self._current_image)
+        level = self._pyramid.level_for(max_size)
+        version = self._history.version
+        cached = self._display
+        if (cached is None or cached[:2] != (level, version)
+                or cached[2] != self._pending_ops[:len(cached[2])]):
+            cached = (level, version, [], self._proxy_base(level).copy())
+            self._display_dirty = None
+        display, painted = cached[3], list(cached[2])
+        self._display = (level, version, painted, display)
+        new_operations = self._pending_ops[len(painted):]
+        for index, operation in enumerate(new_operations):
+            box = self._preview_operation(display, level, operation)
+            painted.append(operation)
+            if self._display_dirty is not None:
+                self._display_dirty.append(box)
+            if progress is not None:
+                progress(index + 1, len(new_operations))
+        return display
+
+    def _proxy_base(self, level: int) -> PIL.Image.Image:
+        """The rendered image at pyramid ``level``; level 0 is the full-resolution image."""
+        if level:
+            return self._pyramid.image(level)  # type: ignore
+        if isinstance(self._current_image, TiledImage):
+            return self._current_image.to_image()
+        return self._current_image  # type: ignore
+
+    def _preview_operation(self, display: PIL.Image.Image, level: int, operation: Operation) -> Box:
+        """Paints a pending edit onto a proxy, scaled to its resolution, and returns the painted box.
+
+        Like rendering, the effect reads the unedited proxy and the latest edit wins.
+        """
+        patch, region = self._proxy_effect(level, operation)
+        display.paste(patch, region[:2])
+        return region
+
+    def _proxy_effect(self, level: int, operation: Operation) -> Tuple[PIL.Image.Image, Box]:
+        """Computes a blur or pixelate edit on the unedited proxy at ``level``, scaled to its resolution.
+
+        Returns the processed pixels, which callers must not modify, and the box they
+        cover at that level. They are kept in the effect cache, so scrubbing a dial back
+        to a value already previewed is a lookup.
+        """
+        base = self._proxy_base(level)
+        scaled = self._scaled_operation(operation, level, base.size)
+        key = self._proxy_key(level, operation)
+        processed = self._cache.get(key)
+        if processed is None:
+            processed = self._process_region(scaled.region, *self._effect_transform(scaled), image=base)
+            self._cache.put(key, processed)
+        return processed, scaled.region
+
+    def _proxy_key(self, level: int, operation: Operation) -> tuple:
+        return (self._history.version, level, operation)
+
+    @staticmethod
+    def _scaled_operation(operation: Operation, level: int, size: Tuple[int, int]) -> Operation:
+        """A blur or pixelate edit scaled to pyramid ``level``, whose image is ``size``."""
+        factor = ProxyPyramid.factor(level)
+        region = scale_box(operation.region, factor, size)
+        if operation.effect == "blur":
+            return Operation("blur", region, radius=operation.radius / factor)  # type: ignore
+        pixel_size = max(1, round(operation.pixel_size / factor))  # type: ignore
+        return Operation("pixelate", region, pixel_size=pixel_size, aligned=operation.aligned)
+
+    @profiled("display_tile", pixels=_tile_pixels)
+    def display_tile(self, level: int, box: Box) -> PIL.Image.Image:
+        """The pixels of ``box`` of the image at pyramid ``level``, with pending edits previewed.
+
+        Level 0 is the full resolution. Only the tile and the context its edits read are
+        processed, so a zoomed-in view of a large image costs what is visible. Like
+        ``display_update``, each pending edit reads the unedited pixels and the latest wins.
+        """
+        self._ensure_loaded()
+        if level and self._pyramid is None:
+            self._pyramid = ProxyPyramid(self._current_image)
+        base = self._current_image if level == 0 else self._pyramid.image(level)  # type: ignore
+        tile = base.crop(box)  # type: ignore
+        for operation in self._pending_ops:
+            scaled = self._scaled_operation(operation, level, base.size)  # type: ignore
+            region = scaled.region
+            overlap = (max(box[0], region[0]), max(box[1], region[1]), min(box[2], region[2]), min(box[3], region[3]))
+            if overlap[0] >= overlap[2] or overlap[1] >= overlap[3]:
+                continue
+            patch = self._effect_part(scaled, overlap, base)
+            tile.paste(patch, (overlap[0] - box[0], overlap[1] - box[1]))
+        return tile
+
+    def _effect_part(self, operation: Operation, part: Box, image) -> PIL.Image.Image:
+        """The pixels ``part`` of ``operation``'s region would have if the whole region were processed.
+
+        A blur reads its halo around the part, with the engine picked for the whole
+        region. An engine whose result depends on where the crop starts, which is a
+        cheap one, processes the whole region once and keeps it in the effect cache. A
+        pixelation is computed on the part widened to whole grid cells.
+        """
+        region = operation.region
+        if operation.effect == "blur":
+            transform, halo = self._effect_transform(operation)
+            if self.blur_engine_for(region, operation.radius).tileable:  # type: ignore
+                return self._process_region(part, transform, halo, image)
+            key = (self._history.version, image.size, operation)
+            processed = self._cache.get(key)
+            if processed is None:
+                processed = self._process_region(region, transform, halo, image)
+                self._cache.put(key, processed)
+            return processed.crop((part[0] - region[0], part[1] - region[1], part[2] - region[0], part[3] - region[1]))
+        block = operation.pixel_size
+        origin = (0, 0) if operation.aligned else region[:2]
+        cells = (max(region[0], part[0] - (part[0] - origin[0]) % block),
+                 max(region[1], part[1] - (part[1] - origin[1]) % block),
+                 min(region[2], part[2] + (origin[0] - part[2]) % block),
+                 min(region[3], part[3] + (origin[1] - part[3]) % block))
+        offset = (cells[0] - origin[0], cells[1] - origin[1])
+        pixelated = pixelate_image(image.crop(cells), block, offset)  # type: ignore
+        return pixelated.crop((part[0] - cells[0], part[1] - cells[1], part[2] - cells[0], part[3] - cells[1]))
+
+    @profiled("preview_effect", pixels=_operation_pixels)
+    def preview_effect(self, operation: Operation, max_size: Tuple[int, int],
+                       coarse: bool = False) -> Tuple[PIL.Image.Image, Box]:
+        """Renders a blur or pixelate edit for a live preview, without recording it.
+
+        Returns the processed pixels of the region and their box in the coordinates of
+        the display image for ``max_size``, ready to be drawn over it. With ``coarse``
+        the effect is computed COARSE_LEVELS proxy levels lower and scaled up, for a
+        quick first answer while a parameter is still changing. Both passes go through
+        the effect cache, and a coarse request for a value whose full preview is cached
+        gets that instead.
+        """
+        self._validate_region(operation.region)
+        display = self._refresh_display(max_size)
+        level = self._display[0]  # type: ignore
+        box = scale_box(operation.region, ProxyPyramid.factor(level), display.size)
+        source_level = level
+        if coarse and self._proxy_key(level, operation) not in self._cache:
+            source_level = min(level + COARSE_LEVELS, len(self._pyramid.levels))  # type: ignore
+        patch, _ = self._proxy_effect(source_level, operation)
+        if source_level != level:
+            patch = patch.resize((box[2] - box[0], box[3] - box[1]), resample=PIL.Image.Resampling.BILINEAR)
+        return patch, box
+
+    def _update_proxies(self, box: Optional[Tuple[int, int, int, int]]) -> None:
+        """Brings the proxies up to date after ``box`` changed; ``None`` means the whole image.
+
+        When no edits are pending, the shown display image only needs that box copied
+        from its updated level.
+        """
+        if self._pyramid is None:
+            self._display = None
+            return
+        if box is None or self._pyramid.size != self._current_image.size:  # type: ignore
+            self._drop_proxies()
+            return
+        self._pyramid.update(self._current_image, box)
+        if self._display is None or self._pending_ops:
+            self._display = None
+            return
+        level, _, _, display = self._display
+        scaled = scale_box(box, ProxyPyramid.factor(level), display.size)
+        display.paste(self._proxy_base(level).crop(scaled), scaled[:2])
+        self._display = (level, self._history.version, [], display)
+        if self._display_dirty is not None:
+            self._display_dirty.append(scaled)
+
+    def _drop_proxies(self) -> None:
+        self._pyramid = None
+        self._display = None
+
     def get_current_image(self) -> Optional[PIL.Image.Image]:
         """Returns a copy of the current image."""
+        self._ensure_loaded()
+        self.render()
+        if isinstance(self._current_image, TiledImage):
+            return self._current_image.to_image()
         return self._current_image.copy() if self._current_image else None
 
     def _validate_region(self, region: Tuple[int, int, int, int]) -> bool:
         """Helper to validate region coordinates against current image bounds."""
+        self._ensure_loaded()
         if self._current_image is None:
             raise ImageProcessingError("No image loaded")
 
@@ -54,6 +413,57 @@ class ImageProcessor:
             )
         return True
 
+    def _process_region(self, region: Tuple[int, int, int, int],
+                        transform: Callable[[PIL.Image.Image], PIL.Image.Image], halo: int = 0,
+                        image: Optional[PIL.Image.Image] = None) -> PIL.Image.Image:
+        """Runs ``transform`` on a halo-padded crop of ``region`` and returns the processed region.
+
+        Only the padded crop is read, so the cost follows the region size rather than
+        the image size. ``image`` defaults to the current image.
+        """
+        image = self._current_image if image is None else image
+        left, upper, right, lower = region
+        width, height = image.size  # type: ignore
+        padded = (max(0, left - halo), max(0, upper - halo), min(width, right + halo), min(height, lower + halo))
+        processed = transform(image.crop(padded))  # type: ignore
+        if padded != region:
+            processed = processed.crop((left - padded[0], upper - padded[1], right - padded[0], lower - padded[1]))
+        return processed
+
+    def _commit_patches(self, patches: List[Tuple[Tuple[int, int, int, int], PIL.Image.Image]]) -> None:
+        """Pastes processed patches into the current image in place as one undoable step.
+
+        The boxes are backed up first; if any paste fails the backups are pasted back
+        and the exception is re-raised.
+        """
+        image = self._current_image
+        backups = [(box, image.crop(box)) for box, _ in patches]  # type: ignore
+        try:
+            for box, patch in patches:
+                image.paste(patch, box)  # type: ignore
+        except Exception:
+            for box, backup in backups:
+                image.paste(backup, box)  # type: ignore
+            raise
+        self._history.record_snapshots([self._snapshot(box, pixels) for box, pixels in backups], image.size)  # type: ignore
+        for box, _ in patches:
+            self._update_proxies(box)
+
+    def _snapshot(self, box: Tuple[int, int, int, int], pixels: PIL.Image.Image) -> RegionSnapshot:
+        """The compressed undo snapshot of ``box`` before an edit, reused while the content version matches."""
+        key = (self._history.version, box)
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            snapshot = RegionSnapshot(pixels, box, origin=box[:2])
+            self._snapshots.put(key, snapshot, snapshot.nbytes)
+        return snapshot
+
+    def _edit_region(self, region: Tuple[int, int, int, int],
+                     transform: Callable[[PIL.Image.Image], PIL.Image.Image], halo: int = 0) -> None:
+        """Runs ``transform`` on a halo-padded crop of ``region`` and writes the result back in place."""
+        self._commit_patches([(region, self._process_region(region, transform, halo))])
+
+    @profiled("apply_blur", pixels=_region_pixels)
     def apply_blur(self, region: Tuple[int, int, int, int], radius: float) -> bool:
         """Applies Gaussian blur to a specific region."""
         if not self._validate_region(region):
@@ -62,20 +472,23 @@ class ImageProcessor:
         if radius < 0:
             raise ValueError("Blur radius cannot be negative")
 
+        operation = Operation("blur", tuple(region), radius=float(radius))  # type: ignore
+        if self._deferred:
+            self._record(operation)
+            return True
         try:
-            working_img = self._current_image.copy() # type: ignore
-            sub_region = working_img.crop(region)
-            blurred_sub_region = sub_region.filter(PIL.ImageFilter.GaussianBlur(radius))
-            working_img.paste(blurred_sub_region, region)
-            self._current_image = working_img
+            self._commit_patches([(operation.region, self._effect_result(operation))])
             return True
         except Exception as e:
             raise ImageProcessingError(f"Error applying blur: {e}")
 
+    @profiled("apply_crop", pixels=_region_pixels)
     def apply_crop(self, region: Tuple[int, int, int, int]) -> bool:
         """Crops the image to the specified region."""
+        self._ensure_loaded()
         if self._current_image is None:
             raise ImageProcessingError("No image loaded")
+        self.render()
 
         img_width, img_height = self._current_image.size
         left, upper, right, lower = region
@@ -86,44 +499,319 @@ class ImageProcessor:
             )
 
         try:
-            self._current_image = self._current_image.crop(region)
+            if isinstance(self._current_image, TiledImage):
+                cropped = self._current_image.cropped(region)
+            else:
+                cropped = self._current_image.crop(region)
+            self._history.record_crop(self._current_image, region)
+            self._current_image = cropped
+            self._drop_proxies()
             return True
         except Exception as e:
             raise ImageProcessingError(f"Error applying crop: {e}")
 
-    def save_image(self, file_path: str, format: Optional[str] = None) -> bool:
-        """Saves the current image to a file."""
+    def save_image(self, file_path: str, format: Optional[str] = None,
+                   progress: Optional[ProgressCallback] = None, preset: Optional[str] = None) -> bool:
+        """Saves the current image to a file, rendering pending edits first (see ``render`` for ``progress``).
+
+        ``preset`` names one of the encoder presets in ``src.core.export.PRESETS``;
+        without one the format's defaults are used. See ``export_image``.
+        """
+        self.export_image(file_path, format, progress, preset)
+        return True
+
+    @profiled("export_image", pixels=_image_pixels)
+    def export_image(self, file_path: str, format: Optional[str] = None,
+                     progress: Optional[ProgressCallback] = None, preset: Optional[str] = None) -> ExportResult:
+        """Like ``save_image``, but returns the encode time and size of the written file."""
+        self._ensure_loaded()
         if self._current_image is None:
             raise ImageProcessingError("No image to save")
+        try:
+            export = resolve_preset(file_path, format, preset)
+        except ValueError as e:
+            raise ImageProcessingError(f"Error saving file {file_path}: {e}")
+        self.render(progress)
 
         try:
-            self._current_image.save(file_path, format=format)
-            return True
+            start = time.perf_counter()
+            if isinstance(self._current_image, TiledImage):
+                self._save_tiled(self._current_image, file_path, export)
+            else:
+                encode_image(self._current_image, file_path, export)
+            seconds = time.perf_counter() - start
+            return ExportResult(file_path, export.name, seconds, os.path.getsize(file_path))
         except Exception as e:
             raise ImageProcessingError(f"Error saving file {file_path}: {e}")
 
+    @staticmethod
+    def _save_tiled(image: TiledImage, file_path: str, export: ExportPreset) -> None:
+        """Streams tiles straight into the encoder for PNG; other formats need the assembled image."""
+        if export.format != "PNG":
+            encode_image(image.to_image(), file_path, export)
+            return
+        with open(file_path, "wb") as f:
+            writer = PngWriter(f, image.size, compress_level=png_compress_level(export))
+            for band in image.rows():
+                writer.write(band)
+            writer.close()
+
+    @profiled("stream_frames")
+    def stream_frames(self, input_path: str, output_path: str, operations: List[Operation],
+                      frame_operations: Optional[Dict[int, List[Operation]]] = None,
+                      format: Optional[str] = None, preset: Optional[str] = None,
+                      progress: Optional[ProgressCallback] = None) -> int:
+        """Applies ``operations`` to every frame of an animated GIF or APNG, or every page of
+        a TIFF, and writes the frames to ``output_path``; returns the number of frames.
+
+        ``frame_operations`` maps frame indexes to further operations applied after the
+        common ones. Frames are decoded, edited and encoded one at a time, so memory stays
+        at about one frame whatever their number. Durations, disposal and the loop count
+        are kept. The output can be GIF, PNG (written as APNG) or TIFF. The frames go to a
+        hidden temporary file that replaces ``output_path`` once the last one is written,
+        so a failure midway never leaves a truncated animation behind. The open image is
+        left alone; ``progress`` is called after each frame.
+        """
+        try:
+            export = resolve_preset(output_path, format, preset)
+            source = read_header(input_path)
+        except (ValueError, OSError, PIL.UnidentifiedImageError) as e:
+            raise ImageProcessingError(f"Error streaming frames of {input_path}: {e}")
+        frames = self._frame_processor()
+        done = 0
+        directory, name = os.path.split(output_path)
+        temp_path = os.path.join(directory, f".writing-{os.getpid()}-{name}")
+        try:
+            with open(temp_path, "w+b") as f:
+                writer = FrameWriter(f, export.format, self._edited_source(source, operations),
+                                     png_compress_level(export))
+                for frame, info in read_frames(input_path):
+                    frames._current_image = frame
+                    frames._reset_edits()
+                    apply_operations(frames, operations + (frame_operations or {}).get(info.index, []))
+                    writer.write(frames._current_image, info)  # type: ignore
+                    frames._current_image = None
+                    done += 1
+                    if progress is not None:
+                        progress(done, source.frames)
+                writer.close()
+            os.replace(temp_path, output_path)
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            raise ImageProcessingError(f"Error streaming frame {done} of {input_path}: {e}")
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return done
+
+    def _frame_processor(self) -> "ImageProcessor":
+        """A processor with this one's blur settings, without undo history or caches."""
+        processor = ImageProcessor(history_bytes=0, cache_bytes=0, blur_tolerance=self._blur_tolerance)
+        processor._blur_engine = self._blur_engine
+        return processor
+
+    @staticmethod
+    def _edited_source(source: FrameSource, operations: List[Operation]) -> FrameSource:
+        """``source`` with the size its frames have after the common crops in ``operations``."""
+        size = source.size
+        for operation in operations:
+            if operation.effect == "crop":
+                left, upper, right, lower = operation.region
+                size = (right - left, lower - upper)
+        return FrameSource(source.format, size, source.frames, source.loop)
+
+    @profiled("reset_to_original", pixels=_image_pixels)
     def reset_to_original(self) -> bool:
-        """Resets the current image to its original state."""
-        if self._original_image is None:
+        """Resets the current image to its original state.
+
+        Undoes every recorded step when the history still reaches back to the opened
+        image, otherwise decodes the file again.
+        """
+        self._pending_ops.clear()
+        self._undone_ops.clear()
+        if self._pending_size is not None:
+            return True  # not decoded yet, so nothing has been edited
+        if self._current_image is None or self._file_path is None:
             raise ImageProcessingError("No original image available")
 
-        self._current_image = self._original_image.copy()
+        if self._history.truncated:
+            self._current_image = self._decode(self._file_path)
+        else:
+            self._current_image = self._history.rewind(self._current_image)
+        self._history.clear()
+        self._drop_proxies()
         return True
 
-    def pixelate_region(self, region: Tuple[int, int, int, int], pixel_size: int) -> bool:
-        """Pixelates a specific region with the given pixel size."""
+    def can_undo(self) -> bool:
+        return bool(self._pending_ops) or self._history.can_undo()
+
+    def can_redo(self) -> bool:
+        return bool(self._undone_ops) or self._history.can_redo()
+
+    @profiled("undo")
+    def undo(self) -> bool:
+        """Reverts the most recent edit. Returns False when there is nothing to undo."""
+        if self._pending_ops:
+            self._undone_ops.append(self._pending_ops.pop())
+            return True
+        if self._current_image is None or not self._history.can_undo():
+            return False
+        self._current_image, box = self._history.undo(self._current_image)
+        self._update_proxies(box)
+        return True
+
+    @profiled("redo")
+    def redo(self) -> bool:
+        """Re-applies the most recently undone edit. Returns False when there is nothing to redo."""
+        if self._undone_ops:
+            self._pending_ops.append(self._undone_ops.pop())
+            return True
+        if self._current_image is None or not self._history.can_redo():
+            return False
+        self._current_image, box = self._history.redo(self._current_image)
+        self._update_proxies(box)
+        return True
+
+    @profiled("pixelate_region", pixels=_region_pixels)
+    def pixelate_region(self, region: Tuple[int, int, int, int], pixel_size: int, aligned: bool = False) -> bool:
+        """Pixelates a specific region with the given pixel size.
+
+        With ``aligned`` the block grid is anchored to the image origin instead of the
+        region corner, so neighbouring regions pixelated with the same size line up.
+        """
         if not self._validate_region(region):
             return False
         if pixel_size <= 1:
             raise ValueError("Pixel size must be greater than 1")
+
+        operation = Operation("pixelate", tuple(region), pixel_size=int(pixel_size), aligned=aligned)  # type: ignore
+        if self._deferred:
+            self._record(operation)
+            return True
         try:
-            working_img = self._current_image.copy()
-            sub_region = working_img.crop(region)
-            w, h = sub_region.size
-            small = sub_region.resize((max(1, w // pixel_size), max(1, h // pixel_size)), resample=PIL.Image.Resampling.NEAREST)
-            pixelated = small.resize((w, h), resample=PIL.Image.Resampling.NEAREST)
-            working_img.paste(pixelated, region)
-            self._current_image = working_img
+            self._commit_patches([(operation.region, self._effect_result(operation))])
             return True
         except Exception as e:
-            raise ImageProcessingError(f"Error applying pixelation: {e}")
\ No newline at end of file
+            raise ImageProcessingError(f"Error applying pixelation: {e}")
+
+    def blur_engine_for(self, region: Tuple[int, int, int, int], radius: float) -> BlurEngine:
+        """The blur engine used for ``region`` at ``radius``."""
+        if self._blur_engine is not None:
+            return self._blur_engine
+        area = (region[2] - region[0]) * (region[3] - region[1])
+        return select_engine(radius, area, self._blur_tolerance)
+
+    def _effect_transform(self, operation: Operation) -> Tuple[Callable[[PIL.Image.Image], PIL.Image.Image], int]:
+        """The crop transform and halo that implement a blur or pixelate operation."""
+        if operation.effect == "blur":
+            radius = operation.radius
+            engine = self.blur_engine_for(operation.region, radius)  # type: ignore
+            return (lambda crop: engine.blur(crop, radius)), engine.halo(radius)  # type: ignore
+        pixel_size = operation.pixel_size
+        offset = operation.region[:2] if operation.aligned else (0, 0)
+        return (lambda crop: pixelate_image(crop, pixel_size, offset)), 0  # type: ignore
+
+    def _effect_result(self, operation: Operation) -> PIL.Image.Image:
+        """The processed pixels of a blur or pixelate operation's region, cached per content version."""
+        key = (self._history.version, operation)
+        processed = self._cache.get(key)
+        if processed is None:
+            effect = self._tile_effect(operation)
+            if effect is not None:
+                processed = self._tile_pool.process(self._current_image, operation.region, effect)  # type: ignore
+            else:
+                processed = self._process_region(operation.region, *self._effect_transform(operation))
+            self._cache.put(key, processed)
+        return processed
+
+    def _tile_effect(self, operation: Operation) -> Optional[TileEffect]:
+        """The effect to run on the tile pool, or None if the operation is processed in-process."""
+        if self._tile_pool is None or not self._tile_pool.accepts(operation.region, self._current_image.mode):  # type: ignore
+            return None
+        if operation.effect == "blur":
+            engine = self.blur_engine_for(operation.region, operation.radius)  # type: ignore
+            return TileEffect("blur", operation.radius, engine.name) if engine.tileable else None  # type: ignore
+        offset = operation.region[:2] if operation.aligned else (0, 0)
+        return TileEffect("pixelate", operation.pixel_size, offset=offset)  # type: ignore
+
+    @property
+    def effect_cache(self) -> EffectCache:
+        """The cache of processed regions, with its ``hits`` and ``misses`` counters."""
+        return self._cache
+
+    def set_deferred(self, deferred: bool) -> None:
+        """Switches between applying edits immediately and recording them for a later ``render``.
+
+        Deferred edits are non-destructive: they do not stack, each effect reads the
+        pixels as they were before rendering, and where regions overlap the latest edit
+        wins. Turning deferral off renders whatever is pending.
+        """
+        if not deferred:
+            self.render()
+        self._deferred = deferred
+
+    def is_deferred(self) -> bool:
+        return self._deferred
+
+    def pending_operations(self) -> List[Operation]:
+        """The recorded edits that have not been rendered yet."""
+        return list(self._pending_ops)
+
+    def _record(self, operation: Operation) -> None:
+        self._pending_ops.append(operation)
+        self._undone_ops.clear()
+
+    @profiled("render", pixels=_image_pixels)
+    def render(self, progress: Optional[ProgressCallback] = None) -> bool:
+        """Renders the recorded edits onto the image as one undoable step, in as few passes as possible.
+
+        ``progress`` is called after each render pass. If it cancels or rendering fails, the
+        edits that were not rendered yet stay pending.
+        """
+        if not self._pending_ops:
+            return True
+        self._ensure_loaded()
+        operations, self._pending_ops = self._pending_ops, []
+        try:
+            self._render_operations(operations, progress)
+        except OperationCancelled:
+            self._pending_ops = operations + self._pending_ops
+            raise
+        except Exception as e:
+            self._pending_ops = operations + self._pending_ops
+            raise ImageProcessingError(f"Error rendering edits: {e}")
+        self._undone_ops.clear()
+        return True
+
+    def replay(self, operations: List[Operation]) -> bool:
+        """Resets to the original image and renders ``operations`` on it at full resolution."""
+        self.reset_to_original()
+        self._pending_ops = list(operations)
+        return self.render()
+
+    def _render_operations(self, operations: List[Operation], progress: Optional[ProgressCallback] = None) -> None:
+        """Renders ``operations`` segment by segment between crops, removing each from the list once rendered."""
+        while operations:
+            end = next((index for index, op in enumerate(operations) if op.effect == "crop"), len(operations))
+            if end:
+                passes = plan_operations(operations[:end], halo=lambda op: self._effect_transform(op)[1])
+                self._render_passes(passes, progress)
+            else:
+                self.apply_crop(operations[0].region)
+                end = 1
+            del operations[:end]
+
+    def _render_passes(self, passes: List[RenderPass], progress: Optional[ProgressCallback] = None) -> None:
+        """Computes every pass from the unmodified pixels first, then pastes the visible parts."""
+        patches = []
+        for index, render_pass in enumerate(passes):
+            operation = render_pass.operation
+            processed = self._effect_result(operation)
+            left, upper = operation.region[:2]
+            for box in render_pass.paint:
+                patches.append((box, processed.crop((box[0] - left, box[1] - upper, box[2] - left, box[3] - upper))))
+            if progress is not None:
+                progress(index + 1, len(passes))
+        if patches:
+            self._commit_patches(patches)
@@ -0,0 +1,223 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.core.operations import Operation
+
+MANIFEST_NAME = ".blurrify-manifest.json"
+
+# Part of every recipe hash. Bump it when the same recipe starts producing different pixels,
+# so outputs of older versions are made again instead of being reused.
+RECIPE_VERSION = 1
+
+_CHUNK = 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def recipe_digest(operations: List[Operation], frame_operations: Optional[Dict[int, List[Operation]]] = None,
+                  format: Optional[str] = None, preset: Optional[str] = None) -> str:
+    """SHA-256 of everything besides the input that decides an output's pixels and encoding."""
+    recipe = {
+        "version": RECIPE_VERSION,
+        "operations": [operation.to_dict() for operation in operations],
+        "frames": {str(index): [operation.to_dict() for operation in ops]
+                   for index, ops in sorted((frame_operations or {}).items())},
+        "format": format.upper() if format else None,
+        "preset": preset,
+    }
+    return hashlib.sha256(json.dumps(recipe, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ManifestEntry:
+    """What one input was last turned into: its hash and stat, the recipe hash and the output."""
+    input_sha256: str
+    input_size: int
+    input_mtime_ns: int
+    recipe_sha256: str
+    output: str  # relative to the manifest's directory
+    output_sha256: str
+    output_size: int
+
+
+@dataclass
+class ManifestCheck:
+    """Entries found wrong by ``Manifest.verify``, by input path."""
+    missing: List[str]   # the output is gone
+    modified: List[str]  # the output no longer has the recorded contents
+    stale: List[str]     # the input changed since its output was made
+    orphaned: List[str]  # the input is gone
+
+    @property
+    def ok(self) -> bool:
+        return not (self.missing or self.modified or self.stale or self.orphaned)
+
+
+class Manifest:
+    """Record of a batch output directory: which input, under which recipe, made each output.
+
+    Entries are keyed on the input's absolute path. An input whose size and modification
+    time match its entry keeps the recorded hash without being read again, so checking an
+    unchanged archive costs one ``stat`` per file. ``find`` then looks the (input hash,
+    recipe hash) pair up across all entries, so a renamed or copied input reuses the
+    output made for the same contents. An output belongs to one entry at a time: recording
+    an input whose output overwrote another input's drops that input's entry. The file is
+    replaced atomically by ``save``; an unreadable manifest counts as empty and everything
+    is made again.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_NAME)
+        self.entries: Dict[str, ManifestEntry] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.entries = {path: ManifestEntry(**entry) for path, entry in data.get("entries", {}).items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            self.entries = {}
+        # Size and modification time of each input when it was hashed, for ``record``.
+        self._hashed: Dict[str, Tuple[int, int]] = {}
+        # Input paths by (input hash, recipe hash), so lookups do not scan every entry.
+        self._by_content: Dict[Tuple[str, str], Set[str]] = {}
+        # The input path of each output, so an overwritten output drops its old entry.
+        self._by_output: Dict[str, str] = {}
+        for path, entry in list(self.entries.items()):
+            self._index(path, entry)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def output_path(self, entry: ManifestEntry) -> str:
+        return os.path.join(self.directory, entry.output)
+
+    def input_digest(self, input_path: str) -> str:
+        """Hash of ``input_path``, taken from its entry if the file's size and modification time still match."""
+        stat = os.stat(input_path)
+        path = os.path.abspath(input_path)
+        # Taken before reading, so a file that changes while it is hashed is hashed again next time.
+        self._hashed[path] = (stat.st_size, stat.st_mtime_ns)
+        entry = self.entries.get(path)
+        if entry is not None and (entry.input_size, entry.input_mtime_ns) == self._hashed[path]:
+            return entry.input_sha256
+        return file_digest(input_path)
+
+    def find(self, input_sha256: str, recipe_sha256: str) -> Optional[str]:
+        """An existing output made from these input contents with this recipe, or ``None``.
+
+        Only the output's size is checked, not its contents; ``verify`` does that.
+        """
+        for path in sorted(self._by_content.get((input_sha256, recipe_sha256), ())):
+            entry = self.entries[path]
+            try:
+                if os.path.getsize(self.output_path(entry)) == entry.output_size:
+                    return self.output_path(entry)
+            except OSError:
+                continue
+        return None
+
+    def reuse(self, input_path: str, input_sha256: str, recipe_sha256: str, output_path: str) -> bool:
+        """Makes ``output_path`` from an earlier output for the same input and recipe, if there is one.
+
+        Returns whether it did; the output is copied if it was made for another path.
+        """
+        found = self.find(input_sha256, recipe_sha256)
+        if found is None:
+            return False
+        if os.path.abspath(found) != os.path.abspath(output_path):
+            shutil.copyfile(found, output_path)
+        self.record(input_path, input_sha256, recipe_sha256, output_path)
+        return True
+
+    def record(self, input_path: str, input_sha256: str, recipe_sha256: str, output_path: str) -> None:
+        """Adds or replaces the entry of ``input_path`` after ``output_path`` was written.
+
+        The input's size and modification time are the ones seen by ``input_digest``.
+        """
+        path = os.path.abspath(input_path)
+        if path in self._hashed:
+            size, mtime_ns = self._hashed[path]
+        else:
+            stat = os.stat(input_path)
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        self._forget(path)
+        entry = ManifestEntry(input_sha256, size, mtime_ns, recipe_sha256, os.path.relpath(output_path, self.directory),
+                              file_digest(output_path), os.path.getsize(output_path))
+        self._index(path, entry)
+
+    def _index(self, path: str, entry: ManifestEntry) -> None:
+        """Adds ``entry`` under ``path``; an entry of another input with the same output was overwritten."""
+        previous = self._by_output.get(entry.output)
+        if previous is not None and previous != path:
+            self._forget(previous)
+        self.entries[path] = entry
+        self._by_output[entry.output] = path
+        self._by_content.setdefault((entry.input_sha256, entry.recipe_sha256), set()).add(path)
+
+    def _forget(self, path: str) -> Optional[ManifestEntry]:
+        entry = self.entries.pop(path, None)
+        if entry is not None:
+            self._by_content[(entry.input_sha256, entry.recipe_sha256)].discard(path)
+            if self._by_output.get(entry.output) == path:
+                del self._by_output[entry.output]
+        return entry
+
+    def save(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        data = {"version": 1, "entries": {path: asdict(entry) for path, entry in sorted(self.entries.items())}}
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".writing-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def verify(self) -> ManifestCheck:
+        """Hashes every recorded output and every input still present, and reports the mismatches."""
+        check = ManifestCheck([], [], [], [])
+        for input_path, entry in sorted(self.entries.items()):
+            output_path = self.output_path(entry)
+            if not os.path.isfile(output_path):
+                check.missing.append(input_path)
+            elif file_digest(output_path) != entry.output_sha256:
+                check.modified.append(input_path)
+            if not os.path.isfile(input_path):
+                check.orphaned.append(input_path)
+            elif file_digest(input_path) != entry.input_sha256:
+                check.stale.append(input_path)
+        return check
+
+    def prune(self) -> Tuple[int, int, int]:
+        """Drops the entries whose input or output is gone, and deletes the outputs of gone inputs.
+
+        An output is only deleted while it still has the recorded contents, and not while
+        another entry uses it. Returns the entries dropped, the files deleted and their bytes.
+        """
+        dropped = [path for path, entry in self.entries.items()
+                   if not os.path.isfile(path) or not os.path.isfile(self.output_path(entry))]
+        removed = [self._forget(path) for path in dropped]
+        in_use = {entry.output for entry in self.entries.values()}
+        deleted = freed = 0
+        for entry in removed:
+            output_path = self.output_path(entry)
+            if entry.output in in_use or not os.path.isfile(output_path):
+                continue
+            if file_digest(output_path) == entry.output_sha256:
+                os.remove(output_path)
+                deleted += 1
+                freed += entry.output_size
+        return len(dropped), deleted, freed
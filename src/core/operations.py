@@ -0,0 +1,225 @@
+import json
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from src.core.image_processor import ImageProcessor
+
+EFFECTS = ("blur", "pixelate", "crop")
+
+Box = Tuple[int, int, int, int]
+
+
+@dataclass(frozen=True)
+class Operation:
+    """A single edit: an effect, the region it applies to and its parameter."""
+    effect: str
+    region: Box
+    radius: Optional[float] = None
+    pixel_size: Optional[int] = None
+    aligned: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"op": self.effect, "region": list(self.region)}
+        if self.radius is not None:
+            data["radius"] = self.radius
+        if self.pixel_size is not None:
+            data["pixel_size"] = self.pixel_size
+        if self.aligned:
+            data["aligned"] = True
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Operation":
+        effect = data.get("op")
+        if effect not in EFFECTS:
+            raise ValueError(f"Unknown operation {effect!r}, expected one of {', '.join(EFFECTS)}")
+        region = data.get("region")
+        if not isinstance(region, (list, tuple)) or len(region) != 4:
+            raise ValueError(f"Operation {effect!r} needs a region of four integers, got {region!r}")
+        region = tuple(int(v) for v in region)
+        if effect == "blur":
+            if "radius" not in data:
+                raise ValueError("Blur operation needs a 'radius'")
+            return cls(effect, region, radius=float(data["radius"]))  # type: ignore
+        if effect == "pixelate":
+            if "pixel_size" not in data:
+                raise ValueError("Pixelate operation needs a 'pixel_size'")
+            return cls(effect, region, pixel_size=int(data["pixel_size"]),  # type: ignore
+                       aligned=bool(data.get("aligned", False)))
+        return cls(effect, region)  # type: ignore
+
+
+def apply_operation(processor: "ImageProcessor", operation: Operation) -> bool:
+    """Applies one operation to the processor's current image."""
+    if operation.effect == "blur":
+        return processor.apply_blur(operation.region, operation.radius)  # type: ignore
+    if operation.effect == "pixelate":
+        return processor.pixelate_region(operation.region, operation.pixel_size, operation.aligned)  # type: ignore
+    if operation.effect == "crop":
+        return processor.apply_crop(operation.region)
+    raise ValueError(f"Unknown operation {operation.effect!r}")
+
+
+def apply_operations(processor: "ImageProcessor", operations: List[Operation]) -> bool:
+    """Applies operations in order, each to the result of the ones before it.
+
+    Where regions overlap, edits stack: a blur over a pixelation blurs the pixelated
+    pixels. A deferred ImageProcessor (and ``replay``) renders every edit from the pixels
+    as they were before rendering instead, so the latest edit wins where regions
+    overlap. The two only give the same pixels when no region overlaps another or the
+    context a blur reads around its region.
+    """
+    for operation in operations:
+        apply_operation(processor, operation)
+    return True
+
+
+def operations_to_json(operations: List[Operation]) -> str:
+    """Serializes operations as a recipe document.
+
+    Batch runs apply a recipe with ``apply_operations``, where overlapping edits stack;
+    the GUI renders with the latest edit winning, so a recipe with overlapping regions
+    replays to the same pixels through ``ImageProcessor.replay`` but not through batch.
+    """
+    return json.dumps({"operations": [operation.to_dict() for operation in operations]}, indent=2)
+
+
+def operations_from_json(text: str) -> List[Operation]:
+    """Parses a recipe document: ``{"operations": [...]}`` or a bare list of operations."""
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get("operations")
+    if not isinstance(data, list):
+        raise ValueError("Recipe must be a list of operations or an object with an 'operations' list")
+    return [Operation.from_dict(item) for item in data]
+
+
+def load_recipe(path: str) -> List[Operation]:
+    """Reads a JSON recipe file."""
+    with open(path, "r", encoding="utf-8") as f:
+        return operations_from_json(f.read())
+
+
+def frame_operations_from_json(text: str) -> Dict[int, List[Operation]]:
+    """Parses the per-frame operations of a recipe: ``{"frames": {"3": [...]}}`` maps
+    frame indexes to operations applied to that frame of a multi-frame image only."""
+    data = json.loads(text)
+    frames = data.get("frames", {}) if isinstance(data, dict) else {}
+    if not isinstance(frames, dict):
+        raise ValueError("Recipe 'frames' must map frame indexes to lists of operations")
+    operations = {}
+    for index, items in frames.items():
+        if not isinstance(items, list):
+            raise ValueError(f"Operations of frame {index} must be a list")
+        try:
+            operations[int(index)] = [Operation.from_dict(item) for item in items]
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid operations for frame {index!r}: {e}")
+    return operations
+
+
+def load_frame_operations(path: str) -> Dict[int, List[Operation]]:
+    """Reads the per-frame operations of a JSON recipe file."""
+    with open(path, "r", encoding="utf-8") as f:
+        return frame_operations_from_json(f.read())
+
+
+@dataclass
+class RenderPass:
+    """One effect computed over ``operation.region`` and pasted only into ``paint`` boxes."""
+    operation: Operation
+    paint: List[Box] = field(default_factory=list)
+
+
+def _area(box: Box) -> int:
+    return max(0, box[2] - box[0]) * max(0, box[3] - box[1])
+
+
+def _intersects(a: Box, b: Box) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _bounding_box(boxes: List[Box]) -> Box:
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+
+def _subtract(box: Box, cutter: Box) -> List[Box]:
+    """The parts of ``box`` outside ``cutter``, as up to four disjoint boxes."""
+    if not _intersects(box, cutter):
+        return [box]
+    left, upper, right, lower = box
+    parts = []
+    if cutter[1] > upper:
+        parts.append((left, upper, right, cutter[1]))
+    if cutter[3] < lower:
+        parts.append((left, cutter[3], right, lower))
+    middle_upper, middle_lower = max(upper, cutter[1]), min(lower, cutter[3])
+    if cutter[0] > left:
+        parts.append((left, middle_upper, cutter[0], middle_lower))
+    if cutter[2] < right:
+        parts.append((cutter[2], middle_upper, right, middle_lower))
+    return parts
+
+
+def visible_parts(region: Box, later: List[Box]) -> List[Box]:
+    """The parts of ``region`` not covered by any box in ``later``."""
+    parts = [region]
+    for cutter in later:
+        parts = [piece for part in parts for piece in _subtract(part, cutter)]
+        if not parts:
+            break
+    return parts
+
+
+def plan_operations(operations: List[Operation],
+                    halo: Optional[Callable[[Operation], int]] = None) -> List[RenderPass]:
+    """Turns a list of non-destructive region edits into a minimal set of render passes.
+
+    Deferred edits do not stack: every effect reads the pixels as they were before
+    rendering and, where regions overlap, the latest edit wins. That makes three
+    optimisations exact:
+
+    - edits fully covered by later edits are dropped,
+    - each remaining edit only paints its still-visible parts,
+    - blurs with the same radius whose halo-padded regions overlap (``halo`` gives the
+      context an operation reads around its region) are fused into one pass over their
+      bounding box, as long as that box is not much larger than the regions themselves.
+
+    Crops change the coordinate system and are not accepted here; split on them first.
+    """
+    visible: List[Tuple[Operation, List[Box]]] = []
+    for index, operation in enumerate(operations):
+        if operation.effect == "crop":
+            raise ValueError("plan_operations does not accept crop operations")
+        parts = visible_parts(operation.region, [later.region for later in operations[index + 1:]])
+        if parts:
+            visible.append((operation, parts))
+
+    passes: List[RenderPass] = []
+    for operation, parts in visible:
+        if operation.effect == "blur":
+            fused = _fuse_into(passes, operation, parts, halo(operation) if halo else 0)
+            if fused:
+                continue
+        passes.append(RenderPass(operation, list(parts)))
+    return passes
+
+
+def _fuse_into(passes: List[RenderPass], operation: Operation, parts: List[Box], halo: int) -> bool:
+    """Merges a blur into an existing pass with the same radius if their regions are close enough."""
+    left, upper, right, lower = operation.region
+    reach = (left - halo, upper - halo, right + halo, lower + halo)
+    for render_pass in passes:
+        existing = render_pass.operation
+        if existing.effect != "blur" or existing.radius != operation.radius:
+            continue
+        if not _intersects(reach, existing.region):
+            continue
+        merged = _bounding_box([existing.region, operation.region])
+        if _area(merged) > 2 * (_area(existing.region) + _area(operation.region)):
+            continue
+        render_pass.operation = Operation("blur", merged, radius=operation.radius)
+        render_pass.paint.extend(parts)
+        return True
+    return False
@@ -0,0 +1,145 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import PIL.Image
+
+from src.core.blur import get_engine
+from src.core.operations import Box
+from src.core.pixelate import pixelate_image
+
+# Regions with fewer pixels are processed in-process: below this the copy into shared
+# memory and the round trip to the workers cost more than the blur itself.
+MIN_PARALLEL_PIXELS = 1 << 20
+
+# Bands are at least this many rows, and at least the halo, so the overlap that two
+# neighbouring bands both read stays a small part of each.
+MIN_BAND_ROWS = 64
+
+# Modes whose raw bytes are one byte per band, as ``tobytes`` and ``frombytes`` use them.
+SHARED_MODES = ("L", "LA", "RGB", "RGBA", "RGBX", "CMYK")
+
+
+@dataclass(frozen=True)
+class TileEffect:
+    """A blur or pixelate effect as a small value that is sent to the workers instead of pixels."""
+    effect: str  # "blur" or "pixelate"
+    amount: float  # blur radius or pixel size
+    engine: str = "pillow"  # blur engine name, see src.core.blur
+    offset: Tuple[int, int] = (0, 0)  # pixelate grid offset of the region's top left corner
+
+    def halo(self) -> int:
+        return get_engine(self.engine).halo(self.amount) if self.effect == "blur" else 0
+
+    def apply(self, image: PIL.Image.Image, top: int) -> PIL.Image.Image:
+        """Processes a band crop whose first row is ``top`` rows below the top of the region."""
+        if self.effect == "blur":
+            return get_engine(self.engine).blur(image, self.amount)
+        return pixelate_image(image, int(self.amount), (self.offset[0], self.offset[1] + top))
+
+
+def band_edges(height: int, bands: int, effect: TileEffect) -> List[int]:
+    """Row edges, relative to the region, that split ``height`` rows into at most ``bands`` bands.
+
+    Pixelate bands start on grid lines, so no cell is split between two workers.
+    """
+    rows = max(math.ceil(height / bands), MIN_BAND_ROWS, effect.halo())
+    first = 0
+    if effect.effect == "pixelate":
+        block = int(effect.amount)
+        rows = math.ceil(rows / block) * block
+        first = (-effect.offset[1]) % block
+    return [0] + [edge for edge in range(first + rows, height, rows)] + [height]
+
+
+def _process_band(source_name: str, target_name: str, mode: str, source_size: Tuple[int, int],
+                  read: Tuple[int, int], inner: Box, top: int, effect: TileEffect) -> None:
+    """Worker: processes source rows ``read`` and writes the ``inner`` part to the target rows from ``top``.
+
+    Both buffers are attached by name; the band is the only pixel data this process copies.
+    """
+    source = shared_memory.SharedMemory(source_name)
+    target = shared_memory.SharedMemory(target_name)
+    try:
+        row_bytes = source_size[0] * len(mode)
+        band = PIL.Image.frombytes(mode, (source_size[0], read[1] - read[0]),
+                                   source.buf[read[0] * row_bytes:read[1] * row_bytes])
+        data = effect.apply(band, top - inner[1]).crop(inner).tobytes()
+        start = top * (inner[2] - inner[0]) * len(mode)
+        target.buf[start:start + len(data)] = data
+    finally:
+        source.close()
+        target.close()
+
+
+class TilePool:
+    """Runs blur and pixelate effects on large regions across a pool of worker processes.
+
+    The halo-padded crop of the region is copied once into shared memory and split into
+    horizontal bands, each read with the effect's halo of rows above and below it. Workers
+    get only the names of the buffers and the coordinates of their band, and write the
+    band's own rows straight into a shared output buffer. As the halo covers everything
+    the effect reads, the result is the same as processing the whole crop in one go.
+    """
+
+    def __init__(self, workers: Optional[int] = None, min_pixels: int = MIN_PARALLEL_PIXELS):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_pixels = min_pixels
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def accepts(self, region: Box, mode: str) -> bool:
+        """Whether ``region`` is large enough to be worth splitting."""
+        area = (region[2] - region[0]) * (region[3] - region[1])
+        return area >= self.min_pixels and mode in SHARED_MODES
+
+    def process(self, image: PIL.Image.Image, region: Box, effect: TileEffect) -> PIL.Image.Image:
+        """Returns the processed pixels of ``region`` of ``image``, which may also be a TiledImage."""
+        halo = effect.halo()
+        left, upper, right, lower = region
+        width, height = image.size
+        padded = (max(0, left - halo), max(0, upper - halo), min(width, right + halo), min(height, lower + halo))
+        source_size = (padded[2] - padded[0], padded[3] - padded[1])
+        size = (right - left, lower - upper)
+        mode = image.mode
+        edges = band_edges(size[1], self.workers, effect)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        target_bytes = size[0] * size[1] * len(mode)
+        source = shared_memory.SharedMemory(create=True, size=source_size[0] * source_size[1] * len(mode))
+        try:
+            target = shared_memory.SharedMemory(create=True, size=target_bytes)
+            try:
+                pixels = image.crop(padded).tobytes()
+                source.buf[:len(pixels)] = pixels
+                del pixels
+                offset_x, offset_y = left - padded[0], upper - padded[1]
+                futures = []
+                for top, bottom in zip(edges, edges[1:]):
+                    read = (max(0, offset_y + top - halo), min(source_size[1], offset_y + bottom + halo))
+                    inner = (offset_x, offset_y + top - read[0], offset_x + size[0], offset_y + bottom - read[0])
+                    futures.append(self._executor.submit(_process_band, source.name, target.name, mode,
+                                                         source_size, read, inner, top, effect))
+                for future in futures:
+                    future.result()
+                return PIL.Image.frombytes(mode, size, target.buf[:target_bytes])
+            finally:
+                target.close()
+                target.unlink()
+        finally:
+            source.close()
+            source.unlink()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "TilePool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
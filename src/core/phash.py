@@ -0,0 +1,222 @@
+import itertools
+import json
+import math
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import PIL.Image
+
+from src.core.codecs import open_file
+from src.core.operations import Operation
+
+# Hashes farther apart than this many of their 64 bits are not near-duplicates.
+DEFAULT_MAX_DISTANCE = 6
+
+HASH_SIZE = 8  # a hash is HASH_SIZE * HASH_SIZE bits
+
+
+def default_index_path() -> str:
+    """``$BLURRIFY_INDEX``, or ``recipes.jsonl`` in the user's data directory."""
+    if os.environ.get("BLURRIFY_INDEX"):
+        return os.environ["BLURRIFY_INDEX"]
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "blurrify", "recipes.jsonl")
+
+
+def _grey(image: PIL.Image.Image, size: Tuple[int, int]) -> List[int]:
+    """``image`` averaged down to ``size`` in greyscale, as a flat list of pixels."""
+    if image.mode not in ("L", "RGB"):
+        image = image.convert("RGB")
+    # Box averaging reads every pixel once, whatever the image size, and does not alias.
+    return list(image.resize(size, PIL.Image.Resampling.BOX).convert("L").tobytes())
+
+
+def average_hash(image: PIL.Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """aHash: one bit per cell of a ``hash_size`` grid, set where the cell is brighter than the mean."""
+    pixels = _grey(image, (hash_size, hash_size))
+    mean = sum(pixels) / len(pixels)
+    return sum(1 << index for index, value in enumerate(pixels) if value > mean)
+
+
+def difference_hash(image: PIL.Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """dHash: one bit per cell of a ``hash_size`` grid, set where the cell is brighter than its right neighbour."""
+    pixels = _grey(image, (hash_size + 1, hash_size))
+    bits = 0
+    for row in range(hash_size):
+        line = pixels[row * (hash_size + 1):(row + 1) * (hash_size + 1)]
+        for column in range(hash_size):
+            if line[column] > line[column + 1]:
+                bits |= 1 << (row * hash_size + column)
+    return bits
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def fingerprint(path: str) -> Tuple[int, Tuple[int, int]]:
+    """dHash and size of an image file. JPEGs are decoded at a reduced scale, which is enough for the hash."""
+    with open_file(path) as image:
+        size = image.size
+        image.draft("RGB", (HASH_SIZE * 16, HASH_SIZE * 16))
+        return difference_hash(image), size
+
+
+class MultiIndexHash:
+    """64-bit hashes searchable by Hamming distance, by multi-index hashing.
+
+    Each hash is split into ``chunks`` substrings, each with its own table from the
+    substring's value to the hashes that have it. Two hashes at most ``r`` bits apart
+    differ by at most ``r // chunks`` bits in at least one substring, so a search only
+    looks up the values within that distance of each query substring and compares
+    the full hashes found there. With 16-bit substrings and a few hundred thousand
+    hashes a lookup compares a few hundred of them instead of all.
+    """
+
+    def __init__(self, chunks: int = 4):
+        self.chunks = chunks
+        self._bits = HASH_SIZE * HASH_SIZE // chunks
+        self._mask = (1 << self._bits) - 1
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(chunks)]
+        self._entries: List[Tuple[int, Any]] = []
+        self._flips: Dict[int, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Tuple[int, Any]]:
+        return iter(self._entries)
+
+    def add(self, key: int, value: Any) -> None:
+        number = len(self._entries)
+        self._entries.append((key, value))
+        for chunk, table in enumerate(self._tables):
+            table.setdefault((key >> (chunk * self._bits)) & self._mask, []).append(number)
+
+    def _masks(self, distance: int) -> List[int]:
+        """Every substring mask with at most ``distance`` bits set."""
+        if distance not in self._flips:
+            self._flips[distance] = [sum(1 << bit for bit in bits) for count in range(distance + 1)
+                                     for bits in itertools.combinations(range(self._bits), count)]
+        return self._flips[distance]
+
+    def search(self, key: int, max_distance: int) -> List[Tuple[int, Any]]:
+        """(distance, value) of every value whose hash is within ``max_distance`` of ``key``, nearest first."""
+        masks = self._masks(max_distance // self.chunks)
+        seen: Set[int] = set()
+        found = []
+        for chunk, table in enumerate(self._tables):
+            part = (key >> (chunk * self._bits)) & self._mask
+            for mask in masks:
+                for number in table.get(part ^ mask, ()):
+                    if number in seen:
+                        continue
+                    seen.add(number)
+                    other, value = self._entries[number]
+                    distance = hamming(key, other)
+                    if distance <= max_distance:
+                        found.append((distance, value))
+        found.sort(key=lambda item: item[0])
+        return found
+
+
+def scale_operations(operations: List[Operation], source: Tuple[int, int],
+                     target: Tuple[int, int]) -> List[Operation]:
+    """``operations`` recorded on an image of size ``source``, with regions moved to one of size ``target``.
+
+    Regions grow outward to whole pixels, so a scaled redaction never uncovers anything.
+    Radii and pixel sizes are kept.
+    """
+    if source == target:
+        return list(operations)
+    sx, sy = target[0] / source[0], target[1] / source[1]
+    scaled = []
+    for operation in operations:
+        left, upper, right, lower = operation.region
+        region = (math.floor(left * sx), math.floor(upper * sy),
+                  min(math.ceil(right * sx), target[0]), min(math.ceil(lower * sy), target[1]))
+        scaled.append(Operation(operation.effect, region, radius=operation.radius,
+                                pixel_size=operation.pixel_size, aligned=operation.aligned))
+    return scaled
+
+
+def merge_operations(operations: List[Operation], reused: List[Operation]) -> List[Operation]:
+    """``operations`` with the regions of a near-duplicate's ``reused`` operations applied first.
+
+    The recipe's own operations are always kept, so a region added to a recipe is never
+    lost on an image that matched one indexed with an older version. Reused operations
+    are in the uncropped image's coordinates, so they stop at their first crop, and ones
+    the recipe already starts with are not applied twice.
+    """
+    own = operations[:next((index for index, op in enumerate(operations) if op.effect == "crop"), len(operations))]
+    extra = []
+    for operation in reused:
+        if operation.effect == "crop":
+            break
+        if operation not in own and operation not in extra:
+            extra.append(operation)
+    return extra + list(operations)
+
+
+@dataclass
+class IndexEntry:
+    """The operations applied to one processed image, with its perceptual hash and size."""
+    hash: int
+    size: Tuple[int, int]
+    operations: List[Operation]
+    source: str
+
+    def operations_for(self, size: Tuple[int, int]) -> List[Operation]:
+        """The operations to apply to a near-duplicate of size ``size``."""
+        return scale_operations(self.operations, self.size, size)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"hash": f"{self.hash:016x}", "size": list(self.size), "source": self.source,
+                "operations": [operation.to_dict() for operation in self.operations]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IndexEntry":
+        width, height = data["size"]
+        return cls(int(data["hash"], 16), (int(width), int(height)),
+                   [Operation.from_dict(item) for item in data["operations"]], str(data.get("source", "")))
+
+
+class RecipeIndex:
+    """Processed images by perceptual hash, so near-duplicates can reuse their regions.
+
+    Entries live in a JSON-lines file that ``add`` appends to, so adding is cheap and
+    several processes can add to the same file; lines that cannot be read are skipped.
+    Lookups go through a MultiIndexHash of the dHashes.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.path = path or default_index_path()
+        self.max_distance = max_distance
+        self._hashes = MultiIndexHash()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = IndexEntry.from_dict(json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    self._hashes.add(entry.hash, entry)
+        except OSError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def match(self, key: int) -> Optional[Tuple[int, IndexEntry]]:
+        """The nearest entry within ``max_distance`` of ``key`` and its distance, or ``None``."""
+        found = self._hashes.search(key, self.max_distance)
+        return found[0] if found else None
+
+    def add(self, entry: IndexEntry) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry.to_dict()) + "\n")
+        self._hashes.add(entry.hash, entry)
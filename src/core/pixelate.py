@@ -0,0 +1,105 @@
+from typing import List, Tuple
+
+import numpy as np
+import PIL.Image
+
+# Modes stored as 8-bit channels, whose values can be averaged directly.
+AVERAGED_MODES = ("L", "LA", "RGB", "RGBA", "RGBX", "CMYK", "YCbCr", "LAB", "HSV")
+
+# Images are converted to arrays in bands of about this many bytes, which keeps the
+# buffers reusable and in cache instead of faulting in a fresh copy of a large image.
+BAND_BYTES = 1 << 20
+
+
+def _grid(length: int, block: int, offset: int) -> Tuple[int, int, List[int]]:
+    """Splits ``length`` pixels into cells whose edges fall where ``(index + offset) % block == 0``.
+
+    Returns the size of the leading partial cell (0 if the grid starts on a cell edge),
+    the number of full cells and the sizes of all cells in order.
+    """
+    first = min((-offset) % block, length)
+    full = (length - first) // block
+    last = length - first - full * block
+    sizes = ([first] if first else []) + [block] * full + ([last] if last else [])
+    return first, full, sizes
+
+
+def _sum_rows(pixels: np.ndarray, block: int, first: int, full: int) -> np.ndarray:
+    """Sums the rows of every grid cell row; full cells through a reshape of the array view."""
+    dtype = np.uint16 if block * 255 <= 0xFFFF else np.uint32
+    end = first + full * block
+    parts = []
+    if first:
+        parts.append(pixels[:first].sum(axis=0, keepdims=True, dtype=dtype))
+    if full:
+        parts.append(pixels[first:end].reshape((full, block) + pixels.shape[1:]).sum(axis=1, dtype=dtype))
+    if end < pixels.shape[0]:
+        parts.append(pixels[end:].sum(axis=0, keepdims=True, dtype=dtype))
+    return parts[0] if len(parts) == 1 else np.concatenate(parts, axis=0)
+
+
+def _sum_columns(rows: np.ndarray, block: int, first: int, full: int) -> np.ndarray:
+    """Sums the columns of every grid cell; full cells by adding ``block`` strided views."""
+    end = first + full * block
+    parts = []
+    if first:
+        parts.append(rows[:, :first].sum(axis=1, keepdims=True, dtype=np.uint32))
+    if full:
+        core = rows[:, first:end]
+        sums = core[:, 0::block].astype(np.uint32)
+        for index in range(1, block):
+            np.add(sums, core[:, index::block], out=sums)
+        parts.append(sums)
+    if end < rows.shape[1]:
+        parts.append(rows[:, end:].sum(axis=1, keepdims=True, dtype=np.uint32))
+    return parts[0] if len(parts) == 1 else np.concatenate(parts, axis=1)
+
+
+def block_means(pixels: np.ndarray, block: int, offset: Tuple[int, int] = (0, 0)) -> np.ndarray:
+    """The mean of every ``block`` x ``block`` grid cell of an (H, W) or (H, W, C) uint8 array.
+
+    ``offset`` is the (x, y) position of the array in the image; grid lines fall on
+    multiples of ``block`` in image coordinates, so (0, 0) anchors the grid to the
+    array itself. Cells cut by the array edges are averaged over the pixels they hold.
+    """
+    first_row, full_rows, row_sizes = _grid(pixels.shape[0], block, offset[1])
+    first_column, full_columns, column_sizes = _grid(pixels.shape[1], block, offset[0])
+    rows = _sum_rows(pixels, block, first_row, full_rows)
+    sums = _sum_columns(rows, block, first_column, full_columns)
+    counts = np.outer(row_sizes, column_sizes).astype(np.uint32)
+    if pixels.ndim == 3:
+        counts = counts[..., np.newaxis]
+    return ((sums + counts // 2) // counts).astype(np.uint8)
+
+
+def pixelate_array(pixels: np.ndarray, block: int, offset: Tuple[int, int] = (0, 0)) -> np.ndarray:
+    """Replaces every grid cell of ``pixels`` by its mean; see ``block_means``."""
+    means = block_means(pixels, block, offset)
+    row_sizes = _grid(pixels.shape[0], block, offset[1])[2]
+    column_sizes = _grid(pixels.shape[1], block, offset[0])[2]
+    return np.repeat(np.repeat(means, row_sizes, axis=0), column_sizes, axis=1)
+
+
+def pixelate_image(image: PIL.Image.Image, pixel_size: int, offset: Tuple[int, int] = (0, 0)) -> PIL.Image.Image:
+    """Pixelates a whole image into ``pixel_size`` blocks holding the average of their pixels.
+
+    See ``block_means`` for the meaning of ``offset``. The means are computed band by
+    band and scaled back up with a nearest-neighbour resize whose source box starts
+    inside the first cell, which reproduces ragged edge cells exactly. Images in other
+    modes than AVERAGED_MODES, such as palette images, are converted to RGBA and back.
+    """
+    if image.mode not in AVERAGED_MODES:
+        return pixelate_image(image.convert("RGBA"), pixel_size, offset).convert(image.mode)
+    width, height = image.size
+    row_bytes = width * len(image.getbands())
+    band_rows = max(1, BAND_BYTES // (row_bytes * pixel_size)) * pixel_size
+    first = min((-offset[1]) % pixel_size, height)
+    edges = sorted({0, first, height} | set(range(first, height, band_rows)))
+    bands = []
+    for upper, lower in zip(edges, edges[1:]):
+        band = np.asarray(image.crop((0, upper, width, lower)))
+        bands.append(block_means(band, pixel_size, (offset[0], offset[1] + upper)))
+    means = PIL.Image.fromarray(bands[0] if len(bands) == 1 else np.concatenate(bands), image.mode)
+    x, y = offset[0] % pixel_size, offset[1] % pixel_size
+    box = (x / pixel_size, y / pixel_size, (x + width) / pixel_size, (y + height) / pixel_size)
+    return means.resize((width, height), PIL.Image.Resampling.NEAREST, box=box)
@@ -0,0 +1,133 @@
+import struct
+import zlib
+from typing import BinaryIO, Tuple
+
+import numpy as np
+import PIL.Image
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_COLOR_TYPES = {"L": (0, 1), "RGB": (2, 3), "RGBA": (6, 4)}
+_IDAT_CHUNK_BYTES = 256 * 1024
+
+
+def write_chunk(fp: BinaryIO, chunk_type: bytes, data: bytes) -> None:
+    """Writes one PNG chunk with its length and CRC."""
+    fp.write(struct.pack(">I", len(data)))
+    fp.write(chunk_type)
+    fp.write(data)
+    fp.write(struct.pack(">I", zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+
+
+def filter_up(rows: np.ndarray, previous_row: np.ndarray) -> np.ndarray:
+    """``rows`` of bytes with the PNG "Up" filter applied, each prefixed with its filter type."""
+    filtered = np.empty((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+    filtered[:, 0] = 2  # Up filter
+    filtered[0, 1:] = rows[0] - previous_row
+    filtered[1:, 1:] = rows[1:] - rows[:-1]
+    return filtered
+
+
+class PngWriter:
+    """Encodes a PNG from horizontal bands so the full image never has to be in memory.
+
+    Rows use the PNG "Up" filter and are fed through a single zlib stream, which is
+    flushed into IDAT chunks as it grows.
+    """
+
+    def __init__(self, fp: BinaryIO, size: Tuple[int, int], mode: str = "RGBA", compress_level: int = 6):
+        if mode not in _COLOR_TYPES:
+            raise ValueError(f"Unsupported PNG mode {mode}")
+        self._fp = fp
+        self.size = size
+        self.mode = mode
+        self._channels = _COLOR_TYPES[mode][1]
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = bytearray()
+        self._previous_row = np.zeros(size[0] * self._channels, dtype=np.uint8)
+        self._rows_written = 0
+
+        fp.write(PNG_SIGNATURE)
+        write_chunk(fp, b"IHDR", struct.pack(">IIBBBBB", size[0], size[1], 8, _COLOR_TYPES[mode][0], 0, 0, 0))
+
+    def write(self, band: PIL.Image.Image) -> None:
+        """Appends the rows of ``band``, which must be as wide as the image."""
+        if band.size[0] != self.size[0]:
+            raise ValueError(f"Band width {band.size[0]} does not match image width {self.size[0]}")
+        if band.mode != self.mode:
+            band = band.convert(self.mode)
+        rows = np.asarray(band, dtype=np.uint8).reshape(band.size[1], -1)
+        filtered = filter_up(rows, self._previous_row)
+        self._previous_row = rows[-1].copy()
+        self._rows_written += rows.shape[0]
+
+        self._pending += self._compressor.compress(filtered.tobytes())
+        if len(self._pending) >= _IDAT_CHUNK_BYTES:
+            write_chunk(self._fp, b"IDAT", bytes(self._pending))
+            self._pending.clear()
+
+    def close(self) -> None:
+        """Flushes the remaining data and writes the end chunk."""
+        if self._rows_written != self.size[1]:
+            raise ValueError(f"Wrote {self._rows_written} rows, expected {self.size[1]}")
+        self._pending += self._compressor.flush()
+        write_chunk(self._fp, b"IDAT", bytes(self._pending))
+        self._pending.clear()
+        write_chunk(self._fp, b"IEND", b"")
+
+
+class ApngWriter:
+    """Encodes an animated PNG one full frame at a time.
+
+    The frame count is stored before the first frame, so it has to be known up front.
+    Every frame covers the whole canvas and replaces it (APNG blend op "source"), which
+    makes the dispose op of each frame harmless to keep as it was in the source.
+    """
+
+    def __init__(self, fp: BinaryIO, size: Tuple[int, int], num_frames: int, loop: int = 0,
+                 mode: str = "RGBA", compress_level: int = 6):
+        if mode not in _COLOR_TYPES:
+            raise ValueError(f"Unsupported PNG mode {mode}")
+        self._fp = fp
+        self.size = size
+        self.mode = mode
+        self.num_frames = num_frames
+        self._compress_level = compress_level
+        self._sequence = 0
+        self._frames_written = 0
+
+        fp.write(PNG_SIGNATURE)
+        write_chunk(fp, b"IHDR", struct.pack(">IIBBBBB", size[0], size[1], 8, _COLOR_TYPES[mode][0], 0, 0, 0))
+        write_chunk(fp, b"acTL", struct.pack(">II", num_frames, loop))
+
+    def write_frame(self, frame: PIL.Image.Image, duration: float = 0.0, dispose: int = 0) -> None:
+        """Appends ``frame``, shown for ``duration`` milliseconds; ``dispose`` is the APNG dispose op."""
+        if frame.size != self.size:
+            raise ValueError(f"Frame size {frame.size} does not match image size {self.size}")
+        if self._frames_written == self.num_frames:
+            raise ValueError(f"All {self.num_frames} frames were already written")
+        if frame.mode != self.mode:
+            frame = frame.convert(self.mode)
+        delay, denominator = round(duration), 1000
+        if delay > 0xFFFF:
+            delay, denominator = min(round(duration / 10), 0xFFFF), 100
+        write_chunk(self._fp, b"fcTL", struct.pack(">IIIIIHHBB", self._sequence, self.size[0], self.size[1],
+                                                   0, 0, delay, denominator, dispose, 0))
+        self._sequence += 1
+
+        rows = np.asarray(frame, dtype=np.uint8).reshape(frame.size[1], -1)
+        data = zlib.compress(filter_up(rows, np.zeros(rows.shape[1], dtype=np.uint8)).tobytes(),
+                             self._compress_level)
+        for start in range(0, len(data), _IDAT_CHUNK_BYTES):
+            piece = data[start:start + _IDAT_CHUNK_BYTES]
+            if self._frames_written == 0:
+                write_chunk(self._fp, b"IDAT", piece)
+            else:
+                write_chunk(self._fp, b"fdAT", struct.pack(">I", self._sequence) + piece)
+                self._sequence += 1
+        self._frames_written += 1
+
+    def close(self) -> None:
+        """Writes the end chunk."""
+        if self._frames_written != self.num_frames:
+            raise ValueError(f"Wrote {self._frames_written} frames, expected {self.num_frames}")
+        write_chunk(self._fp, b"IEND", b"")
@@ -0,0 +1,209 @@
+import cProfile
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Deque, Optional, Tuple
+
+DEFAULT_CAPACITY = 1000
+
+_PROC_STATUS = "/proc/self/status"
+_PROC_CLEAR_REFS = "/proc/self/clear_refs"
+
+
+def _resident_memory() -> Optional[Tuple[int, int]]:
+    """Resident set size of this process and its high-water mark, in bytes, or ``None`` without /proc."""
+    values = {}
+    try:
+        with open(_PROC_STATUS, "r") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, value = line.split(":", 1)
+                    values[key] = int(value.split()[0]) * 1024
+    except (OSError, ValueError):
+        return None
+    if len(values) != 2:
+        return None
+    return values["VmRSS"], values["VmHWM"]
+
+
+def _reset_resident_peak() -> Optional[int]:
+    """Resets the resident high-water mark to the current size and returns it, or ``None`` if it cannot."""
+    try:
+        with open(_PROC_CLEAR_REFS, "w") as f:
+            f.write("5")
+    except OSError:
+        return None
+    resident = _resident_memory()
+    return resident[0] if resident is not None else None
+
+
+@dataclass
+class ProfileRecord:
+    """Measurements of one profiled call.
+
+    ``allocated_bytes`` is the net memory the call left allocated and ``peak_bytes`` the
+    highest it reached above its start. tracemalloc sees Python objects and NumPy arrays
+    but not Pillow's image buffers, so on Linux the process's resident memory and its
+    high-water mark are measured too and the larger of the two counts; elsewhere only
+    tracemalloc is. Resident memory includes every thread's allocations, and memory
+    freed earlier and reused by the call is not counted. Both are ``None`` when memory
+    was not traced, and for calls nested in or concurrent with another traced call.
+    """
+    name: str
+    category: str
+    started: float  # seconds since the epoch
+    seconds: float
+    pixels: Optional[int] = None
+    allocated_bytes: Optional[int] = None
+    peak_bytes: Optional[int] = None
+    error: Optional[str] = None
+
+    def format(self) -> str:
+        text = f"{self.name} {self.seconds * 1000:.1f} ms"
+        if self.pixels:
+            text += f", {self.pixels / 1e6:.2f} MP"
+        if self.peak_bytes is not None:
+            text += f", peak {self.peak_bytes / (1024 * 1024):.1f} MB"
+        return text
+
+
+class Profiler:
+    """Records timings and memory of instrumented calls into a ring buffer.
+
+    Methods decorated with ``profiled`` check ``enabled`` and otherwise run untouched, so
+    a disabled profiler costs one attribute lookup per call. Enabled, every call is
+    timed; with ``memory`` the outermost call also runs under tracemalloc, and with
+    ``cprofile`` under cProfile, which both slow it down considerably.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.enabled = False
+        self.records: Deque[ProfileRecord] = deque(maxlen=capacity)
+        self._memory = False
+        self._profiling = False
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._lock = threading.Lock()
+        self._tracing = False  # a call is being traced; others skip tracemalloc and cProfile
+
+    def enable(self, memory: bool = False, cprofile: bool = False) -> None:
+        self.enabled = True
+        self._memory = memory
+        self._profiling = cprofile
+        if cprofile and self._cprofile is None:
+            self._cprofile = cProfile.Profile()
+
+    def disable(self) -> None:
+        """Stops recording; records and cProfile statistics are kept until ``clear``."""
+        self.enabled = False
+        self._memory = False
+        self._profiling = False
+
+    def clear(self) -> None:
+        self.records.clear()
+        if self._cprofile is not None:
+            self._cprofile = cProfile.Profile()
+
+    def last(self, category: Optional[str] = None) -> Optional[ProfileRecord]:
+        """The most recent record, optionally of one ``category``."""
+        for record in reversed(self.records):
+            if category is None or record.category == category:
+                return record
+        return None
+
+    def record(self, record: ProfileRecord) -> None:
+        self.records.append(record)
+
+    def call(self, name: str, category: str, fn: Callable[..., Any], args: tuple, kwargs: dict,
+             pixels: Optional[Callable[..., Optional[int]]] = None) -> Any:
+        """Runs ``fn(*args, **kwargs)`` and records it; ``pixels(*args, **kwargs)`` is evaluated afterwards."""
+        with self._lock:
+            traced = not self._tracing and (self._memory or self._profiling)
+            if traced:
+                self._tracing = True
+        started_tracemalloc = False
+        if traced and self._memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracemalloc = True
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            resident_before = _reset_resident_peak()
+        if traced and self._profiling:
+            self._cprofile.enable()  # type: ignore
+        error = None
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            if traced and self._profiling:
+                self._cprofile.disable()  # type: ignore
+            record = ProfileRecord(name, category, started, seconds, error=error)
+            if traced and self._memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record.allocated_bytes, record.peak_bytes = current - before, peak - before
+                resident = _resident_memory() if resident_before is not None else None
+                if resident is not None:
+                    record.allocated_bytes = max(record.allocated_bytes, resident[0] - resident_before)
+                    record.peak_bytes = max(record.peak_bytes, resident[1] - resident_before)
+                if started_tracemalloc:
+                    tracemalloc.stop()
+            if traced:
+                with self._lock:
+                    self._tracing = False
+            if pixels is not None:
+                try:
+                    record.pixels = pixels(*args, **kwargs)
+                except Exception:
+                    pass
+            self.records.append(record)
+
+    def dump_jsonl(self, path: str) -> int:
+        """Writes every record as one JSON object per line; returns how many were written."""
+        records = list(self.records)
+        with open(path, "w") as f:
+            for record in records:
+                f.write(json.dumps(asdict(record)) + "\n")
+        return len(records)
+
+    def dump_cprofile(self, path: str) -> bool:
+        """Writes the cProfile statistics collected so far, for ``pstats`` or snakeviz; False if none were."""
+        if self._cprofile is None:
+            return False
+        self._cprofile.dump_stats(path)
+        return True
+
+
+# The profiler the instrumented classes report to.
+PROFILER = Profiler()
+
+
+def profiled(name: str, category: str = "processor",
+             pixels: Optional[Callable[..., Optional[int]]] = None) -> Callable:
+    """Decorates a function to be recorded by PROFILER while it is enabled.
+
+    ``pixels`` receives the same arguments as the function, after it returned, and
+    gives the number of pixels it processed.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            return PROFILER.call(name, category, fn, args, kwargs, pixels)
+        return wrapper
+    return decorator
+
+
+def box_pixels(box: Tuple[int, int, int, int]) -> int:
+    """Number of pixels in a (left, upper, right, lower) box."""
+    left, upper, right, lower = box
+    return max(0, right - left) * max(0, lower - upper)
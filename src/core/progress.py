@@ -0,0 +1,10 @@
+from typing import Callable
+
+
+class OperationCancelled(Exception):
+    """Raised by a progress callback to stop a long operation; the processor is left unchanged."""
+    pass
+
+# Called as ``progress(done, total)`` between the steps of a long operation; it may raise
+# OperationCancelled to stop it.
+ProgressCallback = Callable[[int, int], None]
@@ -0,0 +1,68 @@
+import math
+from typing import List, Tuple
+
+import PIL.Image
+
+# Levels are added until the longer side of the smallest one fits within this.
+MIN_PROXY_SIDE = 256
+
+# Rows of the source read at a time when reducing, so tiled images are never assembled.
+_BAND_ROWS = 256
+
+Box = Tuple[int, int, int, int]
+
+
+def scale_box(box: Box, factor: int, size: Tuple[int, int]) -> Box:
+    """The smallest box at 1/``factor`` scale that covers ``box``, clamped to ``size``."""
+    left, upper, right, lower = box
+    return (min(left // factor, size[0] - 1), min(upper // factor, size[1] - 1),
+            min(max(left // factor + 1, math.ceil(right / factor)), size[0]),
+            min(max(upper // factor + 1, math.ceil(lower / factor)), size[1]))
+
+
+class ProxyPyramid:
+    """Display proxies of an image at 1/2, 1/4, 1/8, ... scale.
+
+    Each level is the previous one box-reduced by two, so a changed box of the source
+    only needs that box recomputed on every level. The source may be a PIL image or a
+    TiledImage; it is read in bands.
+    """
+
+    def __init__(self, image):
+        self.size = image.size
+        self.levels: List[PIL.Image.Image] = []
+        width, height = image.size
+        while max(width, height) > MIN_PROXY_SIDE:
+            width, height = math.ceil(width / 2), math.ceil(height / 2)
+            self.levels.append(PIL.Image.new(image.mode, (width, height)))
+        self.update(image, (0, 0) + image.size)
+
+    @staticmethod
+    def factor(level: int) -> int:
+        return 2 ** level
+
+    def level_for(self, max_size: Tuple[int, int]) -> int:
+        """The smallest level that is still at least as large as the image fitted into ``max_size``.
+
+        Level 0 is the source itself.
+        """
+        scale = min(max_size[0] / self.size[0], max_size[1] / self.size[1])
+        if scale >= 1:
+            return 0
+        return min(int(math.floor(math.log2(1 / scale))), len(self.levels))
+
+    def image(self, level: int) -> PIL.Image.Image:
+        """The proxy at ``level`` (1 or more); callers must not modify it."""
+        return self.levels[level - 1]
+
+    def update(self, image, box: Box) -> None:
+        """Recomputes the part of every level that covers ``box`` of the source ``image``."""
+        source, source_box = image, box
+        for level in self.levels:
+            target = scale_box(source_box, 2, level.size)
+            left, right = 2 * target[0], min(2 * target[2], source.size[0])
+            lower = min(2 * target[3], source.size[1])
+            for top in range(2 * target[1], lower, _BAND_ROWS):
+                band = source.crop((left, top, right, min(top + _BAND_ROWS, lower)))
+                level.paste(band.reduce(2), (target[0], top // 2))
+            source, source_box = level, target
@@ -0,0 +1,254 @@
+import tempfile
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import PIL.Image
+
+from src.core.codecs import open_file
+
+DEFAULT_TILE_SIZE = 512
+DEFAULT_MAX_RESIDENT_TILES = 64  # 64 MB of RGBA tiles at the default tile size
+
+# Bytes per pixel of the raw layouts Pillow reports for uncompressed files
+_RAW_BYTES_PER_PIXEL = {"L": 1, "LA": 2, "RGB": 3, "BGR": 3, "RGBA": 4, "RGBX": 4, "BGRA": 4, "BGRX": 4}
+_LAZY_MODES = ("L", "RGB", "RGBA")
+
+
+class RawStripSource:
+    """Reads row bands straight from an uncompressed file without decoding the rest of it.
+
+    Works for files whose Pillow tile list is made of full-width ``raw`` strips
+    (BMP, TGA, PPM, uncompressed TIFF). Use ``from_image`` to find out if a file qualifies.
+    """
+
+    def __init__(self, file_path: str, size: Tuple[int, int], mode: str,
+                 strips: List[Tuple[int, int, int, str, int, int]]):
+        self.file_path = file_path
+        self.size = size
+        self.mode = mode
+        self._strips = strips  # (upper, lower, offset, rawmode, stride, orientation)
+
+    @classmethod
+    def from_image(cls, image: PIL.Image.Image, file_path: str) -> Optional["RawStripSource"]:
+        """Builds a source from an opened, not yet loaded image, or returns None if it is not raw."""
+        if image.mode not in _LAZY_MODES or not image.tile:
+            return None
+        width = image.size[0]
+        strips = []
+        for tile in image.tile:
+            codec, (left, upper, right, lower), offset, args = tile
+            if codec != "raw" or left != 0 or right != width:
+                return None
+            if isinstance(args, str):
+                args = (args, 0, 1)
+            rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+            if rawmode not in _RAW_BYTES_PER_PIXEL:
+                return None
+            if not stride:
+                stride = width * _RAW_BYTES_PER_PIXEL[rawmode]
+            strips.append((upper, lower, offset, rawmode, stride, orientation or 1))
+        return cls(file_path, image.size, image.mode, strips)
+
+    def read_box(self, box: Tuple[int, int, int, int]) -> PIL.Image.Image:
+        """Decodes the pixels of ``box`` as an RGBA image, reading only the bytes it covers."""
+        left, upper, right, lower = box
+        band = PIL.Image.new(self.mode, (right - left, lower - upper))
+        with open(self.file_path, "rb") as f:
+            for strip_upper, strip_lower, offset, rawmode, stride, orientation in self._strips:
+                first, last = max(upper, strip_upper), min(lower, strip_lower)
+                if first >= last:
+                    continue
+                pixel_bytes = _RAW_BYTES_PER_PIXEL[rawmode]
+                row_bytes = (right - left) * pixel_bytes
+                data = bytearray()
+                for y in range(first, last):
+                    row = y - strip_upper if orientation > 0 else strip_lower - 1 - y
+                    f.seek(offset + row * stride + left * pixel_bytes)
+                    data += f.read(row_bytes)
+                rows = PIL.Image.frombytes(self.mode, (right - left, last - first), bytes(data), "raw", rawmode)
+                band.paste(rows, (0, first - upper))
+        return band.convert("RGBA")
+
+
+class TiledImage:
+    """An RGBA image held as fixed-size tiles with a bounded number resident in memory.
+
+    Tiles are loaded on first use from an optional lazy source, kept in an LRU of at most
+    ``max_resident_tiles`` and spilled to a temporary file when evicted after being
+    modified. ``crop``, ``paste``, ``size`` and ``mode`` mirror ``PIL.Image.Image`` so
+    region-level code can work on either.
+    """
+
+    mode = "RGBA"
+
+    def __init__(self, size: Tuple[int, int], tile_size: int = DEFAULT_TILE_SIZE,
+                 max_resident_tiles: int = DEFAULT_MAX_RESIDENT_TILES,
+                 source: Optional[RawStripSource] = None):
+        self.size = size
+        self.tile_size = tile_size
+        self.max_resident_tiles = max(1, max_resident_tiles)
+        self._source = source
+        self._resident: "OrderedDict[Tuple[int, int], PIL.Image.Image]" = OrderedDict()
+        self._dirty: set = set()
+        self._spilled: Dict[Tuple[int, int], int] = {}
+        self._spill_file = None
+
+    @classmethod
+    def open(cls, file_path: str, tile_size: int = DEFAULT_TILE_SIZE,
+             max_resident_tiles: int = DEFAULT_MAX_RESIDENT_TILES) -> "TiledImage":
+        """Opens a file, reading tiles lazily when the format allows it.
+
+        Compressed formats are decoded once and chopped into tiles, spilling those that
+        do not fit in the resident budget.
+        """
+        image = open_file(file_path)
+        source = RawStripSource.from_image(image, file_path)
+        tiled = cls(image.size, tile_size, max_resident_tiles, source)
+        if source is None:
+            image.load()
+            for key, box in tiled._tile_boxes():
+                tiled._store(key, image.crop(box).convert("RGBA"))
+        image.close()
+        return tiled
+
+    @classmethod
+    def from_image(cls, image: PIL.Image.Image, tile_size: int = DEFAULT_TILE_SIZE,
+                   max_resident_tiles: int = DEFAULT_MAX_RESIDENT_TILES) -> "TiledImage":
+        tiled = cls(image.size, tile_size, max_resident_tiles)
+        tiled.paste(image.convert("RGBA"), (0, 0))
+        return tiled
+
+    @property
+    def width(self) -> int:
+        return self.size[0]
+
+    @property
+    def height(self) -> int:
+        return self.size[1]
+
+    def new_like(self, size: Tuple[int, int]) -> "TiledImage":
+        """A blank tiled image of ``size`` with the same tile settings."""
+        return TiledImage(size, self.tile_size, self.max_resident_tiles)
+
+    def crop(self, box: Tuple[int, int, int, int]) -> PIL.Image.Image:
+        """Assembles the pixels of ``box`` into a regular PIL image."""
+        left, upper, right, lower = box
+        out = PIL.Image.new("RGBA", (right - left, lower - upper))
+        for key, tile_box in self._tile_boxes(box):
+            tile = self._tile(key)
+            x0, y0 = max(left, tile_box[0]), max(upper, tile_box[1])
+            x1, y1 = min(right, tile_box[2]), min(lower, tile_box[3])
+            part = tile.crop((x0 - tile_box[0], y0 - tile_box[1], x1 - tile_box[0], y1 - tile_box[1]))
+            out.paste(part, (x0 - left, y0 - upper))
+        return out
+
+    def paste(self, image: PIL.Image.Image, box) -> None:
+        """Writes ``image`` at ``box`` (a 2-tuple position or 4-tuple box), touching only overlapping tiles."""
+        left, upper = box[0], box[1]
+        right, lower = left + image.size[0], upper + image.size[1]
+        if image.mode != "RGBA":
+            image = image.convert("RGBA")
+        for key, tile_box in self._tile_boxes((max(0, left), max(0, upper), min(self.width, right),
+                                               min(self.height, lower))):
+            tile = self._tile(key)
+            tile.paste(image, (left - tile_box[0], upper - tile_box[1]))
+            self._dirty.add(key)
+            self._evict()
+
+    def cropped(self, box: Tuple[int, int, int, int]) -> "TiledImage":
+        """A new tiled image holding ``box`` of this one."""
+        left, upper, right, lower = box
+        result = self.new_like((right - left, lower - upper))
+        for y in range(upper, lower, self.tile_size):
+            band = self.crop((left, y, right, min(y + self.tile_size, lower)))
+            result.paste(band, (0, y - upper))
+        return result
+
+    def rows(self) -> Iterator[PIL.Image.Image]:
+        """Yields the image as full-width bands one tile high, top to bottom."""
+        for y in range(0, self.height, self.tile_size):
+            yield self.crop((0, y, self.width, min(y + self.tile_size, self.height)))
+
+    def to_image(self) -> PIL.Image.Image:
+        """Assembles the whole image in memory."""
+        return self.crop((0, 0) + self.size)
+
+    def close(self) -> None:
+        self._resident.clear()
+        self._dirty.clear()
+        self._spilled.clear()
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    @property
+    def lazy(self) -> bool:
+        """True when tiles are read from the file on demand instead of decoded up front."""
+        return self._source is not None
+
+    @property
+    def resident_tiles(self) -> int:
+        return len(self._resident)
+
+    @property
+    def spilled_tiles(self) -> int:
+        return len(self._spilled)
+
+    def _tile_boxes(self, box: Optional[Tuple[int, int, int, int]] = None):
+        left, upper, right, lower = box or (0, 0) + self.size
+        size = self.tile_size
+        for ty in range(upper // size, (lower - 1) // size + 1):
+            for tx in range(left // size, (right - 1) // size + 1):
+                yield (tx, ty), (tx * size, ty * size, min((tx + 1) * size, self.width),
+                                 min((ty + 1) * size, self.height))
+
+    def _tile_size_of(self, key: Tuple[int, int]) -> Tuple[int, int]:
+        tx, ty = key
+        size = self.tile_size
+        return min(size, self.width - tx * size), min(size, self.height - ty * size)
+
+    def _tile(self, key: Tuple[int, int]) -> PIL.Image.Image:
+        tile = self._resident.get(key)
+        if tile is not None:
+            self._resident.move_to_end(key)
+            return tile
+        if key in self._spilled:
+            tile = self._read_spilled(key)
+        elif self._source is not None:
+            left, upper = key[0] * self.tile_size, key[1] * self.tile_size
+            width, height = self._tile_size_of(key)
+            tile = self._source.read_box((left, upper, left + width, upper + height))
+        else:
+            tile = PIL.Image.new("RGBA", self._tile_size_of(key))
+            self._dirty.add(key)
+        self._resident[key] = tile
+        self._evict()
+        return tile
+
+    def _store(self, key: Tuple[int, int], tile: PIL.Image.Image) -> None:
+        self._resident[key] = tile
+        self._dirty.add(key)
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._resident) > self.max_resident_tiles:
+            key, tile = self._resident.popitem(last=False)
+            if key in self._dirty:
+                self._write_spilled(key, tile)
+                self._dirty.discard(key)
+
+    def _slot_bytes(self) -> int:
+        return self.tile_size * self.tile_size * 4
+
+    def _write_spilled(self, key: Tuple[int, int], tile: PIL.Image.Image) -> None:
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(prefix="blurrify-tiles-")
+        slot = self._spilled.setdefault(key, len(self._spilled))
+        self._spill_file.seek(slot * self._slot_bytes())
+        self._spill_file.write(tile.tobytes())
+
+    def _read_spilled(self, key: Tuple[int, int]) -> PIL.Image.Image:
+        size = self._tile_size_of(key)
+        self._spill_file.seek(self._spilled[key] * self._slot_bytes())  # type: ignore
+        return PIL.Image.frombytes("RGBA", size, self._spill_file.read(size[0] * size[1] * 4))  # type: ignore
+
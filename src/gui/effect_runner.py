@@ -0,0 +1,121 @@
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Optional
+
+from PyQt6.QtCore import QCoreApplication, QObject, QRunnable, QThreadPool, pyqtSignal
+
+from src.core.progress import OperationCancelled
+
+# A job receives a ``progress(done, total)`` callback, which raises OperationCancelled
+# once the job has been superseded, and returns its result.
+Job = Callable[[Callable[[int, int], None]], Any]
+
+
+class _Task(QRunnable):
+    """One submitted job, run on the runner's pool."""
+
+    def __init__(self, runner: "EffectRunner", job: Job, key: Optional[str],
+                 on_done: Optional[Callable[[Any], None]]):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.runner = runner
+        self.job = job
+        self.key = key
+        self.on_done = on_done
+        self.cancelled = threading.Event()
+
+    def progress(self, done: int, total: int) -> None:
+        if self.cancelled.is_set():
+            raise OperationCancelled()
+        self.runner._progress.emit(done, total)
+
+    def run(self) -> None:
+        try:
+            result = self.job(self.progress)
+        except Exception as e:  # OperationCancelled included; the runner tells them apart
+            self.runner._task_finished.emit(self, None, e)
+        else:
+            self.runner._task_finished.emit(self, result, None)
+
+
+class EffectRunner(QObject):
+    """Runs image jobs one at a time on a background thread, in submission order.
+
+    Jobs share the ImageProcessor, so a single worker keeps them from running
+    concurrently; the GUI thread must only reach the processor through ``submit``.
+    Jobs submitted with a ``key`` supersede the earlier ones with the same key: a
+    queued one is dropped and a running one is cancelled at its next progress call. A
+    job that finishes before noticing still delivers its result, which the newer job
+    then replaces. That coalesces bursts such as dial changes into one computation of
+    the latest value.
+    """
+
+    progress = pyqtSignal(int)  # percent of the running job
+    busy_changed = pyqtSignal(bool)
+    failed = pyqtSignal(str)
+
+    _progress = pyqtSignal(int, int)
+    _task_finished = pyqtSignal(object, object, object)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._queue: Deque[_Task] = deque()
+        self._running: Optional[_Task] = None
+        self._busy = False
+        self._progress.connect(self._on_progress)
+        self._task_finished.connect(self._on_task_finished)
+
+    def submit(self, job: Job, key: Optional[str] = None, on_done: Optional[Callable[[Any], None]] = None) -> None:
+        """Queues ``job``; ``on_done`` is called with its result on the GUI thread unless it was superseded."""
+        if key is not None:
+            self._queue = deque(task for task in self._queue if task.key != key)
+            if self._running is not None and self._running.key == key:
+                self._running.cancelled.set()
+        self._queue.append(_Task(self, job, key, on_done))
+        self._start_next()
+
+    def is_busy(self) -> bool:
+        return self._busy
+
+    def wait(self, msecs: int = -1) -> bool:
+        """Blocks until every job has run and its result was delivered; for shutdown and tests.
+
+        Called from an ``on_done`` callback, it does not wait for that callback itself.
+        """
+        while self._running is not None or self._queue:
+            if not self._pool.waitForDone(msecs):
+                return False
+            QCoreApplication.processEvents()
+        return True
+
+    def _start_next(self) -> None:
+        if self._running is not None or not self._queue:
+            return
+        self._running = self._queue.popleft()
+        if not self._busy:
+            self._busy = True
+            self.busy_changed.emit(True)
+        self._pool.start(self._running)
+
+    def _on_progress(self, done: int, total: int) -> None:
+        if total:
+            self.progress.emit(int(100 * done / total))
+
+    def _on_task_finished(self, task: _Task, result: Any, error: Optional[Exception]) -> None:
+        self._running = None
+        try:
+            if isinstance(error, OperationCancelled):
+                pass
+            elif error is not None:
+                self.failed.emit(str(error))
+            elif task.on_done is not None:
+                task.on_done(result)
+        except Exception as e:  # a failing callback must not stall the jobs queued after it
+            self.failed.emit(str(e))
+        finally:
+            self._start_next()
+            if self._running is None:
+                self._busy = False
+                self.busy_changed.emit(False)
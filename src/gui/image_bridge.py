@@ -0,0 +1,80 @@
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from PyQt6 import sip
+from PyQt6.QtGui import QImage
+
+if TYPE_CHECKING:
+    import numpy as np
+    import PIL.Image
+
+Box = Tuple[int, int, int, int]
+
+
+def qimage_from_image(image: "PIL.Image.Image") -> QImage:
+    """A QImage with its own copy of the pixels of ``image``; safe to create off the GUI thread.
+
+    The pixels are pasted straight into the QImage's memory, so they are copied once
+    and never go through ``tobytes``.
+    """
+    import PIL.Image
+
+    width, height = image.size
+    qimage = QImage(width, height, QImage.Format.Format_RGBA8888)
+    bits = qimage.bits()
+    bits.setsize(qimage.sizeInBytes())
+    view = PIL.Image.frombuffer("RGBA", image.size, bits, "raw", "RGBA", qimage.bytesPerLine(), 1)
+    view.readonly = 0  # as in ImageBridge: paste into the QImage's memory, not a copy of it
+    view.paste(image if image.mode == "RGBA" else image.convert("RGBA"), (0, 0))
+    return qimage
+
+
+class ImageBridge:
+    """One RGBA buffer seen both as a PIL image and as a QImage.
+
+    Pixels are pasted into the PIL view and Qt reads the same memory, so updating a
+    box copies only that box and nothing goes through ``tobytes``. NumPy and Pillow are
+    imported with the first image, so creating a bridge does not slow down startup.
+    """
+
+    def __init__(self):
+        self._buffer: Optional["np.ndarray"] = None
+        self.image: Optional["PIL.Image.Image"] = None
+        self.qimage: Optional[QImage] = None
+
+    @property
+    def size(self) -> Optional[Tuple[int, int]]:
+        return self.image.size if self.image is not None else None
+
+    def _allocate(self, size: Tuple[int, int]) -> None:
+        import numpy as np
+        import PIL.Image
+
+        width, height = size
+        self._buffer = np.zeros((height, width, 4), dtype=np.uint8)
+        self.image = PIL.Image.frombuffer("RGBA", size, self._buffer, "raw", "RGBA", 0, 1)
+        # frombuffer images are flagged read-only so Pillow would copy them on the first
+        # paste; writing through to the shared buffer is the point here.
+        self.image.readonly = 0
+        self.qimage = QImage(sip.voidptr(self._buffer.ctypes.data), width, height, width * 4,
+                             QImage.Format.Format_RGBA8888)
+
+    def set_image(self, image: "PIL.Image.Image") -> None:
+        """Copies all of ``image`` into the buffer, reallocating it when the size changed."""
+        if self.size != image.size:
+            self._allocate(image.size)
+        self.update(image, (0, 0) + image.size)
+
+    def update(self, image: "PIL.Image.Image", box: Box) -> None:
+        """Copies the ``box`` of ``image``, which must be the size of the buffer, into the buffer."""
+        self.paste(image if box == (0, 0) + image.size else image.crop(box), box)
+
+    def paste(self, patch: "PIL.Image.Image", box: Box) -> None:
+        """Copies ``patch``, the new pixels of ``box``, into the buffer."""
+        if patch.mode != "RGBA":
+            patch = patch.convert("RGBA")
+        self.image.paste(patch, box[:2])  # type: ignore
+
+    def clear(self) -> None:
+        self._buffer = None
+        self.image = None
+        self.qimage = None
@@ -0,0 +1,418 @@
+import math
+
+from PyQt6.QtCore import QPointF, QRectF, Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QColor, QPainter, QPen, QTransform
+from PyQt6.QtWidgets import QGraphicsScene, QGraphicsView
+
+from src.core.profiling import PROFILER, box_pixels, profiled
+from src.gui.image_bridge import ImageBridge
+from src.gui.tile_cache import TileCache, level_for_scale, level_size, tile_box, tiles_covering
+
+# Furthest zoom in, in screen pixels per image pixel.
+MAX_ZOOM = 32.0
+
+# Zoom change of one wheel notch.
+WHEEL_ZOOM = 1.25
+
+
+def _image_pixels(viewer, image, *args, **kwargs):
+    return image.size[0] * image.size[1] if image is not None else None
+
+
+def _update_pixels(viewer, image, boxes, *args, **kwargs):
+    if image is None or boxes is None:
+        return _image_pixels(viewer, image)
+    return sum(box_pixels(box) for box in boxes)
+
+
+def _patch_pixels(viewer, display_size, patches, *args, **kwargs):
+    return sum(box_pixels(box) for box, _ in patches)
+
+
+def _paint_pixels(viewer, event):
+    return event.rect().width() * event.rect().height()
+
+
+class ImageViewer(QGraphicsView):
+    """Zoomable, pannable view of an image, with a rectangle selection.
+
+    The scene is the full-resolution image, so scene coordinates are image pixels at
+    any zoom. What is drawn comes from two sources: the display image the processor
+    keeps at about the size of the window (the overview), and, once the view is zoomed
+    in past the overview, tiles of finer pyramid levels. Only the visible tiles are
+    asked for, through ``tiles_needed``, and kept in a TileCache; until a tile arrives
+    the overview is shown scaled in its place, so panning and zooming never wait.
+
+    The wheel zooms around the cursor and dragging with the middle or right button
+    pans. Selections snap to whole image pixels, and only the union of the old and the
+    new selection rectangle is repainted while dragging.
+    """
+
+    selection_completed = pyqtSignal(QRectF)  # the selection, in image coordinates
+    tiles_needed = pyqtSignal(int, list)  # cache generation, [(tile key, box in its level)]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(400, 300)
+        self.setStyleSheet("border: 1px solid #cccccc;")
+        self.setScene(QGraphicsScene(self))
+        # Zooming keeps its own anchor, see ``zoom_by``.
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.NoAnchor)
+        self.setResizeAnchor(QGraphicsView.ViewportAnchor.AnchorViewCenter)
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.BoundingRectViewportUpdate)
+        self._bridge = ImageBridge()  # the overview
+        self._overview_rect = QRectF()  # where the overview goes, in image coordinates
+        self._overview_level = 0  # the pyramid level of the overview; finer levels come as tiles
+        self._tiles = TileCache()
+        self._requested = set()  # tiles asked for and not delivered yet
+        self._request_timer = QTimer(self)
+        self._request_timer.setSingleShot(True)
+        self._request_timer.timeout.connect(self._request_tiles)
+        self._missing = []
+        self._fitted = True  # the zoom follows the window size until the user zooms
+        self._selection = None  # QRectF in image coordinates
+        self._selection_start = None
+        self._is_selecting = False
+        self._pan_origin = None
+        self._preview = ImageBridge()  # effect preview drawn over the selection
+        self._preview_rect = None  # where the preview goes, in image coordinates
+        self._hud_visible = False
+
+    def image_size(self):
+        """Size of the full-resolution image, or None."""
+        return self._tiles.size if self._bridge.qimage is not None else None
+
+    def zoom(self):
+        """Screen pixels per image pixel."""
+        return self.transform().m11()
+
+    @profiled("viewer.set_image", category="viewer", pixels=_image_pixels)
+    def set_image(self, image, image_size=None):
+        """Shows ``image`` as the overview of an image of ``image_size`` (default: its own size), fitted to the view."""
+        self._selection = None
+        self.clear_preview()
+        if image is None:
+            self._bridge.clear()
+            self._tiles.reset((0, 0))
+            self.scene().setSceneRect(QRectF())
+        else:
+            size = image_size or image.size
+            self._tiles.reset(size)
+            self._requested.clear()
+            self.scene().setSceneRect(QRectF(0, 0, *size))
+            self._set_overview(image)
+            self.fit_to_window()
+        self.viewport().update()
+
+    @profiled("viewer.update_image", category="viewer", pixels=_update_pixels)
+    def update_image(self, image, boxes, image_size=None):
+        """Shows ``image`` after only ``boxes`` (its coordinates) changed; ``None`` means everything did.
+
+        A new ``image_size`` starts over as ``set_image``. Only the changed boxes are
+        copied into the overview, their tiles dropped and their part of the view repainted.
+        """
+        size = image_size or (image.size if image is not None else None)
+        if image is None or self._bridge.qimage is None or size != self._tiles.size:
+            self.set_image(image, size)
+            return
+        if boxes is None or self._bridge.size != image.size:
+            self._set_overview(image)
+            self._tiles.reset(size)
+            self._requested.clear()
+            self.viewport().update()
+            return
+        self._paste_boxes([(box, image.crop(box)) for box in boxes])
+
+    @profiled("viewer.update_boxes", category="viewer", pixels=_patch_pixels)
+    def update_boxes(self, display_size, patches, image_size):
+        """Like ``update_image`` with changed boxes, given only the new pixels of each box.
+
+        ``patches`` are (box, pixels) pairs in the coordinates of a display image of
+        ``display_size``. Returns False without changing anything when the shown image is
+        not that display of an image of ``image_size``; the caller then needs ``update_image``.
+        """
+        if self._bridge.qimage is None or image_size != self._tiles.size or self._bridge.size != display_size:
+            return False
+        self._paste_boxes(patches)
+        return True
+
+    def _paste_boxes(self, patches):
+        """Copies (box, pixels) pairs into the overview, drops their tiles and repaints them."""
+        scale_x = self._overview_rect.width() / self._bridge.size[0]
+        scale_y = self._overview_rect.height() / self._bridge.size[1]
+        changed = []
+        for box, patch in patches:
+            self._bridge.paste(patch, box)
+            left, upper, right, lower = box
+            changed.append((math.floor(left * scale_x), math.floor(upper * scale_y),
+                            math.ceil(right * scale_x), math.ceil(lower * scale_y)))
+        self._tiles.invalidate(changed)
+        self._requested.clear()
+        for left, upper, right, lower in changed:
+            self._update_scene_rect(QRectF(left, upper, right - left, lower - upper))
+
+    def _set_overview(self, image):
+        """Takes ``image`` as the overview and works out which pyramid level it is."""
+        self._bridge.set_image(image)
+        width, height = self._tiles.size
+        levels = [level for level in range(32) if level_size(self._tiles.size, level) == image.size]
+        if levels:
+            self._overview_level = levels[0]
+            factor = 2 ** self._overview_level
+            self._overview_rect = QRectF(0, 0, image.size[0] * factor, image.size[1] * factor)
+        else:
+            # A reduced preview shown before the image is decoded; tiles replace it once zoomed in.
+            self._overview_rect = QRectF(0, 0, width, height)
+            self._overview_level = max(1, math.ceil(math.log2(width / image.size[0])))
+
+    def add_tiles(self, generation, tiles):
+        """Stores delivered ``[(tile key, QImage)]`` and repaints them.
+
+        Tiles asked for before the image last changed are dropped.
+        """
+        if generation != self._tiles.generation:
+            return
+        for key, qimage in tiles:
+            self._requested.discard(key)
+            self._tiles.put(key, qimage, qimage.sizeInBytes())
+            self._update_scene_rect(self._tile_rect(key))
+
+    def _tile_rect(self, key):
+        """Where tile ``key`` goes, in image coordinates."""
+        factor = 2 ** key[0]
+        left, upper, right, lower = tile_box(key, self._tiles.size)
+        return QRectF(left * factor, upper * factor, (right - left) * factor, (lower - upper) * factor)
+
+    def _update_scene_rect(self, rect):
+        """Repaints the part of the view showing ``rect`` (image coordinates), with a pixel to spare for smoothing."""
+        self.viewport().update(self.mapFromScene(rect).boundingRect().adjusted(-1, -1, 1, 1))
+
+    def _request_tiles(self):
+        """Asks for the visible tiles that are neither cached nor already asked for."""
+        missing = [key for key in self._missing if key not in self._tiles]
+        if missing and not set(missing) <= self._requested:
+            # A newer request supersedes older ones, so it lists every visible tile still missing.
+            self._requested = set(missing)
+            self.tiles_needed.emit(self._tiles.generation, [(key, tile_box(key, self._tiles.size)) for key in missing])
+
+    def fit_to_window(self):
+        """Zooms so the whole image fits the view, and keeps it fitted as the window resizes."""
+        rect = self.sceneRect()
+        if rect.isEmpty():
+            return
+        viewport = self.viewport().size()
+        scale = min(viewport.width() / rect.width(), viewport.height() / rect.height())
+        self.setTransform(QTransform.fromScale(scale, scale))
+        self.centerOn(rect.center())
+        self._fitted = True
+
+    def zoom_by(self, factor, anchor=None):
+        """Zooms by ``factor`` around ``anchor`` (viewport coordinates, default the centre), within the limits."""
+        rect = self.sceneRect()
+        if rect.isEmpty():
+            return
+        viewport = self.viewport().size()
+        fit = min(viewport.width() / rect.width(), viewport.height() / rect.height())
+        target = max(min(fit, 1.0), min(self.zoom() * factor, MAX_ZOOM))
+        anchor = (anchor if anchor is not None else QPointF(viewport.width() / 2, viewport.height() / 2)).toPoint()
+        before = self.mapToScene(anchor)
+        self.setTransform(QTransform.fromScale(target, target))
+        # Scroll so the image point under the anchor stays there.
+        delta = (before - self.mapToScene(anchor)) * target
+        self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() + round(delta.x()))
+        self.verticalScrollBar().setValue(self.verticalScrollBar().value() + round(delta.y()))
+        self._fitted = target <= fit
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if steps and self._bridge.qimage is not None:
+            self.zoom_by(WHEEL_ZOOM ** steps, event.position())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self._fitted:
+            self.fit_to_window()
+
+    def scrollContentsBy(self, dx, dy):
+        super().scrollContentsBy(dx, dy)
+        if self._hud_visible:
+            # Scrolling moves the painted pixels, overlay included.
+            self.viewport().update()
+
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        if self._bridge.qimage is None:
+            return
+        scale = self.zoom() * self.devicePixelRatioF()
+        if scale < 1:
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        self._draw_overview(painter, rect)
+        level = level_for_scale(scale, self._overview_level)
+        if level >= self._overview_level:
+            return
+        visible = rect.intersected(self.sceneRect())
+        box = (visible.left(), visible.top(), visible.right(), visible.bottom())
+        missing = []
+        for key in tiles_covering(box, level, self._tiles.size):
+            tile = self._tiles.get(key)
+            if tile is None:
+                missing.append(key)
+            else:
+                painter.drawImage(self._tile_rect(key), tile)
+        if missing:
+            # Painting must not start jobs; ask once the paint is over.
+            self._missing = missing
+            self._request_timer.start(0)
+
+    def _draw_overview(self, painter, rect):
+        target = rect.intersected(self._overview_rect)
+        if target.isEmpty():
+            return
+        scale_x = self._bridge.qimage.width() / self._overview_rect.width()
+        scale_y = self._bridge.qimage.height() / self._overview_rect.height()
+        source = QRectF(target.left() * scale_x, target.top() * scale_y,
+                        target.width() * scale_x, target.height() * scale_y)
+        painter.drawImage(target, self._bridge.qimage, source)
+
+    def drawForeground(self, painter, rect):
+        if self._preview_rect is not None:
+            painter.drawImage(self._preview_rect, self._preview.qimage)
+        if self._selection is not None and not self._selection.isEmpty():
+            pen = QPen(QColor(255, 0, 0, 180), 2, Qt.PenStyle.DashLine)
+            pen.setCosmetic(True)
+            painter.setPen(pen)
+            painter.setBrush(QColor(255, 0, 0, 40))  # semi-transparent fill
+            painter.drawRect(self._selection)
+        if self._hud_visible:
+            painter.save()
+            painter.resetTransform()
+            self._paint_hud(painter)
+            painter.restore()
+
+    def set_preview(self, patch, box):
+        """Draws ``patch`` over ``box`` (overview coordinates) of the shown image until the preview is cleared.
+
+        The patch is only composited when painting; the image itself is left alone.
+        """
+        if self._is_selecting or self._bridge.qimage is None:
+            return
+        old = self._preview_rect
+        self._preview.set_image(patch)
+        scale_x = self._overview_rect.width() / self._bridge.qimage.width()
+        scale_y = self._overview_rect.height() / self._bridge.qimage.height()
+        left, upper, right, lower = box
+        self._preview_rect = QRectF(left * scale_x, upper * scale_y, (right - left) * scale_x, (lower - upper) * scale_y)
+        for rect in (old, self._preview_rect):
+            if rect is not None:
+                self._update_scene_rect(rect)
+
+    def clear_preview(self):
+        if self._preview_rect is None:
+            return
+        old, self._preview_rect = self._preview_rect, None
+        self._preview.clear()
+        self._update_scene_rect(old)
+
+    def _image_point(self, position):
+        """The image point under viewport ``position``, clamped to the image."""
+        point = self.mapToScene(position.toPoint())
+        rect = self.sceneRect()
+        return QPointF(min(max(point.x(), rect.left()), rect.right()), min(max(point.y(), rect.top()), rect.bottom()))
+
+    def _set_selection(self, selection):
+        """Replaces the selection, repainting the union of the old and the new rectangle."""
+        old, self._selection = self._selection, selection
+        dirty = None
+        for rect in (old, selection):
+            if rect is not None:
+                # The pen is drawn across the edge and 2 screen pixels wide at any zoom.
+                area = self.mapFromScene(rect).boundingRect().adjusted(-2, -2, 2, 2)
+                dirty = area if dirty is None else dirty.united(area)
+        if dirty is not None:
+            self.viewport().update(dirty)
+
+    def _snapped(self, start, end):
+        """The rectangle spanned by two image points, grown to whole pixels."""
+        left, right = sorted((start.x(), end.x()))
+        top, bottom = sorted((start.y(), end.y()))
+        left, top = math.floor(left), math.floor(top)
+        return QRectF(left, top, math.ceil(right) - left, math.ceil(bottom) - top)
+
+    def mousePressEvent(self, event):
+        if event.button() in (Qt.MouseButton.MiddleButton, Qt.MouseButton.RightButton):
+            self._pan_origin = event.position()
+            self.viewport().setCursor(Qt.CursorShape.ClosedHandCursor)
+        elif event.button() == Qt.MouseButton.LeftButton and self._bridge.qimage is not None:
+            self.clear_preview()
+            self._selection_start = self._image_point(event.position())
+            self._is_selecting = True
+            self._set_selection(self._snapped(self._selection_start, self._selection_start))
+
+    def mouseMoveEvent(self, event):
+        if self._pan_origin is not None:
+            delta = event.position() - self._pan_origin
+            self._pan_origin = event.position()
+            self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() - round(delta.x()))
+            self.verticalScrollBar().setValue(self.verticalScrollBar().value() - round(delta.y()))
+        elif self._is_selecting and self._selection_start is not None:
+            self._set_selection(self._snapped(self._selection_start, self._image_point(event.position())))
+
+    def mouseReleaseEvent(self, event):
+        if self._pan_origin is not None and event.button() in (Qt.MouseButton.MiddleButton,
+                                                              Qt.MouseButton.RightButton):
+            self._pan_origin = None
+            self.viewport().unsetCursor()
+        elif event.button() == Qt.MouseButton.LeftButton and self._is_selecting:
+            self._is_selecting = False
+            self._set_selection(self._snapped(self._selection_start, self._image_point(event.position())))
+            self.selection_completed.emit(self._selection)
+
+    def clear_selection(self):
+        self._set_selection(None)
+
+    def get_selection_rect(self):
+        """The selection in image coordinates, or None."""
+        return self._selection
+
+    def get_selection_image_coords(self, image_size):
+        """The selection as (left, upper, right, lower) within an image of ``image_size``, or None if it is empty."""
+        if self._selection is None:
+            return None
+        width, height = image_size
+        left = max(0, min(int(self._selection.left()), width))
+        top = max(0, min(int(self._selection.top()), height))
+        right = max(0, min(int(self._selection.right()), width))
+        bottom = max(0, min(int(self._selection.bottom()), height))
+        if left >= right or top >= bottom:
+            return None
+        return (left, top, right, bottom)
+
+    def set_hud_visible(self, visible):
+        """Shows or hides the overlay with the latency of the last operation and the frame time."""
+        self._hud_visible = visible
+        self.viewport().update()
+
+    def hud_visible(self):
+        return self._hud_visible
+
+    def _paint_hud(self, painter):
+        operation = PROFILER.last("processor")
+        frame = PROFILER.last("paint")
+        lines = [
+            "last op: " + (operation.format() if operation is not None else "-"),
+            "frame: " + (f"{frame.seconds * 1000:.1f} ms" if frame is not None else "-"),
+            f"zoom: {self.zoom() * 100:.0f}%, {len(self._tiles)} tiles cached",
+        ]
+        if not PROFILER.enabled:
+            lines.append("profiling off")
+        metrics = painter.fontMetrics()
+        width = max(metrics.horizontalAdvance(line) for line in lines) + 12
+        height = metrics.height() * len(lines) + 8
+        painter.fillRect(4, 4, width, height, QColor(0, 0, 0, 160))
+        painter.setPen(QColor(0, 255, 0))
+        for index, line in enumerate(lines):
+            painter.drawText(10, 8 + metrics.ascent() + index * metrics.height(), line)
+
+    @profiled("viewer.paint", category="paint", pixels=_paint_pixels)
+    def paintEvent(self, event):
+        super().paintEvent(event)
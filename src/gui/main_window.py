@@ -1,8 +1,10 @@
+import os
 import sys
+import threading
 from pathlib import Path
 
-from PyQt6.QtCore import QEasingCurve, QPropertyAnimation, QRect, QSize, Qt, pyqtSignal
-from PyQt6.QtGui import QIcon, QImage, QPixmap
+from PyQt6.QtCore import QEasingCurve, QPropertyAnimation, QSize, Qt, QTimer
+from PyQt6.QtGui import QIcon, QKeySequence, QShortcut
 from PyQt6.QtWidgets import (
     QComboBox,
     QDial,
@@ -13,121 +15,65 @@ from PyQt6.QtWidgets import (
     QLCDNumber,
     QMainWindow,
     QMessageBox,
+    QProgressBar,
     QPushButton,
     QSpinBox,
     QVBoxLayout,
     QWidget,
 )
 
-from src.core.image_processor import ImageProcessingError, ImageProcessor
-
-
-class ImageViewer(QLabel):
-    selection_completed = pyqtSignal(QRect)  # Signal that emits a QRect
-
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.setMinimumSize(400, 300)
-        self.setStyleSheet("border: 1px solid #cccccc;")
-        self._selection_start = None
-        self._selection_end = None
-        self._is_selecting = False
-        self._current_selection_rect = None  # Store QRect for painting
-
-    def set_image(self, image):
-        if image:
-            # Ensure image is RGBA
-            if image.mode != "RGBA":
-                image = image.convert("RGBA")
-            width, height = image.size  # PIL: (width, height)
-            data = image.tobytes("raw", "RGBA")
-            q_image = QImage(data, width, height, QImage.Format.Format_RGBA8888)
-            pixmap = QPixmap.fromImage(q_image)
-            self.setPixmap(pixmap.scaled(self.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
-        else:
-            self.clear()
-        self._current_selection_rect = None
-        self.update()
-
-    def mousePressEvent(self, event):
-        if event.button() == Qt.MouseButton.LeftButton and self.pixmap():
-            self._selection_start = event.pos()
-            self._selection_end = event.pos()
-            self._is_selecting = True
-            self._current_selection_rect = QRect(self._selection_start, self._selection_end).normalized()
-            self.update()
-
-    def mouseMoveEvent(self, event):
-        if self._is_selecting and self.pixmap() and self._selection_start is not None:
-            self._selection_end = event.pos()
-            self._current_selection_rect = QRect(self._selection_start, self._selection_end).normalized()
-            self.update()
-
-    def mouseReleaseEvent(self, event):
-        if event.button() == Qt.MouseButton.LeftButton and self.pixmap() and self._selection_start is not None:
-            self._is_selecting = False
-            self._selection_end = event.pos()
-            self._current_selection_rect = QRect(self._selection_start, self._selection_end).normalized()
-            if self._selection_start and self._selection_end:
-                self.selection_completed.emit(self._current_selection_rect)
-            self.update()
-
-    def get_selection_rect(self):
-        return self._current_selection_rect
-
-    def get_selection_image_coords(self, image_size):
-        """
-        Map the selection rectangle from widget coordinates to image coordinates.
-        image_size: (width, height) tuple of the original image
-        Returns (left, upper, right, lower) in image coordinates, or None if not available.
-        """
-        rect = self._current_selection_rect
-        if rect is None or rect.isNull() or not self.pixmap():
-            return None
-        img_w, img_h = image_size
-        widget_w, widget_h = self.width(), self.height()
-        pixmap = self.pixmap()
-        pm_w, pm_h = pixmap.width(), pixmap.height()
-        # Calculate scale factor and padding (centered image)
-        scale = min(widget_w / img_w, widget_h / img_h)
-        disp_w, disp_h = img_w * scale, img_h * scale
-        pad_x = (widget_w - disp_w) / 2
-        pad_y = (widget_h - disp_h) / 2
-        # Map widget coords to image coords
-        x1 = int((rect.left() - pad_x) / scale)
-        y1 = int((rect.top() - pad_y) / scale)
-        x2 = int((rect.right() - pad_x) / scale)
-        y2 = int((rect.bottom() - pad_y) / scale)
-        # Clamp to image bounds
-        x1 = max(0, min(x1, img_w-1))
-        y1 = max(0, min(y1, img_h-1))
-        x2 = max(0, min(x2, img_w))
-        y2 = max(0, min(y2, img_h))
-        # Ensure left < right, top < bottom
-        left, right = sorted([x1, x2])
-        top, bottom = sorted([y1, y2])
-        if left == right or top == bottom:
-            return None
-        return (left, top, right, bottom)
-
-    def paintEvent(self, event):
-        super().paintEvent(event)
-        if self._current_selection_rect is not None and not self._current_selection_rect.isNull():
-            from PyQt6.QtGui import QColor, QPainter, QPen
-            painter = QPainter(self)
-            pen = QPen(QColor(255, 0, 0, 180), 2, Qt.PenStyle.DashLine)
-            painter.setPen(pen)
-            painter.setBrush(QColor(255, 0, 0, 40))  # semi-transparent fill
-            painter.drawRect(self._current_selection_rect)
+from src.core.operations import Operation
+from src.core.profiling import PROFILER
+from src.gui.effect_runner import EffectRunner
+from src.gui.image_bridge import qimage_from_image
+from src.gui.image_viewer import ImageViewer
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.image_processor = ImageProcessor()
+        # The processor, and with it Pillow and NumPy, is created on first use; see ``preload``.
+        self._image_processor = None
+        self._processor_lock = threading.Lock()
+        # Every processor call goes through the runner, off the GUI thread.
+        self.effect_runner = EffectRunner(self)
+        self.effect_runner.failed.connect(self.show_error)
+        self.effect_runner.busy_changed.connect(self.set_busy)
+        # Bumped whenever the preview is cleared, so results of older preview jobs are dropped.
+        self._preview_generation = 0
+        self._preview_effect = None
         self.sidebar_visible = True
         self.init_ui()
 
+    @property
+    def image_processor(self):
+        with self._processor_lock:
+            if self._image_processor is None:
+                from src.core.codecs import lean_codecs_requested, use_lean_codecs
+                from src.core.decode_cache import DecodeCache, decode_cache_requested
+                from src.core.image_processor import ImageProcessor
+
+                # Only the plugins of the formats we use are imported; the rest load on first need.
+                if lean_codecs_requested():
+                    use_lean_codecs()
+                # With BLURRIFY_DECODE_CACHE=1, files opened before are memory-mapped from the
+                # decoded-image cache instead of decoded.
+                processor = ImageProcessor(decode_cache=DecodeCache() if decode_cache_requested() else None)
+                # Edits are previewed on display proxies and rendered at full resolution on save.
+                processor.set_deferred(True)
+                self._image_processor = processor
+            return self._image_processor
+
+    def preload(self, on_done=None):
+        """Imports the image libraries and creates the processor on the worker, once the window is up."""
+        self.effect_runner.submit(lambda progress: self.image_processor, on_done=on_done)
+
+    def _image_size(self):
+        """Size of the open image, without loading the image libraries when nothing was opened yet."""
+        if self._image_processor is None:
+            return None
+        return self._image_processor.image_size()
+
     def init_ui(self):
         self.setWindowTitle('Blurrify - Image Processor')
         self.setMinimumSize(800, 600)
@@ -137,20 +83,19 @@ class MainWindow(QMainWindow):
         main_layout = QHBoxLayout(main_widget)
         main_layout.setContentsMargins(0, 0, 0, 0)
         self.setCentralWidget(main_widget)
+        self._main_layout = main_layout
 
-        # Create two sidebars - expanded and collapsed
+        # Initially show the expanded sidebar; the collapsed one is built on first use
         self.expanded_sidebar = self.create_expanded_sidebar()
-        self.collapsed_sidebar = self.create_collapsed_sidebar()
+        self.collapsed_sidebar = None
 
-        # Initially show expanded sidebar
-        self.collapsed_sidebar.hide()
-
-        # Add sidebars and image viewer to main layout
+        # Add sidebar and image viewer to main layout
         main_layout.addWidget(self.expanded_sidebar)
-        main_layout.addWidget(self.collapsed_sidebar)
 
         # Image viewer
         self.image_viewer = ImageViewer()
+        self.image_viewer.selection_completed.connect(lambda rect: self.clear_preview())
+        self.image_viewer.tiles_needed.connect(self.fetch_tiles)
         main_layout.addWidget(self.image_viewer, stretch=1)
 
         # Animation for expanded sidebar
@@ -158,6 +103,46 @@ class MainWindow(QMainWindow):
         self.sidebar_anim.setDuration(250)
         self.sidebar_anim.setEasingCurve(QEasingCurve.Type.InOutCubic)
 
+        # Undo/redo shortcuts
+        QShortcut(QKeySequence.StandardKey.Undo, self, activated=self.undo)
+        QShortcut(QKeySequence.StandardKey.Redo, self, activated=self.redo)
+
+        # Zoom; the wheel zooms around the cursor and the middle or right button pans
+        QShortcut(QKeySequence.StandardKey.ZoomIn, self, activated=lambda: self.image_viewer.zoom_by(2.0))
+        QShortcut(QKeySequence.StandardKey.ZoomOut, self, activated=lambda: self.image_viewer.zoom_by(0.5))
+        QShortcut(QKeySequence("Ctrl+0"), self, activated=self.image_viewer.fit_to_window)
+
+        # Performance overlay; profiling runs while it is shown, or for the whole session
+        # when BLURRIFY_PROFILE names a JSON lines file to write on exit.
+        QShortcut(QKeySequence("F12"), self, activated=self.toggle_hud)
+        self._profile_path = os.environ.get("BLURRIFY_PROFILE")
+        self._cprofile_path = os.environ.get("BLURRIFY_CPROFILE")
+        if self._profile_path or self._cprofile_path:
+            PROFILER.enable(memory=True, cprofile=bool(self._cprofile_path))
+        self.effect_runner.busy_changed.connect(self._refresh_hud)
+
+        # Progress of background jobs, shown once they take longer than a moment
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.hide()
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        self.effect_runner.progress.connect(self.progress_bar.setValue)
+        self._busy_timer = QTimer(self)
+        self._busy_timer.setSingleShot(True)
+        self._busy_timer.setInterval(150)
+        self._busy_timer.timeout.connect(self.progress_bar.show)
+
+        # Live preview while a dial turns: a coarse one once it pauses briefly, then the
+        # full display quality once it has been left alone.
+        self._coarse_preview_timer = QTimer(self)
+        self._coarse_preview_timer.setSingleShot(True)
+        self._coarse_preview_timer.setInterval(30)
+        self._coarse_preview_timer.timeout.connect(lambda: self.update_preview(coarse=True))
+        self._fine_preview_timer = QTimer(self)
+        self._fine_preview_timer.setSingleShot(True)
+        self._fine_preview_timer.setInterval(250)
+        self._fine_preview_timer.timeout.connect(lambda: self.update_preview(coarse=False))
+
     def create_expanded_sidebar(self):
         sidebar = QWidget()
         sidebar.setMaximumWidth(260)
@@ -223,6 +208,7 @@ class MainWindow(QMainWindow):
 
         # Connect blur dial to LCD
         self.blur_dial.valueChanged.connect(self.blur_lcd.display)
+        self.blur_dial.valueChanged.connect(lambda value: self.schedule_preview("Blur"))
 
         # Pixelate dial
         pixel_layout = QVBoxLayout()
@@ -252,6 +238,7 @@ class MainWindow(QMainWindow):
 
         # Connect pixel dial to LCD
         self.pixel_dial.valueChanged.connect(self.pixel_lcd.display)
+        self.pixel_dial.valueChanged.connect(lambda value: self.schedule_preview("Pixelate"))
 
         dials_layout.addLayout(blur_layout)
         dials_layout.addLayout(pixel_layout)
@@ -395,6 +382,10 @@ class MainWindow(QMainWindow):
         return sidebar
 
     def toggle_sidebar(self):
+        if self.collapsed_sidebar is None:
+            self.collapsed_sidebar = self.create_collapsed_sidebar()
+            self.collapsed_sidebar.hide()
+            self._main_layout.insertWidget(1, self.collapsed_sidebar)
         if self.sidebar_visible:
             self.expanded_sidebar.hide()
             self.collapsed_sidebar.show()
@@ -406,30 +397,162 @@ class MainWindow(QMainWindow):
     def apply_effect_type(self, effect_type):
         """Apply the specified effect type using the current dial values"""
         selection = self.image_viewer.get_selection_rect()
-        if selection is not None and not selection.isNull():
-            try:
-                current_image = self.image_processor.get_current_image()
-                if current_image is None:
-                    QMessageBox.warning(self, "Warning", "No image loaded!")
-                    return
-                image_size = current_image.size
-                region = self.image_viewer.get_selection_image_coords(image_size)
-                if not region:
-                    QMessageBox.warning(self, "Warning", "Please select a valid region!")
-                    return
-
-                if effect_type == "Blur":
-                    radius = self.blur_dial.value()
-                    if self.image_processor.apply_blur(region, radius):
-                        self.image_viewer.set_image(self.image_processor.get_current_image())
-                elif effect_type == "Pixelate":
-                    pixel_size = max(5, self.pixel_dial.value())  # Ensure minimum value
-                    if self.image_processor.pixelate_region(region, pixel_size):
-                        self.image_viewer.set_image(self.image_processor.get_current_image())
-            except ImageProcessingError as e:
-                QMessageBox.critical(self, "Error", str(e))
-        else:
+        if selection is None or selection.isNull():
             QMessageBox.warning(self, "Warning", "Please select a region first!")
+            return
+        image_size = self._image_size()
+        if image_size is None:
+            QMessageBox.warning(self, "Warning", "No image loaded!")
+            return
+        region = self.image_viewer.get_selection_image_coords(image_size)
+        if not region:
+            QMessageBox.warning(self, "Warning", "Please select a valid region!")
+            return
+
+        # The preview stays up until the refresh below shows the applied effect.
+        self._coarse_preview_timer.stop()
+        self._fine_preview_timer.stop()
+        # Applies are not keyed: each one is an edit of its own, and a failure reaches
+        # show_error through the runner's failed signal.
+        if effect_type == "Blur":
+            radius = self.blur_dial.value()
+            self.effect_runner.submit(lambda progress: self.image_processor.apply_blur(region, radius))
+        elif effect_type == "Pixelate":
+            pixel_size = max(5, self.pixel_dial.value())  # Ensure minimum value
+            self.effect_runner.submit(lambda progress: self.image_processor.pixelate_region(region, pixel_size))
+        self.refresh_image()
+
+    def _effect_operation(self, effect_type, region):
+        """The edit the dials currently describe for ``region``."""
+        if effect_type == "Blur":
+            return Operation("blur", region, radius=self.blur_dial.value())
+        return Operation("pixelate", region, pixel_size=max(5, self.pixel_dial.value()))
+
+    def _viewer_max_size(self):
+        viewer_size = self.image_viewer.size()
+        return (viewer_size.width(), viewer_size.height())
+
+    def schedule_preview(self, effect_type):
+        """Previews ``effect_type`` in the selection once the dial driving it settles."""
+        if self.image_viewer.get_selection_rect() is None or self._image_size() is None:
+            return
+        self._preview_effect = effect_type
+        self._coarse_preview_timer.start()
+        self._fine_preview_timer.start()
+
+    def update_preview(self, coarse):
+        """Computes the preview of the dial values on the display proxy and draws it over the selection.
+
+        Nothing is recorded and the full-resolution image is not touched; that only
+        happens when the effect is applied. A newer preview supersedes one in progress.
+        """
+        image_size = self._image_size()
+        if self._preview_effect is None or image_size is None:
+            return
+        region = self.image_viewer.get_selection_image_coords(image_size)
+        if not region:
+            return
+        operation = self._effect_operation(self._preview_effect, region)
+        max_size = self._viewer_max_size()
+        generation = self._preview_generation
+
+        def show_preview(result):
+            if generation == self._preview_generation:
+                self.image_viewer.set_preview(*result)
+
+        self.effect_runner.submit(
+            lambda progress: self.image_processor.preview_effect(operation, max_size, coarse=coarse),
+            key="preview", on_done=show_preview)
+
+    def clear_preview(self):
+        """Stops pending previews and removes the one shown."""
+        self._coarse_preview_timer.stop()
+        self._fine_preview_timer.stop()
+        self._preview_generation += 1
+        self._preview_effect = None
+        self.image_viewer.clear_preview()
+
+    def refresh_image(self):
+        """Shows the image with its pending edits at the resolution of the viewer, repainting only what changed.
+
+        The display is brought up to date on the worker; a newer refresh supersedes one
+        still in progress. Refreshes follow edits, so any effect preview is dropped once
+        the refreshed image is shown.
+        """
+        max_size = self._viewer_max_size()
+
+        def update_display(progress):
+            image, boxes = self.image_processor.display_update(max_size, progress)
+            image_size = self.image_processor.image_size()
+            if image is None or boxes is None:
+                # The processor keeps drawing on its display image, so hand a copy to the GUI thread.
+                return (image.copy() if image is not None else None), None, image_size
+            # Only the changed boxes are copied; the viewer already shows the rest.
+            return image.size, [(box, image.crop(box)) for box in boxes], image_size
+
+        def whole_display(progress):
+            return self.image_processor.get_display_image(max_size), None, self.image_processor.image_size()
+
+        def show_display(result):
+            shown, patches, image_size = result
+            if patches is None:
+                self.image_viewer.update_image(shown, None, image_size)
+            elif not self.image_viewer.update_boxes(shown, patches, image_size):
+                # The viewer shows another image than the one the boxes belong to.
+                self.effect_runner.submit(whole_display, key="display", on_done=show_display)
+                return
+            self.clear_preview()
+
+        self.effect_runner.submit(update_display, key="display", on_done=show_display)
+
+    def fetch_tiles(self, generation, tiles):
+        """Computes the display tiles the viewer asks for, with pending edits, on the worker.
+
+        A newer request supersedes one in progress; it lists every tile still missing.
+        """
+        def compute(progress):
+            images = []
+            for index, (key, box) in enumerate(tiles):
+                progress(index, len(tiles))
+                images.append((key, qimage_from_image(self.image_processor.display_tile(key[0], box))))
+            return images
+
+        self.effect_runner.submit(compute, key="tiles",
+                                  on_done=lambda images: self.image_viewer.add_tiles(generation, images))
+
+    def show_error(self, message):
+        QMessageBox.critical(self, "Error", message)
+
+    def set_busy(self, busy):
+        """Shows the progress bar for jobs that take longer than a moment."""
+        if busy:
+            self.progress_bar.setValue(0)
+            self._busy_timer.start()
+        else:
+            self._busy_timer.stop()
+            self.progress_bar.hide()
+
+    def toggle_hud(self):
+        visible = not self.image_viewer.hud_visible()
+        if not (self._profile_path or self._cprofile_path):
+            if visible:
+                PROFILER.enable()
+            else:
+                PROFILER.disable()
+        self.image_viewer.set_hud_visible(visible)
+
+    def _refresh_hud(self, busy):
+        """Repaints the overlay when jobs start or finish, since not every job repaints the image."""
+        if self.image_viewer.hud_visible():
+            self.image_viewer.update()
+
+    def closeEvent(self, event):
+        self.effect_runner.wait()
+        if self._profile_path:
+            PROFILER.dump_jsonl(self._profile_path)
+        if self._cprofile_path:
+            PROFILER.dump_cprofile(self._cprofile_path)
+        super().closeEvent(event)
 
     def apply_effect(self):
         """Legacy method for backward compatibility"""
@@ -443,33 +566,48 @@ class MainWindow(QMainWindow):
             "Image Files (*.png *.jpg *.jpeg)"
         )
         if file_path:
-            try:
-                if self.image_processor.open_image(file_path):
-                    self.image_viewer.set_image(self.image_processor.get_current_image())
-                    self.save_button.setEnabled(True)
-                    self.apply_blur_button.setEnabled(True)
-                    self.apply_pixel_button.setEnabled(True)
-                    self.reset_button.setEnabled(True)
-            except ImageProcessingError as e:
-                QMessageBox.critical(self, "Error", str(e))
+            self.effect_runner.submit(lambda progress: self.image_processor.open_image(file_path, lazy=True),
+                                      on_done=lambda opened: self.image_opened())
+
+    def image_opened(self):
+        self.image_viewer.clear_selection()
+        self.refresh_image()
+        self.save_button.setEnabled(True)
+        self.apply_blur_button.setEnabled(True)
+        self.apply_pixel_button.setEnabled(True)
+        self.reset_button.setEnabled(True)
 
     def save_image(self):
-        file_path, _ = QFileDialog.getSaveFileName(
+        from src.core.export import PRESETS
+
+        # One filter per encoder preset; the chosen filter picks the preset.
+        filters = {f"{preset.description} (*{preset.extension})": preset for preset in PRESETS.values()}
+        file_path, selected = QFileDialog.getSaveFileName(
             self,
             "Save Image",
             str(Path.home()),
-            "PNG Files (*.png);;JPEG Files (*.jpg *.jpeg)"
+            ";;".join(filters)
         )
         if file_path:
-            try:
-                if self.image_processor.save_image(file_path):
-                    QMessageBox.information(self, "Success", "Image saved successfully!")
-            except ImageProcessingError as e:
-                QMessageBox.critical(self, "Error", str(e))
+            preset = filters.get(selected, PRESETS["png"])
+            if not Path(file_path).suffix:
+                file_path += preset.extension
+            # A typed extension of another format wins over the filter, with that format's defaults.
+            preset_name = preset.name if preset.matches(file_path) else None
+            # Encoding runs on the worker, so the window stays responsive however long it takes.
+            self.effect_runner.submit(
+                lambda progress: self.image_processor.export_image(file_path, progress=progress, preset=preset_name),
+                on_done=lambda result: QMessageBox.information(
+                    self, "Success", f"Image saved successfully!\n{result.format()}"))
 
     def reset_image(self):
-        try:
-            if self.image_processor.reset_to_original():
-                self.image_viewer.set_image(self.image_processor.get_current_image())
-        except ImageProcessingError as e:
-            QMessageBox.critical(self, "Error", str(e))
\ No newline at end of file
+        self.effect_runner.submit(lambda progress: self.image_processor.reset_to_original())
+        self.refresh_image()
+
+    def undo(self):
+        self.effect_runner.submit(lambda progress: self.image_processor.undo())
+        self.refresh_image()
+
+    def redo(self):
+        self.effect_runner.submit(lambda progress: self.image_processor.redo())
+        self.refresh_image()
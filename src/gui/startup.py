@@ -0,0 +1,50 @@
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from PyQt6.QtCore import QEvent, QObject
+
+
+class StartupTimer(QObject):
+    """Records how long each startup stage took, up to the first paint of the main window.
+
+    ``mark`` ends the current stage. ``watch_first_paint`` marks the first paint event
+    of a widget and then calls ``on_painted``.
+    """
+
+    def __init__(self, start: Optional[float] = None):
+        super().__init__()
+        self.start = start if start is not None else time.perf_counter()
+        self._last = self.start
+        self.stages: List[Tuple[str, float]] = []
+        self._on_painted = None
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+    def watch_first_paint(self, widget, on_painted=None) -> None:
+        self._on_painted = on_painted
+        widget.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.Paint:
+            watched.removeEventFilter(self)
+            self.mark("first paint")
+            if self._on_painted is not None:
+                self._on_painted()
+        return False
+
+    def report(self) -> str:
+        lines = ["| stage | ms | since start (ms) |", "|---|---:|---:|"]
+        total = 0.0
+        for stage, seconds in self.stages:
+            total += seconds
+            lines.append(f"| {stage} | {seconds * 1000:.1f} | {total * 1000:.1f} |")
+        return "\n".join(lines)
+
+    def print_report(self) -> None:
+        # A frozen GUI build on Windows has no stderr.
+        if sys.stderr is not None:
+            print(self.report(), file=sys.stderr)
@@ -0,0 +1,113 @@
+import math
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Tuple
+
+Box = Tuple[int, int, int, int]
+TileKey = Tuple[int, int, int]  # level, column, row
+
+# Side of a display tile in pixels of its pyramid level.
+TILE_SIZE = 256
+
+DEFAULT_TILE_CACHE_BYTES = 128 * 1024 * 1024
+
+
+def level_size(size: Tuple[int, int], level: int) -> Tuple[int, int]:
+    """Size of pyramid ``level`` of an image of ``size``; each level halves, rounding up."""
+    width, height = size
+    for _ in range(level):
+        width, height = math.ceil(width / 2), math.ceil(height / 2)
+    return width, height
+
+
+def level_for_scale(scale: float, max_level: int) -> int:
+    """The coarsest pyramid level that still has at least one pixel per device pixel at ``scale``."""
+    if scale >= 1:
+        return 0
+    return max(0, min(int(math.floor(math.log2(1 / scale))), max_level))
+
+
+def tile_box(key: TileKey, size: Tuple[int, int]) -> Box:
+    """The box of tile ``key`` in pixels of its level, clipped to the level of an image of ``size``."""
+    level, column, row = key
+    width, height = level_size(size, level)
+    left, upper = column * TILE_SIZE, row * TILE_SIZE
+    return left, upper, min(left + TILE_SIZE, width), min(upper + TILE_SIZE, height)
+
+
+def tile_image_box(key: TileKey, size: Tuple[int, int]) -> Box:
+    """The box of tile ``key`` in full-resolution image coordinates."""
+    factor = 2 ** key[0]
+    left, upper, right, lower = tile_box(key, size)
+    return (left * factor, upper * factor, min(right * factor, size[0]), min(lower * factor, size[1]))
+
+
+def tiles_covering(box: Box, level: int, size: Tuple[int, int]) -> Iterator[TileKey]:
+    """Keys of the level ``level`` tiles that cover ``box``, given in full-resolution image coordinates."""
+    span = TILE_SIZE * 2 ** level
+    width, height = size
+    left, upper = max(0, int(box[0])), max(0, int(box[1]))
+    right, lower = min(width, math.ceil(box[2])), min(height, math.ceil(box[3]))
+    for row in range(upper // span, (lower - 1) // span + 1 if lower > upper else 0):
+        for column in range(left // span, (right - 1) // span + 1 if right > left else 0):
+            yield level, column, row
+
+
+def _overlaps(a: Box, b: Box) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+class TileCache:
+    """Least-recently-used display tiles of one image, with a byte budget.
+
+    Tiles are stored under (level, column, row) with their size in bytes. ``generation``
+    is bumped whenever tiles are invalidated, so tiles computed from older pixels can be
+    recognised and dropped when they arrive.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_TILE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.generation = 0
+        self.size: Tuple[int, int] = (0, 0)
+        self._tiles: "OrderedDict[TileKey, Any]" = OrderedDict()
+        self._sizes: Dict[TileKey, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def __contains__(self, key: TileKey) -> bool:
+        return key in self._tiles
+
+    def get(self, key: TileKey) -> Any:
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+        return tile
+
+    def put(self, key: TileKey, tile: Any, nbytes: int) -> None:
+        if key in self._tiles:
+            self.nbytes -= self._sizes.pop(key)
+            del self._tiles[key]
+        self._tiles[key] = tile
+        self._sizes[key] = nbytes
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes and len(self._tiles) > 1:
+            evicted, _ = self._tiles.popitem(last=False)
+            self.nbytes -= self._sizes.pop(evicted)
+
+    def invalidate(self, boxes: List[Box]) -> None:
+        """Drops the tiles overlapping any of ``boxes``, in full-resolution image coordinates."""
+        self.generation += 1
+        stale = [key for key in self._tiles
+                 if any(_overlaps(tile_image_box(key, self.size), box) for box in boxes)]
+        for key in stale:
+            del self._tiles[key]
+            self.nbytes -= self._sizes.pop(key)
+
+    def reset(self, size: Tuple[int, int]) -> None:
+        """Drops every tile, for a new image of ``size`` or one that changed everywhere."""
+        self.generation += 1
+        self.size = size
+        self._tiles.clear()
+        self._sizes.clear()
+        self.nbytes = 0
@@ -0,0 +1,84 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from src.cli.batch import collect_inputs, main, run_batch
+from src.core.operations import Operation
+
+
+@pytest.fixture
+def input_dir(tmp_path):
+    directory = tmp_path / "in"
+    directory.mkdir()
+    for i in range(4):
+        Image.effect_noise((64, 48), 64).convert('RGB').save(directory / f"img{i}.png")
+    (directory / "notes.txt").write_text("not an image")
+    return directory
+
+@pytest.fixture
+def recipe(tmp_path):
+    path = tmp_path / "recipe.json"
+    path.write_text(json.dumps({"operations": [
+        {"op": "blur", "region": [0, 0, 32, 32], "radius": 3},
+        {"op": "pixelate", "region": [32, 0, 64, 48], "pixel_size": 4},
+    ]}))
+    return str(path)
+
+def test_collect_inputs(input_dir):
+    by_dir = collect_inputs([str(input_dir)])
+    by_glob = collect_inputs([str(input_dir / "img*.png")])
+    assert len(by_dir) == 4
+    assert by_dir == by_glob
+
+@pytest.mark.parametrize("jobs,ordered", [(1, True), (2, True), (2, False)])
+def test_run_batch(input_dir, tmp_path, jobs, ordered):
+    inputs = collect_inputs([str(input_dir)])
+    operations = [Operation("blur", (0, 0, 32, 32), radius=3.0)]
+    results = list(run_batch(inputs, operations, str(tmp_path / "out"), jobs=jobs, ordered=ordered))
+    assert all(result.ok for result in results)
+    assert sorted(r.input_path for r in results) == inputs
+    if ordered:
+        assert [r.input_path for r in results] == inputs
+    assert len(list((tmp_path / "out").iterdir())) == 4
+
+def test_errors_do_not_stop_run(input_dir, tmp_path, recipe, capsys):
+    Image.new('RGB', (10, 10)).save(input_dir / "tiny.png")  # too small for the recipe regions
+    code = main([recipe, str(input_dir), "-o", str(tmp_path / "out"), "--jobs", "1"])
+    captured = capsys.readouterr()
+    assert code == 1
+    assert "tiny.png" in captured.err
+    assert "Processed 4 image(s), 1 failed" in captured.out
+    assert "images/s" in captured.out and "MB/s" in captured.out
+
+def test_batch_does_not_import_qt(input_dir, tmp_path, recipe):
+    script = (
+        "import sys, Blurrify; code = Blurrify.run_headless(sys.argv[1:]); "
+        "assert not any(m.startswith('PyQt6') for m in sys.modules), 'PyQt6 imported'; sys.exit(code)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script, "batch", recipe, str(input_dir), "-o", str(tmp_path / "out"), "-j", "1"],
+        capture_output=True, text=True, cwd=Path(__file__).resolve().parent.parent,
+    )
+    assert result.returncode == 0, result.stderr
+
+def test_batch_preset_sets_format(input_dir, tmp_path, recipe):
+    output = tmp_path / "out"
+    assert main([recipe, str(input_dir), "-o", str(output), "-j", "1", "--preset", "jpeg-web"]) == 0
+    assert sorted(p.name for p in output.iterdir()) == [f"img{i}.jpg" for i in range(4)]
+
+def test_inputs_with_the_same_output_are_reported(tmp_path, recipe, capsys):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        Image.effect_noise((64, 48), 64).convert('RGB').save(tmp_path / name / "same.png")
+    Image.effect_noise((64, 48), 64).convert('RGB').save(tmp_path / "a" / "same.jpg")
+    output = tmp_path / "out"
+    code = main([recipe, str(tmp_path / "a"), str(tmp_path / "b"), "-o", str(output), "-j", "2", "--format", "PNG"])
+    captured = capsys.readouterr()
+    assert code == 1
+    assert "Processed 1 image(s), 2 failed" in captured.out
+    assert captured.err.count("has the same output file as " + str(tmp_path / "a" / "same.jpg")) == 2
+    assert [p.name for p in output.iterdir()] == ["same.png"]
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageFilter
+
+from src.core.blur import ENGINES, MIN_FAST_AREA, blur_halo, get_engine, select_engine
+from src.core.image_processor import ImageProcessor
+
+
+@pytest.fixture
+def smooth_image():
+    rng = np.random.default_rng(0)
+    small = rng.integers(0, 256, (40, 40, 4), dtype=np.uint8)
+    return Image.fromarray(small, 'RGBA').resize((320, 320), Image.Resampling.BICUBIC)
+
+@pytest.fixture
+def noise_image():
+    return Image.effect_noise((333, 257), 64).convert('RGB')
+
+def _mean_error(a, b):
+    return np.abs(np.asarray(a, dtype=np.int16) - np.asarray(b, dtype=np.int16)).mean()
+
+@pytest.mark.parametrize("image", ["smooth_image", "noise_image"])
+@pytest.mark.parametrize("name,radius", [("box", 10.0), ("box", 40.0), ("downsample", 20.0), ("downsample", 30.0),
+                                         ("downsample", 60.0)])
+def test_engines_within_their_error_bound(request, image, name, radius):
+    image = request.getfixturevalue(image)
+    engine = get_engine(name)
+    reference = ENGINES["pillow"].blur(image, radius)
+    result = engine.blur(image, radius)
+    assert result.size == image.size and result.mode == image.mode
+    assert _mean_error(result, reference) <= engine.error_bound(radius)
+
+def test_separable_close_to_reference(smooth_image):
+    assert _mean_error(get_engine("separable").blur(smooth_image, 4.0), ENGINES["pillow"].blur(smooth_image, 4.0)) <= 1.0
+
+def test_select_engine():
+    assert select_engine(50, 100).name == "pillow"  # small regions stay on the reference
+    assert select_engine(2, MIN_FAST_AREA).name == "pillow"
+    assert select_engine(10, MIN_FAST_AREA).name == "box"
+    assert select_engine(60, MIN_FAST_AREA).name == "pillow"  # no faster engine is within one level there
+    assert select_engine(60, MIN_FAST_AREA, tolerance=2.5).name == "downsample"
+    assert select_engine(20, MIN_FAST_AREA, tolerance=0.0).name == "pillow"
+    for radius in range(1, 200, 3):
+        assert select_engine(radius, MIN_FAST_AREA).error_bound(radius) <= 1.0
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        get_engine("fft")
+
+def test_halo_covers_downsampling():
+    assert get_engine("downsample").halo(80) > blur_halo(80)
+
+def test_processor_uses_named_engine(tmp_path, smooth_image):
+    path = tmp_path / "smooth.png"
+    smooth_image.save(path)
+    results = {}
+    for name in ("pillow", "box"):
+        processor = ImageProcessor(blur_engine=name)
+        processor.open_image(str(path))
+        processor.apply_blur((0, 0, 320, 320), 10.0)
+        results[name] = processor.get_current_image()
+    assert results["pillow"].tobytes() == smooth_image.filter(ImageFilter.GaussianBlur(10)).tobytes()
+    assert results["pillow"].tobytes() != results["box"].tobytes()
@@ -0,0 +1,69 @@
+import pytest
+from PIL import Image
+
+from src.core.cache import EffectCache
+from src.core.image_processor import ImageProcessor
+
+
+@pytest.fixture
+def noise_image(tmp_path):
+    img = Image.effect_noise((120, 90), 64).convert('RGB')
+    img_path = tmp_path / "noise.png"
+    img.save(img_path)
+    return str(img_path)
+
+def test_cache_evicts_least_recently_used():
+    cache = EffectCache(max_bytes=3 * 10 * 10 * 4)
+    for key in "abc":
+        cache.put(key, Image.new('RGBA', (10, 10)))
+    assert cache.get("a") is not None  # "b" is now the oldest
+    cache.put("d", Image.new('RGBA', (10, 10)))
+    assert "b" not in cache and "a" in cache and "d" in cache
+    assert cache.nbytes == 3 * 10 * 10 * 4
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert cache.get("b") is None
+    assert cache.misses == 1
+
+def test_cache_skips_oversized_and_disabled():
+    cache = EffectCache(max_bytes=100)
+    cache.put("big", Image.new('RGBA', (10, 10)))
+    assert len(cache) == 0
+    disabled = EffectCache(max_bytes=0)
+    disabled.put("tiny", Image.new('L', (1, 1)))
+    assert len(disabled) == 0
+
+def test_reapply_after_undo_hits_cache(noise_image):
+    processor = ImageProcessor(blur_engine="pillow")
+    processor.open_image(noise_image)
+    processor.apply_blur((10, 10, 60, 60), 4.0)
+    blurred = processor.get_current_image()
+    processor.undo()
+    processor.apply_blur((10, 10, 60, 60), 8.0)
+    processor.undo()
+    processor.apply_blur((10, 10, 60, 60), 4.0)
+    assert processor.effect_cache.hits == 1
+    assert processor.effect_cache.misses == 2
+    assert processor.get_current_image().tobytes() == blurred.tobytes()
+
+def test_edited_content_misses_cache(noise_image):
+    processor = ImageProcessor()
+    processor.open_image(noise_image)
+    processor.pixelate_region((0, 0, 40, 40), 5)
+    processor.pixelate_region((0, 0, 40, 40), 5)  # same operation, but on pixelated content
+    assert processor.effect_cache.hits == 0
+
+def test_history_version_follows_undo_redo(noise_image):
+    processor = ImageProcessor()
+    processor.open_image(noise_image)
+    history = processor._history
+    opened = history.version
+    processor.apply_blur((10, 10, 50, 50), 3.0)
+    blurred = history.version
+    assert blurred != opened
+    processor.undo()
+    assert history.version == opened
+    processor.redo()
+    assert history.version == blurred
+    processor.undo()
+    processor.apply_blur((10, 10, 50, 50), 5.0)
+    assert history.version not in (opened, blurred)
@@ -0,0 +1,74 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import PIL.Image
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+# The lean registry changes Pillow's global state, so each test runs in a fresh interpreter.
+def run_script(script, *args):
+    result = subprocess.run([sys.executable, "-c", script, *map(str, args)], capture_output=True, text=True,
+                            cwd=ROOT, timeout=60)
+    assert result.returncode == 0, result.stderr
+
+def test_lean_codecs_open_and_save_without_loading_other_plugins(tmp_path):
+    PIL.Image.new("RGB", (8, 8), "red").save(tmp_path / "input.png")
+    script = (
+        "import sys; from src.core.codecs import lean_codecs_enabled, use_lean_codecs; "
+        "registered = use_lean_codecs(); assert 'PngImagePlugin' in registered; assert lean_codecs_enabled(); "
+        "from src.core.image_processor import ImageProcessor; processor = ImageProcessor(); "
+        "processor.open_image(sys.argv[1] + '/input.png'); "
+        "processor.save_image(sys.argv[1] + '/output.jpg'); processor.save_image(sys.argv[1] + '/output.webp'); "
+        "assert 'PIL.PsdImagePlugin' not in sys.modules, 'all plugins were loaded'; assert lean_codecs_enabled()"
+    )
+    run_script(script, tmp_path)
+    with PIL.Image.open(tmp_path / "output.jpg") as img:
+        assert img.format == "JPEG"
+
+def test_lean_codecs_load_other_plugins_on_first_need(tmp_path):
+    # Without a known extension Pillow cannot tell which plugin to try.
+    PIL.Image.new("RGB", (8, 8), "blue").save(tmp_path / "input.dat", format="PCX")
+    script = (
+        "import sys; from src.core.codecs import lean_codecs_enabled, use_lean_codecs; use_lean_codecs(); "
+        "from src.core.image_processor import ImageProcessor; processor = ImageProcessor(); "
+        "processor.open_image(sys.argv[1] + '/input.dat'); assert not lean_codecs_enabled(); "
+        "assert processor.get_current_image().getpixel((0, 0)) == (0, 0, 255, 255); "
+        "processor.save_image(sys.argv[1] + '/output.tga')"
+    )
+    run_script(script, tmp_path)
+    with PIL.Image.open(tmp_path / "output.tga") as img:
+        assert img.format == "TGA"
+
+def test_lean_codecs_resolve_unregistered_extension_on_save(tmp_path):
+    PIL.Image.new("RGB", (8, 8), "green").save(tmp_path / "input.png")
+    script = (
+        "import sys; from src.core.codecs import use_lean_codecs; use_lean_codecs(); "
+        "from src.core.image_processor import ImageProcessor; processor = ImageProcessor(); "
+        "processor.open_image(sys.argv[1] + '/input.png'); processor.save_image(sys.argv[1] + '/output.tga')"
+    )
+    run_script(script, tmp_path)
+    with PIL.Image.open(tmp_path / "output.tga") as img:
+        assert img.format == "TGA"
+
+def test_pillow_honours_the_initialized_flag():
+    # The lean registry relies on this private Pillow contract; this fails if a Pillow release drops it.
+    script = (
+        "import sys, PIL.Image; from src.core.codecs import lean_codecs_enabled, use_lean_codecs; use_lean_codecs(); "
+        "assert lean_codecs_enabled(); assert not PIL.Image.init(); PIL.Image.registered_extensions(); "
+        "assert 'PSD' not in PIL.Image.OPEN and 'PIL.PsdImagePlugin' not in sys.modules"
+    )
+    run_script(script)
+
+def test_lean_codecs_fall_back_when_the_flag_is_ignored(tmp_path):
+    PIL.Image.new("RGB", (8, 8), "red").save(tmp_path / "input.png")
+    script = (
+        "import sys, PIL.Image; full_init = PIL.Image.init\n"
+        "def init():\n    PIL.Image._initialized = 1\n    return full_init()\n"
+        "PIL.Image.init = init\n"
+        "from src.core.codecs import lean_codecs_enabled, open_file, use_lean_codecs\n"
+        "assert use_lean_codecs() == [] and not lean_codecs_enabled()\n"
+        "assert 'PSD' in PIL.Image.OPEN; open_file(sys.argv[1] + '/input.png').load()"
+    )
+    run_script(script, tmp_path)
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+from PIL import Image
+
+from src.core.decode_cache import DecodeCache, decode_cache_requested
+from src.core.image_processor import ImageProcessor
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "noise.png"
+    Image.effect_noise((120, 80), 40).convert('RGBA').save(path)
+    return str(path)
+
+@pytest.fixture
+def cache(tmp_path):
+    return DecodeCache(str(tmp_path / "cache"))
+
+def test_round_trip(cache, image_path):
+    assert cache.get(image_path) is None
+    image = Image.open(image_path).convert('RGBA')
+    cache.put(image_path, image)
+    cached = cache.get(image_path)
+    assert cached.size == image.size and cached.tobytes() == image.tobytes()
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_changed_file_misses(cache, image_path):
+    cache.put(image_path, Image.open(image_path).convert('RGBA'))
+    Image.new('RGBA', (120, 80), 'red').save(image_path)
+    os.utime(image_path, ns=(1, 1))
+    assert cache.get(image_path) is None
+
+def test_edits_stay_private(cache, image_path):
+    image = Image.open(image_path).convert('RGBA')
+    cache.put(image_path, image)
+    cached = cache.get(image_path)
+    cached.paste((255, 0, 0, 255), (0, 0, 50, 50))
+    assert cache.get(image_path).tobytes() == image.tobytes()
+
+def test_lru_eviction_and_purge(tmp_path, cache):
+    paths = []
+    for i in range(3):
+        path = str(tmp_path / f"img{i}.png")
+        Image.new('RGBA', (100, 100), (i, 0, 0, 255)).save(path)
+        paths.append(path)
+    entry_bytes = 100 * 100 * 4 + 24
+    cache.max_bytes = 2 * entry_bytes
+    cache.put(paths[0], Image.open(paths[0]))
+    cache.put(paths[1], Image.open(paths[1]))
+    os.utime(cache.entries()[1][0], ns=(1, 1))  # make img1 the least recently used
+    cache.put(paths[2], Image.open(paths[2]))
+    assert cache.get(paths[1]) is None
+    assert cache.get(paths[0]) is not None and cache.get(paths[2]) is not None
+    assert cache.purge() == 2 * entry_bytes
+    assert cache.entries() == [] and cache.nbytes == 0
+
+def test_corrupt_entry_is_ignored(cache, image_path):
+    cache.put(image_path, Image.open(image_path).convert('RGBA'))
+    with open(cache.entries()[0][0], "r+b") as f:
+        f.truncate(100)
+    assert cache.get(image_path) is None
+
+def test_processor_reopens_from_cache(cache, image_path):
+    first = ImageProcessor(decode_cache=cache)
+    first.open_image(image_path)
+    second = ImageProcessor(decode_cache=cache)
+    second.open_image(image_path)
+    assert cache.hits == 1
+    second.apply_blur((10, 10, 60, 60), 3)
+    assert second.get_current_image().tobytes() != first.get_current_image().tobytes()
+    assert second.undo()
+    assert second.get_current_image().tobytes() == first.get_current_image().tobytes()
+    assert ImageProcessor(decode_cache=cache).open_image(image_path)
+    assert cache.get(image_path).tobytes() == first.get_current_image().tobytes()
+
+def test_gui_cache_is_opt_in(monkeypatch):
+    monkeypatch.delenv("BLURRIFY_DECODE_CACHE", raising=False)
+    assert not decode_cache_requested()
+    monkeypatch.setenv("BLURRIFY_DECODE_CACHE", "0")
+    assert not decode_cache_requested()
+    monkeypatch.setenv("BLURRIFY_DECODE_CACHE", "1")
+    assert decode_cache_requested()
@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+from PyQt6.QtCore import QCoreApplication
+
+from src.core.image_processor import OperationCancelled
+from src.gui.effect_runner import EffectRunner
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+def test_jobs_run_in_order(app):
+    runner = EffectRunner()
+    results = []
+    for value in range(5):
+        runner.submit(lambda progress, value=value: value, on_done=results.append)
+    assert runner.wait(5000)
+    assert results == [0, 1, 2, 3, 4]
+
+def test_keyed_jobs_coalesce(app):
+    runner = EffectRunner()
+    release = threading.Event()
+    results = []
+    runner.submit(lambda progress: release.wait(5))
+    for value in range(4):
+        runner.submit(lambda progress, value=value: value, key="dial", on_done=results.append)
+    release.set()
+    assert runner.wait(5000)
+    assert results == [3]
+
+def test_newer_job_cancels_running_one(app):
+    runner = EffectRunner()
+    started, results, cancelled = threading.Event(), [], []
+
+    def slow(progress):
+        started.set()
+        try:
+            for step in range(500):
+                threading.Event().wait(0.01)
+                progress(step, 500)
+        except OperationCancelled:
+            cancelled.append(True)
+            raise
+        return "slow"
+
+    runner.submit(slow, key="preview", on_done=results.append)
+    started.wait(5)
+    runner.submit(lambda progress: "fast", key="preview", on_done=results.append)
+    assert runner.wait(10000)
+    assert cancelled and results == ["fast"]
+
+def test_failures_are_reported(app):
+    runner = EffectRunner()
+    errors = []
+    runner.failed.connect(errors.append)
+    runner.submit(lambda progress: 1 / 0)
+    assert runner.wait(5000)
+    assert errors and "division" in errors[0]
+
+def test_failing_callback_does_not_stall_the_queue(app):
+    runner = EffectRunner()
+    errors, results, busy = [], [], []
+    runner.failed.connect(errors.append)
+    runner.busy_changed.connect(busy.append)
+
+    def broken(result):
+        raise RuntimeError("callback failed")
+
+    runner.submit(lambda progress: 1, on_done=broken)
+    runner.submit(lambda progress: 2, on_done=results.append)
+    assert runner.wait(5000)
+    assert errors == ["callback failed"] and results == [2]
+    assert not runner.is_busy() and busy[-1] is False
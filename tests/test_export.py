@@ -0,0 +1,66 @@
+import os
+
+import pytest
+from PIL import Image
+
+from src.core.export import PRESETS, resolve_preset
+from src.core.image_processor import ImageProcessingError, ImageProcessor
+
+
+@pytest.fixture
+def photo_path(tmp_path):
+    image = Image.merge("RGBA", [
+        Image.linear_gradient("L").resize((320, 240)),
+        Image.effect_mandelbrot((320, 240), (-2.0, -1.2, 1.0, 1.2), 40),
+        Image.effect_noise((320, 240), 8),
+        Image.new("L", (320, 240), 255),
+    ])
+    path = tmp_path / "photo.png"
+    image.save(path)
+    return str(path)
+
+def test_resolve_preset():
+    assert resolve_preset("out.png").name == "png"
+    assert resolve_preset("out.JPG").name == "jpeg"
+    assert resolve_preset("out", format="jpg").name == "jpeg"
+    assert resolve_preset("out.bmp").format == "BMP"
+    assert resolve_preset("out.png", preset="png-fast").options == {"compress_level": 1}
+    with pytest.raises(ValueError):
+        resolve_preset("out.png", preset="tiff-magic")
+    with pytest.raises(ValueError):
+        resolve_preset("out.png", format="PNG", preset="jpeg-web")
+    assert PRESETS["jpeg-web"].matches("a.jpeg") and not PRESETS["jpeg-web"].matches("a.png")
+
+@pytest.mark.parametrize("tiled", [False, True])
+def test_png_presets_are_lossless(tmp_path, photo_path, tiled):
+    processor = ImageProcessor(tiled=tiled)
+    processor.open_image(photo_path)
+    expected = Image.open(photo_path).convert("RGBA").tobytes()
+    sizes = {}
+    for name in ("png-fast", "png", "png-optimized"):
+        path = str(tmp_path / f"{name}.png")
+        result = processor.export_image(path, preset=name)
+        assert result.nbytes == os.path.getsize(path)
+        assert result.seconds > 0
+        assert Image.open(path).convert("RGBA").tobytes() == expected
+        sizes[name] = result.nbytes
+    assert sizes["png-fast"] >= sizes["png-optimized"]
+
+def test_jpeg_presets(tmp_path, photo_path):
+    processor = ImageProcessor()
+    processor.open_image(photo_path)  # RGBA, which JPEG cannot store directly
+    processor.export_image(str(tmp_path / "web.jpg"), preset="jpeg-web")
+    processor.export_image(str(tmp_path / "high.jpg"), preset="jpeg-high")
+    with Image.open(tmp_path / "web.jpg") as web:
+        assert web.mode == "RGB"
+        assert web.info.get("progressive")
+    with Image.open(tmp_path / "high.jpg") as high:
+        assert not high.info.get("progressive")
+        assert high.layer[0][1:3] == high.layer[1][1:3]  # no chroma subsampling
+    assert processor.save_image(str(tmp_path / "default.jpeg"))
+
+def test_unknown_preset_raises(tmp_path, photo_path):
+    processor = ImageProcessor()
+    processor.open_image(photo_path)
+    with pytest.raises(ImageProcessingError):
+        processor.save_image(str(tmp_path / "out.png"), preset="nope")
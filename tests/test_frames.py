@@ -0,0 +1,141 @@
+import io
+import json
+
+import pytest
+from PIL import Image
+
+from src.cli.batch import main as batch_main
+from src.core.frames import DISPOSE_BACKGROUND, frame_count, read_frames
+from src.core.image_processor import ImageProcessingError, ImageProcessor
+from src.core.operations import Operation, apply_operations, frame_operations_from_json
+from src.core.pngwriter import ApngWriter
+
+SIZE = (96, 64)
+BLUR = Operation("blur", (0, 0, 48, 32), radius=4.0)
+PIXELATE = Operation("pixelate", (48, 32, 96, 64), pixel_size=8)
+
+
+def make_frames(count=5):
+    return [Image.effect_noise(SIZE, 30 + 10 * i).convert("RGB") for i in range(count)]
+
+def edited(frame, operations, directory):
+    """``frame`` with ``operations`` applied as a single image."""
+    path = directory / "frame.png"
+    frame.save(path)
+    processor = ImageProcessor()
+    processor.open_image(str(path))
+    apply_operations(processor, operations)
+    return processor.get_current_image()
+
+def test_apng_frames_are_edited_and_keep_timing(tmp_path):
+    frames = make_frames()
+    source = tmp_path / "in.png"
+    frames[0].save(source, save_all=True, append_images=frames[1:], duration=[40, 50, 60, 70, 80], loop=3,
+                   disposal=1)
+    output = tmp_path / "out.png"
+    count = ImageProcessor().stream_frames(str(source), str(output), [BLUR], {2: [PIXELATE]})
+    assert count == 5
+    with Image.open(output) as result:
+        assert result.n_frames == 5 and result.info["loop"] == 3
+        for index, frame in enumerate(frames):
+            result.seek(index)
+            assert result.info["duration"] == 40 + 10 * index
+            assert result.info["disposal"] == 1
+            expected = edited(frame, [BLUR, PIXELATE] if index == 2 else [BLUR], tmp_path)
+            assert result.convert("RGBA").tobytes() == expected.tobytes()
+
+def test_gif_keeps_frames_durations_and_disposal(tmp_path):
+    frames = make_frames()
+    source = tmp_path / "in.gif"
+    frames[0].save(source, save_all=True, append_images=frames[1:], duration=100, loop=0,
+                   disposal=DISPOSE_BACKGROUND)
+    output = tmp_path / "out.gif"
+    ImageProcessor().stream_frames(str(source), str(output), [], {1: [PIXELATE]})
+    with Image.open(output) as result:
+        assert result.n_frames == 5 and result.info["loop"] == 0
+        for index in range(5):
+            result.seek(index)
+            assert result.info["duration"] == 100
+            assert result.disposal_method == DISPOSE_BACKGROUND
+            block = result.convert("RGB").crop((48, 32, 56, 40))
+            colors = block.getcolors(64)
+            assert (colors is not None and len(colors) <= 2) == (index == 1)
+
+def test_tiff_pages_keep_compression_and_resolution(tmp_path):
+    pages = make_frames(3)
+    source = tmp_path / "in.tif"
+    pages[0].save(source, save_all=True, append_images=pages[1:], compression="tiff_lzw", dpi=(300, 300))
+    output = tmp_path / "out.tif"
+    ImageProcessor().stream_frames(str(source), str(output), [BLUR])
+    with Image.open(output) as result:
+        assert result.n_frames == 3
+        for index, page in enumerate(pages):
+            result.seek(index)
+            assert result.mode == "RGB"
+            assert result.info["compression"] == "tiff_lzw"
+            assert result.info["dpi"] == (300, 300)
+            assert result.convert("RGBA").tobytes() == edited(page, [BLUR], tmp_path).tobytes()
+
+def test_common_crop_sets_output_size(tmp_path):
+    frames = make_frames(3)
+    source = tmp_path / "in.png"
+    frames[0].save(source, save_all=True, append_images=frames[1:])
+    output = tmp_path / "out.gif"
+    ImageProcessor().stream_frames(str(source), str(output), [Operation("crop", (10, 10, 60, 40))])
+    with Image.open(output) as result:
+        assert result.size == (50, 30) and result.n_frames == 3
+
+def test_frame_sized_differently_is_an_error(tmp_path):
+    frames = make_frames(2)
+    source = tmp_path / "in.png"
+    frames[0].save(source, save_all=True, append_images=frames[1:])
+    with pytest.raises(ImageProcessingError, match="frame 1"):
+        ImageProcessor().stream_frames(str(source), str(tmp_path / "out.png"), [],
+                                       {1: [Operation("crop", (0, 0, 10, 10))]})
+
+def test_failed_stream_leaves_no_output(tmp_path):
+    frames = make_frames(4)
+    source = tmp_path / "in.gif"
+    frames[0].save(source, save_all=True, append_images=frames[1:])
+    data = source.read_bytes()
+    source.write_bytes(data[:len(data) * 2 // 3])  # later frames are cut off
+    output = tmp_path / "out.gif"
+    with pytest.raises(ImageProcessingError, match="frame 2"):
+        ImageProcessor().stream_frames(str(source), str(output), [BLUR])
+    assert list(tmp_path.iterdir()) == [source]
+
+def test_read_frames_yields_one_frame_at_a_time(tmp_path):
+    frames = make_frames(4)
+    source = tmp_path / "in.gif"
+    frames[0].save(source, save_all=True, append_images=frames[1:], duration=[10, 20, 30, 40])
+    assert frame_count(str(source)) == 4
+    stream = read_frames(str(source))
+    first, info = next(stream)
+    assert first.mode == "RGBA" and first.size == SIZE and info.index == 0 and info.duration == 10
+    assert [info.duration for _, info in stream] == [20, 30, 40]
+
+def test_apng_writer_checks_frame_count():
+    writer = ApngWriter(io.BytesIO(), SIZE, num_frames=2)
+    writer.write_frame(Image.new("RGBA", SIZE), 100)
+    with pytest.raises(ValueError, match="expected 2"):
+        writer.close()
+
+def test_frame_operations_from_json():
+    operations = frame_operations_from_json(json.dumps({
+        "operations": [], "frames": {"2": [{"op": "blur", "region": [0, 0, 8, 8], "radius": 2}]}}))
+    assert operations == {2: [Operation("blur", (0, 0, 8, 8), radius=2.0)]}
+    assert frame_operations_from_json("[]") == {}
+    with pytest.raises(ValueError, match="frame 'x'"):
+        frame_operations_from_json(json.dumps({"frames": {"x": []}}))
+
+def test_batch_streams_animations(tmp_path):
+    frames = make_frames(4)
+    inputs = tmp_path / "in"
+    inputs.mkdir()
+    frames[0].save(inputs / "anim.gif", save_all=True, append_images=frames[1:], duration=80)
+    frames[0].save(inputs / "still.gif")
+    recipe = tmp_path / "recipe.json"
+    recipe.write_text(json.dumps({"operations": [BLUR.to_dict()], "frames": {"3": [PIXELATE.to_dict()]}}))
+    assert batch_main([str(recipe), str(inputs), "-o", str(tmp_path / "out"), "-j", "1"]) == 0
+    assert frame_count(str(tmp_path / "out" / "anim.gif")) == 4
+    assert frame_count(str(tmp_path / "out" / "still.gif")) == 1
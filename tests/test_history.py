@@ -0,0 +1,91 @@
+import pytest
+from PIL import Image
+
+from src.core.history import EditHistory, RegionSnapshot
+from src.core.image_processor import ImageProcessor
+
+
+@pytest.fixture
+def noise_image(tmp_path):
+    img = Image.effect_noise((120, 90), 64).convert('RGB')
+    img_path = tmp_path / "noise.png"
+    img.save(img_path)
+    return str(img_path)
+
+def test_snapshot_round_trip():
+    img = Image.effect_noise((300, 280), 64).convert('RGBA')
+    box = (10, 10, 290, 280)
+    snapshot = RegionSnapshot(img, box)
+    target = Image.new('RGBA', img.size)
+    snapshot.restore(target)
+    assert target.crop(box).tobytes() == img.crop(box).tobytes()
+    assert len(snapshot.tiles) == 4
+
+def test_undo_redo_edits(noise_image):
+    processor = ImageProcessor()
+    processor.open_image(noise_image)
+    original = processor.get_current_image()
+    processor.apply_blur((10, 10, 50, 50), 3.0)
+    blurred = processor.get_current_image()
+    processor.pixelate_region((40, 40, 100, 80), 5)
+
+    assert processor.undo() is True
+    assert processor.get_current_image().tobytes() == blurred.tobytes()
+    assert processor.undo() is True
+    assert processor.get_current_image().tobytes() == original.tobytes()
+    assert processor.undo() is False
+
+    assert processor.redo() is True
+    assert processor.get_current_image().tobytes() == blurred.tobytes()
+
+def test_undo_crop_restores_size(noise_image):
+    processor = ImageProcessor()
+    processor.open_image(noise_image)
+    original = processor.get_current_image()
+    processor.apply_crop((10, 10, 60, 40))
+    assert processor.get_current_image().size == (50, 30)
+
+    processor.undo()
+    assert processor.get_current_image().tobytes() == original.tobytes()
+    processor.redo()
+    assert processor.get_current_image().size == (50, 30)
+
+def test_new_edit_clears_redo(noise_image):
+    processor = ImageProcessor()
+    processor.open_image(noise_image)
+    processor.apply_blur((10, 10, 50, 50), 3.0)
+    processor.undo()
+    processor.apply_blur((20, 20, 60, 60), 2.0)
+    assert processor.can_redo() is False
+
+def test_budget_evicts_oldest_steps():
+    img = Image.effect_noise((200, 200), 64).convert('RGBA')
+    history = EditHistory(max_bytes=60_000)
+    for _ in range(5):
+        history.record_edit(img.crop((0, 0, 100, 100)), (0, 0, 100, 100), img.size)
+    assert history.nbytes <= 60_000
+    assert history.truncated is True
+    assert history.can_undo() is True
+
+def test_reset_after_truncation_redecodes(noise_image):
+    processor = ImageProcessor(history_bytes=1)
+    processor.open_image(noise_image)
+    original = processor.get_current_image()
+    processor.apply_blur((10, 10, 50, 50), 3.0)
+    processor.apply_crop((0, 0, 60, 60))
+    assert processor.can_undo() is False
+
+    processor.reset_to_original()
+    assert processor.get_current_image().tobytes() == original.tobytes()
+
+def test_reset_replays_deltas(noise_image):
+    processor = ImageProcessor()
+    processor.open_image(noise_image)
+    original = processor.get_current_image()
+    processor.apply_blur((10, 10, 50, 50), 3.0)
+    processor.apply_crop((0, 0, 60, 60))
+    processor.pixelate_region((5, 5, 40, 40), 4)
+
+    processor.reset_to_original()
+    assert processor.get_current_image().tobytes() == original.tobytes()
+    assert processor.can_undo() is False
@@ -0,0 +1,33 @@
+from PIL import Image
+
+from src.gui.image_bridge import ImageBridge, qimage_from_image
+
+
+def test_bridge_shares_buffer_with_qimage():
+    bridge = ImageBridge()
+    bridge.set_image(Image.new('RGB', (20, 10), (10, 20, 30)))
+    assert bridge.qimage.pixelColor(5, 5).getRgb() == (10, 20, 30, 255)
+
+    edited = Image.new('RGBA', (20, 10), (10, 20, 30, 255))
+    edited.paste((200, 0, 0, 255), (2, 3, 6, 7))
+    bridge.update(edited, (2, 3, 6, 7))
+    assert bridge.qimage.pixelColor(4, 4).getRgb() == (200, 0, 0, 255)
+    assert bridge.image.getpixel((4, 4)) == (200, 0, 0, 255)
+    assert bridge.qimage.pixelColor(0, 0).getRgb() == (10, 20, 30, 255)
+
+def test_bridge_reallocates_on_resize():
+    bridge = ImageBridge()
+    bridge.set_image(Image.new('RGBA', (20, 10)))
+    bridge.set_image(Image.new('RGBA', (8, 6), (1, 2, 3, 4)))
+    assert bridge.size == (8, 6) and bridge.qimage.width() == 8
+    assert bridge.qimage.pixelColor(7, 5).getRgb() == (1, 2, 3, 4)
+
+def test_qimage_from_image_copies_pixels():
+    image = Image.effect_noise((37, 23), 60).convert('RGB')  # rows not a multiple of 16 bytes
+    qimage = qimage_from_image(image)
+    assert (qimage.width(), qimage.height()) == (37, 23)
+    for x, y in ((0, 0), (36, 22), (17, 9)):
+        assert qimage.pixelColor(x, y).getRgb() == image.getpixel((x, y)) + (255,)
+    before = qimage.pixelColor(17, 9).getRgb()
+    image.paste((255, 0, 255), (0, 0, 37, 23))
+    assert qimage.pixelColor(17, 9).getRgb() == before  # the QImage has its own copy
@@ -62,4 +62,71 @@ def test_reset_to_original(image_processor, test_image):
     reset_image = image_processor.get_current_image()
     assert reset_image.size == original.size
     reset_image = image_processor.get_current_image()
-    assert reset_image.size == original.size
\ No newline at end of file
+    assert reset_image.size == original.size
+
+@pytest.fixture
+def noise_image(tmp_path):
+    img = Image.effect_noise((120, 90), 64).convert('RGB')
+    img_path = tmp_path / "noise.png"
+    img.save(img_path)
+    return str(img_path)
+
+def test_apply_blur_matches_full_image_blur(image_processor, noise_image):
+    from PIL import ImageFilter
+    image_processor.open_image(noise_image)
+    original = image_processor.get_current_image()
+    region = (30, 20, 70, 60)
+    image_processor.apply_blur(region, 4.0)
+
+    expected = original.filter(ImageFilter.GaussianBlur(4.0)).crop(region)
+    assert image_processor.get_current_image().crop(region).tobytes() == expected.tobytes()
+
+def test_apply_blur_leaves_outside_region_untouched(image_processor, noise_image):
+    image_processor.open_image(noise_image)
+    original = image_processor.get_current_image()
+    image_processor.apply_blur((30, 20, 70, 60), 4.0)
+
+    result = image_processor.get_current_image()
+    assert result.crop((0, 0, 120, 20)).tobytes() == original.crop((0, 0, 120, 20)).tobytes()
+    assert result.crop((70, 0, 120, 90)).tobytes() == original.crop((70, 0, 120, 90)).tobytes()
+
+def test_failed_edit_rolls_back_region(image_processor, noise_image):
+    image_processor.open_image(noise_image)
+    original = image_processor.get_current_image()
+
+    def broken(crop):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        image_processor._edit_region((30, 20, 70, 60), broken)
+    assert image_processor.get_current_image().tobytes() == original.tobytes()
+
+@pytest.fixture
+def jpeg_image(tmp_path):
+    img = Image.effect_noise((800, 600), 32).convert('RGB')
+    img_path = tmp_path / "photo.jpg"
+    img.save(img_path)
+    return str(img_path)
+
+def test_lazy_open_defers_decode(image_processor, jpeg_image):
+    assert image_processor.open_image(jpeg_image, lazy=True) is True
+    assert image_processor.is_loaded() is False
+    assert image_processor.image_size() == (800, 600)
+
+    preview = image_processor.get_preview((200, 150))
+    assert preview.size == (200, 150)
+    assert image_processor.is_loaded() is False
+
+    image_processor.apply_blur((10, 10, 50, 50), 2.0)
+    assert image_processor.is_loaded() is True
+
+def test_lazy_open_matches_eager_open(image_processor, jpeg_image):
+    image_processor.open_image(jpeg_image, lazy=True)
+    lazy_pixels = image_processor.get_current_image().tobytes()
+    eager = ImageProcessor()
+    eager.open_image(jpeg_image)
+    assert lazy_pixels == eager.get_current_image().tobytes()
+
+def test_lazy_open_missing_file(image_processor):
+    with pytest.raises(FileNotFoundError):
+        image_processor.open_image("nonexistent.jpg", lazy=True)
@@ -0,0 +1,96 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Run in a fresh process: widgets need a QApplication, and other tests create a QCoreApplication.
+SETUP = """
+import math
+import sys
+from PIL import Image
+from PyQt6.QtCore import QPoint, Qt
+from PyQt6.QtTest import QTest
+from PyQt6.QtWidgets import QApplication
+app = QApplication([])
+from src.gui.main_window import MainWindow
+image = Image.effect_noise((3000, 2000), 60).convert("RGB")
+image.save(sys.argv[1])
+window = MainWindow()
+window.resize(1000, 700)
+window.show()
+viewer = window.image_viewer
+
+def settle():
+    for _ in range(10):
+        window.effect_runner.wait()
+        app.processEvents()
+        viewer.viewport().repaint()
+
+window.effect_runner.submit(lambda progress: window.image_processor.open_image(sys.argv[1], lazy=True),
+                            on_done=lambda opened: window.image_opened())
+settle()
+"""
+
+
+@pytest.fixture
+def run_viewer(tmp_path):
+    def run(script):
+        result = subprocess.run([sys.executable, "-c", SETUP + script, str(tmp_path / "big.png")],
+                                capture_output=True, text=True, cwd=ROOT, timeout=120,
+                                env=dict(os.environ, QT_QPA_PLATFORM="offscreen"))
+        assert result.returncode == 0, result.stderr
+    return run
+
+def test_zoomed_view_draws_full_resolution_tiles(run_viewer):
+    run_viewer("""
+assert viewer.image_size() == (3000, 2000) and viewer.zoom() < 0.3
+viewer.zoom_by(4.0 / viewer.zoom())
+viewer.centerOn(1500, 1000)
+settle()
+assert 0 < len(viewer._tiles) < 40, len(viewer._tiles)  # the visible ones; the image has 96 tiles
+shot = viewer.viewport().grab().toImage()
+for x in range(10, 600, 53):
+    for y in range(10, 500, 47):
+        point = viewer.mapToScene(QPoint(x, y))
+        expected = image.getpixel((int(point.x() + 0.5 / 4), int(point.y() + 0.5 / 4)))
+        assert shot.pixelColor(x, y).getRgb()[:3] == expected, (x, y)
+""")
+
+def test_selection_maps_to_image_pixels_and_repaints_union(run_viewer):
+    run_viewer("""
+viewer.zoom_by(3.0 / viewer.zoom())
+settle()
+updates = []
+viewport = viewer.viewport()
+update = viewport.update
+viewport.update = lambda *rect: (updates.append(rect), update(*rect))
+QTest.mousePress(viewport, Qt.MouseButton.LeftButton, pos=QPoint(100, 100))
+QTest.mouseMove(viewport, QPoint(200, 160))
+QTest.mouseMove(viewport, QPoint(260, 190))
+QTest.mouseRelease(viewport, Qt.MouseButton.LeftButton, pos=QPoint(260, 190))
+start, end = viewer.mapToScene(QPoint(100, 100)), viewer.mapToScene(QPoint(260, 190))
+region = viewer.get_selection_image_coords((3000, 2000))
+assert region == (math.floor(start.x()), math.floor(start.y()), math.ceil(end.x()), math.ceil(end.y())), region
+last = updates[-2][0]  # the move to (260, 190); it covers the previous and the new rectangle
+assert last.left() <= 100 and last.top() <= 100 and last.right() >= 260 and last.bottom() >= 190
+assert last.width() < viewport.width() / 2 and last.height() < viewport.height() / 2
+""")
+
+def test_refresh_hands_over_only_changed_boxes(run_viewer):
+    run_viewer("""
+window.refresh_image()  # the first refresh shows the whole display image
+settle()
+whole = []
+update_image = viewer.update_image
+viewer.update_image = lambda *args: (whole.append(args), update_image(*args))
+window.effect_runner.submit(lambda progress: window.image_processor.pixelate_region((100, 100, 900, 700), 40))
+window.refresh_image()
+settle()
+assert not whole  # the pixelated box was copied, not the display image
+display = window.image_processor.get_display_image(window._viewer_max_size())
+assert viewer._bridge.image.tobytes() == display.tobytes()
+""")
@@ -0,0 +1,100 @@
+import json
+import os
+
+import pytest
+from PIL import Image
+
+from src.cli.batch import main as batch_main, run_batch
+from src.cli.manifest import main as manifest_main
+from src.core.manifest import MANIFEST_NAME, Manifest, recipe_digest
+from src.core.operations import Operation, operations_from_json
+
+BLUR = [Operation("blur", (0, 0, 32, 32), radius=3.0)]
+
+
+@pytest.fixture
+def input_dir(tmp_path):
+    directory = tmp_path / "in"
+    directory.mkdir()
+    for i in range(4):
+        Image.effect_noise((64, 48), 64).convert("RGB").save(directory / f"img{i}.png")
+    return directory
+
+def incremental(input_dir, output, operations=BLUR, jobs=1, ordered=True):
+    inputs = sorted(str(path) for path in input_dir.iterdir())
+    return list(run_batch(inputs, operations, str(output), jobs=jobs, ordered=ordered, manifest=Manifest(str(output))))
+
+def test_rerun_processes_only_what_changed(input_dir, tmp_path):
+    output = tmp_path / "out"
+    assert not any(result.skipped for result in incremental(input_dir, output))
+    first = (output / "img0.png").read_bytes()
+    assert all(result.skipped for result in incremental(input_dir, output))
+
+    Image.new("RGB", (64, 48), "red").save(input_dir / "img1.png")
+    (input_dir / "copy.png").write_bytes((input_dir / "img2.png").read_bytes())
+    results = {os.path.basename(result.input_path): result for result in incremental(input_dir, output)}
+    assert [name for name, result in sorted(results.items()) if not result.skipped] == ["img1.png"]
+    assert (output / "copy.png").read_bytes() == (output / "img2.png").read_bytes()  # reused for the same contents
+    assert (output / "img0.png").read_bytes() == first
+
+    pixelate = [Operation("pixelate", (0, 0, 32, 32), pixel_size=4)]
+    assert not any(result.skipped for result in incremental(input_dir, output, pixelate))
+
+@pytest.mark.parametrize("jobs,ordered", [(1, True), (2, True), (2, False)])
+def test_skipped_and_processed_results_keep_order(input_dir, tmp_path, jobs, ordered):
+    output = tmp_path / "out"
+    incremental(input_dir, output)
+    Image.new("RGB", (64, 48), "blue").save(input_dir / "img2.png")
+    results = incremental(input_dir, output, jobs=jobs, ordered=ordered)
+    assert sorted(result.input_path for result in results) == sorted(str(path) for path in input_dir.iterdir())
+    if ordered:
+        assert [result.input_path for result in results] == sorted(str(path) for path in input_dir.iterdir())
+    assert [os.path.basename(result.input_path) for result in results if not result.skipped] == ["img2.png"]
+
+def test_recipe_digest():
+    same = operations_from_json('{"operations": [{"region": [0, 0, 32, 32], "radius": 3, "op": "blur"}]}')
+    assert recipe_digest(BLUR) == recipe_digest(same)
+    assert recipe_digest(BLUR) != recipe_digest(BLUR, format="JPEG")
+    assert recipe_digest(BLUR) != recipe_digest(BLUR, {0: BLUR})
+
+def test_verify_and_prune(input_dir, tmp_path, capsys):
+    output = tmp_path / "out"
+    incremental(input_dir, output)
+    assert manifest_main(["verify", str(output)]) == 0
+
+    (output / "img0.png").write_bytes(b"tampered")
+    Image.new("RGB", (64, 48)).save(input_dir / "img1.png")
+    (input_dir / "img2.png").unlink()
+    (output / "img3.png").unlink()
+    assert manifest_main(["verify", str(output)]) == 1
+    out = capsys.readouterr().out
+    assert "1 missing, 1 modified, 1 stale, 1 orphaned" in out
+
+    assert manifest_main(["prune", str(output)]) == 0
+    assert not (output / "img2.png").exists()  # the output of the deleted input
+    assert sorted(Manifest(str(output)).entries) == [str(input_dir / "img0.png"), str(input_dir / "img1.png")]
+
+def test_batch_incremental_flag(input_dir, tmp_path, capsys):
+    recipe = tmp_path / "recipe.json"
+    recipe.write_text(json.dumps({"operations": [op.to_dict() for op in BLUR]}))
+    args = [str(recipe), str(input_dir), "-o", str(tmp_path / "out"), "-j", "1", "--incremental"]
+    assert batch_main(args) == 0
+    assert (tmp_path / "out" / MANIFEST_NAME).exists()
+    capsys.readouterr()
+    assert batch_main(args) == 0
+    assert "Processed 0 image(s), 4 unchanged, 0 failed" in capsys.readouterr().out
+
+def test_overwritten_output_drops_the_old_entry(tmp_path):
+    output = tmp_path / "out"
+    output.mkdir()
+    first, second = tmp_path / "first.png", tmp_path / "second.png"
+    first.write_bytes(b"first")
+    second.write_bytes(b"second")
+    manifest = Manifest(str(output))
+    (output / "x.png").write_bytes(b"made from first")
+    manifest.record(str(first), "1", "r", str(output / "x.png"))
+    (output / "x.png").write_bytes(b"made from second!")
+    manifest.record(str(second), "2", "r", str(output / "x.png"))
+    manifest.save()
+    assert list(Manifest(str(output)).entries) == [str(second)]
+    assert manifest.find("1", "r") is None
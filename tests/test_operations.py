@@ -0,0 +1,164 @@
+import pytest
+from PIL import Image
+
+from src.core.image_processor import ImageProcessingError, ImageProcessor, OperationCancelled
+from src.core.operations import Operation, apply_operations, operations_from_json, operations_to_json, plan_operations
+
+
+def test_recipe_round_trip():
+    operations = [
+        Operation("blur", (0, 0, 10, 10), radius=4.0),
+        Operation("pixelate", (5, 5, 20, 20), pixel_size=6),
+        Operation("crop", (0, 0, 30, 30)),
+    ]
+    assert operations_from_json(operations_to_json(operations)) == operations
+
+def test_bare_list_recipe():
+    operations = operations_from_json('[{"op": "blur", "region": [1, 2, 3, 4], "radius": 2}]')
+    assert operations == [Operation("blur", (1, 2, 3, 4), radius=2.0)]
+
+@pytest.mark.parametrize("text", [
+    '[{"op": "sharpen", "region": [0, 0, 1, 1]}]',
+    '[{"op": "blur", "region": [0, 0, 1]}]',
+    '[{"op": "pixelate", "region": [0, 0, 1, 1]}]',
+    '{"ops": []}',
+])
+def test_invalid_recipes(text):
+    with pytest.raises(ValueError):
+        operations_from_json(text)
+
+def test_apply_operations(tmp_path):
+    path = tmp_path / "in.png"
+    Image.effect_noise((80, 60), 64).convert('RGB').save(path)
+    processor = ImageProcessor()
+    processor.open_image(str(path))
+    apply_operations(processor, [
+        Operation("blur", (0, 0, 40, 40), radius=3.0),
+        Operation("crop", (10, 10, 70, 50)),
+    ])
+    assert processor.get_current_image().size == (60, 40)
+
+def test_plan_drops_covered_edits():
+    operations = [
+        Operation("blur", (10, 10, 20, 20), radius=2.0),
+        Operation("blur", (10, 10, 20, 20), radius=5.0),
+        Operation("pixelate", (12, 12, 18, 18), pixel_size=3),
+        Operation("pixelate", (0, 0, 40, 40), pixel_size=4),
+    ]
+    passes = plan_operations(operations)
+    assert len(passes) == 1
+    assert passes[0].operation == operations[-1]
+    assert passes[0].paint == [(0, 0, 40, 40)]
+
+def test_plan_paints_only_visible_parts():
+    passes = plan_operations([
+        Operation("blur", (0, 0, 40, 40), radius=2.0),
+        Operation("pixelate", (20, 0, 60, 40), pixel_size=4),
+    ])
+    assert passes[0].paint == [(0, 0, 20, 40)]
+    assert passes[1].paint == [(20, 0, 60, 40)]
+
+def test_plan_fuses_overlapping_blurs():
+    passes = plan_operations([
+        Operation("blur", (0, 0, 40, 40), radius=3.0),
+        Operation("blur", (30, 30, 70, 70), radius=3.0),
+        Operation("blur", (200, 200, 220, 220), radius=3.0),
+        Operation("blur", (60, 0, 80, 20), radius=7.0),
+    ])
+    assert [p.operation.region for p in passes] == [(0, 0, 70, 70), (200, 200, 220, 220), (60, 0, 80, 20)]
+
+@pytest.fixture
+def noise_path(tmp_path):
+    path = tmp_path / "noise.png"
+    Image.effect_noise((160, 120), 64).convert('RGB').save(path)
+    return str(path)
+
+def test_deferred_render_matches_last_writer_wins(noise_path):
+    operations = [
+        Operation("blur", (10, 10, 60, 60), radius=2.0),
+        Operation("blur", (10, 10, 60, 60), radius=6.0),
+        Operation("blur", (50, 50, 100, 90), radius=6.0),
+        Operation("pixelate", (90, 20, 150, 70), pixel_size=5),
+    ]
+    deferred = ImageProcessor()
+    deferred.open_image(noise_path)
+    source = deferred.get_current_image()
+    deferred.set_deferred(True)
+    for operation in operations:
+        apply_operations(deferred, [operation])
+    assert deferred.pending_operations() == operations
+    deferred.render()
+
+    # Reference: every edit computed on the source, pasted in order.
+    expected = source.copy()
+    for operation in operations:
+        reference = ImageProcessor()
+        reference.open_image(noise_path)
+        apply_operations(reference, [operation])
+        expected.paste(reference.get_current_image().crop(operation.region), operation.region)
+    assert deferred.get_current_image().tobytes() == expected.tobytes()
+
+    deferred.undo()
+    assert deferred.get_current_image().tobytes() == source.tobytes()
+
+def test_deferred_undo_drops_pending(noise_path):
+    processor = ImageProcessor()
+    processor.open_image(noise_path)
+    processor.set_deferred(True)
+    processor.apply_blur((0, 0, 20, 20), 2.0)
+    processor.apply_blur((20, 20, 40, 40), 2.0)
+    assert processor.undo() is True
+    assert len(processor.pending_operations()) == 1
+    assert processor.redo() is True
+    assert len(processor.pending_operations()) == 2
+
+def test_replay_serialized_operations(noise_path, tmp_path):
+    processor = ImageProcessor()
+    processor.open_image(noise_path)
+    processor.set_deferred(True)
+    processor.apply_blur((0, 0, 50, 50), 3.0)
+    processor.pixelate_region((40, 40, 120, 100), 6)
+    recipe = operations_to_json(processor.pending_operations())
+    processor.render()
+    rendered = processor.get_current_image()
+
+    other = ImageProcessor()
+    other.open_image(noise_path)
+    other.apply_blur((5, 5, 20, 20), 1.0)
+    other.replay(operations_from_json(recipe))
+    assert other.get_current_image().tobytes() == rendered.tobytes()
+
+def test_cancelled_render_keeps_edits_pending(noise_path):
+    processor = ImageProcessor()
+    processor.open_image(noise_path)
+    original = processor.get_current_image()
+    processor.set_deferred(True)
+    processor.apply_blur((0, 0, 20, 20), 2.0)
+    processor.pixelate_region((60, 40, 100, 80), 5)
+
+    def cancel(done, total):
+        raise OperationCancelled()
+
+    with pytest.raises(OperationCancelled):
+        processor.render(cancel)
+    assert len(processor.pending_operations()) == 2
+    assert not processor._history.can_undo()
+    assert processor._current_image.tobytes() == original.tobytes()
+    assert processor.render() and not processor.pending_operations()
+
+def test_failed_render_keeps_edits_pending(noise_path, monkeypatch):
+    processor = ImageProcessor()
+    processor.open_image(noise_path)
+    processor.set_deferred(True)
+    processor.apply_blur((0, 0, 20, 20), 2.0)
+    processor.pixelate_region((60, 40, 100, 80), 5)
+
+    def fail(passes, progress=None):
+        raise MemoryError()
+
+    monkeypatch.setattr(processor, "_render_passes", fail)
+    with pytest.raises(ImageProcessingError):
+        processor.render()
+    assert len(processor.pending_operations()) == 2
+    monkeypatch.undo()
+    assert processor.render() and not processor.pending_operations()
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+from PIL import Image
+
+from src.cli.batch import main as batch_main
+from src.core.image_processor import ImageProcessor
+from src.core.parallel import TileEffect, TilePool, band_edges
+
+SIZE = (300, 420)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with TilePool(3, min_pixels=0) as pool:
+        yield pool
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / "noise.png"
+    Image.effect_noise(SIZE, 60).convert("RGBA").save(path)
+    return str(path)
+
+def edited(image_path, edit, tile_pool=None, **options):
+    processor = ImageProcessor(tile_pool=tile_pool, **options)
+    processor.open_image(image_path)
+    edit(processor)
+    return processor.get_current_image()
+
+def assert_same(a, b):
+    assert a.size == b.size and a.tobytes() == b.tobytes()
+
+@pytest.mark.parametrize("engine", ["pillow", "box", "separable"])
+@pytest.mark.parametrize("region,radius", [((0, 0, 300, 420), 9.0), ((20, 35, 280, 400), 2.5)])
+def test_parallel_blur_matches_single_process(pool, image_path, engine, region, radius):
+    def blur(processor):
+        processor.apply_blur(region, radius)
+    assert_same(edited(image_path, blur, pool, blur_engine=engine), edited(image_path, blur, blur_engine=engine))
+
+@pytest.mark.parametrize("aligned", [False, True])
+def test_parallel_pixelate_matches_single_process(pool, image_path, aligned):
+    def pixelate(processor):
+        processor.pixelate_region((13, 7, 291, 419), 9, aligned=aligned)
+    assert_same(edited(image_path, pixelate, pool), edited(image_path, pixelate))
+
+def test_band_edges():
+    blur = TileEffect("blur", 4.0)
+    assert band_edges(1000, 4, blur) == [0, 250, 500, 750, 1000]
+    assert band_edges(100, 4, blur) == [0, 64, 100]  # bands are at least MIN_BAND_ROWS
+    pixelate = TileEffect("pixelate", 10, offset=(0, 3))
+    edges = band_edges(1000, 4, pixelate)
+    assert all((edge + 3) % 10 == 0 for edge in edges[1:-1])
+
+def test_small_regions_stay_in_process(image_path):
+    pool = TilePool(2)
+    edited(image_path, lambda processor: processor.apply_blur((0, 0, 100, 100), 3.0), pool)
+    assert pool._executor is None
+    assert not TilePool(2, min_pixels=0).accepts((0, 0, 100, 100), "P")
+
+def test_batch_tile_workers(tmp_path, image_path):
+    recipe = tmp_path / "recipe.json"
+    recipe.write_text(json.dumps({"operations": [{"op": "blur", "region": [0, 0, 300, 420], "radius": 6}]}))
+    assert batch_main([str(recipe), image_path, "-o", str(tmp_path / "out"), "-j", "1", "--tile-workers", "2"]) == 0
+    with Image.open(tmp_path / "out" / "noise.png") as result:
+        assert result.size == SIZE
@@ -0,0 +1,101 @@
+import json
+import random
+
+import pytest
+from PIL import Image, ImageDraw
+
+from src.cli.batch import main as batch_main
+from src.cli.index import main as index_main
+from src.core.operations import Operation
+from src.core.phash import (IndexEntry, MultiIndexHash, RecipeIndex, average_hash, difference_hash, fingerprint,
+                            hamming, merge_operations, scale_operations)
+
+
+def screen(variant=0):
+    """A fake app screenshot: panels and text lines, with ``variant`` changing a few words."""
+    image = Image.new("RGB", (400, 300), (240, 240, 240))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, 400, 40), fill=(30, 60, 120))
+    draw.rectangle((20, 60, 180, 280), fill=(255, 255, 255), outline=(200, 200, 200))
+    for row in range(8):
+        draw.rectangle((200, 60 + row * 25, 380 - (row * 37 + variant * 11) % 90, 70 + row * 25), fill=(90, 90, 90))
+    return image
+
+def test_near_duplicates_have_close_hashes():
+    original, edited = screen(), screen(variant=1)
+    other = Image.effect_noise((400, 300), 80).convert("RGB")
+    for hash_function in (average_hash, difference_hash):
+        assert hamming(hash_function(original), hash_function(original.resize((200, 150)))) <= 2
+        assert hamming(hash_function(original), hash_function(edited)) <= 6
+        assert hamming(hash_function(original), hash_function(other)) > 12
+
+@pytest.mark.parametrize("chunks", [4, 8])
+def test_multi_index_search_matches_linear_scan(chunks):
+    rng = random.Random(1)
+    centres = [rng.getrandbits(64) for _ in range(20)]
+    keys = [centre ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for centre in centres for _ in range(50)]
+    hashes = MultiIndexHash(chunks)
+    for number, key in enumerate(keys):
+        hashes.add(key, number)
+    assert len(hashes) == len(keys) == len(list(hashes))
+    for query in centres[:5] + [rng.getrandbits(64)]:
+        for radius in (0, 3, 12):
+            expected = sorted((hamming(query, key), number) for number, key in enumerate(keys)
+                              if hamming(query, key) <= radius)
+            assert sorted(hashes.search(query, radius)) == expected
+
+def test_scale_operations_grow_outward():
+    operations = [Operation("blur", (10, 11, 21, 33), radius=4.0), Operation("pixelate", (0, 0, 5, 5), pixel_size=8)]
+    scaled = scale_operations(operations, (100, 100), (150, 50))
+    assert [op.region for op in scaled] == [(15, 5, 32, 17), (0, 0, 8, 3)]
+    assert scaled[0].radius == 4.0 and scaled[1].pixel_size == 8
+    assert scale_operations(operations, (100, 100), (100, 100)) == operations
+
+def test_merge_operations_keeps_the_recipe():
+    blur = Operation("blur", (0, 0, 10, 10), radius=2.0)
+    crop = Operation("crop", (0, 0, 50, 50))
+    pixelate = Operation("pixelate", (20, 20, 40, 40), pixel_size=8)
+    reused = [pixelate, blur, crop, Operation("blur", (1, 1, 5, 5), radius=9.0)]
+    assert merge_operations([blur, crop], reused) == [pixelate, blur, crop]
+    assert merge_operations([], reused) == [pixelate, blur]
+
+def test_index_persists_and_matches(tmp_path):
+    path = tmp_path / "in.png"
+    screen().save(path)
+    key, size = fingerprint(str(path))
+    index = RecipeIndex(str(tmp_path / "index.jsonl"))
+    index.add(IndexEntry(key, size, [Operation("blur", (20, 60, 180, 280), radius=8.0)], str(path)))
+    with open(tmp_path / "index.jsonl", "a") as f:
+        f.write("not json\n")
+    reloaded = RecipeIndex(str(tmp_path / "index.jsonl"))
+    assert len(reloaded) == 1
+    distance, entry = reloaded.match(difference_hash(screen(variant=2)))
+    assert entry.source == str(path) and entry.operations[0].region == (20, 60, 180, 280)
+    assert reloaded.match(key ^ 0xFFFF) is None
+
+def test_batch_reuses_regions_of_near_duplicates(tmp_path, capsys):
+    known, new = tmp_path / "known", tmp_path / "new"
+    known.mkdir()
+    new.mkdir()
+    screen().save(known / "login.png")
+    screen(variant=3).save(new / "login-again.png")
+    Image.effect_noise((400, 300), 80).convert("RGB").save(new / "other.png")
+    login = tmp_path / "login.json"
+    login.write_text(json.dumps({"operations": [{"op": "pixelate", "region": [20, 60, 180, 280], "pixel_size": 16}]}))
+    default = tmp_path / "default.json"
+    default.write_text(json.dumps({"operations": [{"op": "blur", "region": [0, 0, 10, 10], "radius": 2}]}))
+    index = str(tmp_path / "index.jsonl")
+
+    assert index_main(["--index", index, "add", str(login), str(known)]) == 0
+    assert index_main(["--index", index, "match", str(new), "--write", str(tmp_path / "proposed")]) == 0
+    proposed = json.loads((tmp_path / "proposed" / "login-again.json").read_text())
+    assert proposed == json.loads(login.read_text())
+    assert not (tmp_path / "proposed" / "other.json").exists()
+
+    assert batch_main([str(default), str(new), "-o", str(tmp_path / "out"), "-j", "1", "--index", index]) == 0
+    assert "regions of " + str(known / "login.png") in capsys.readouterr().out
+    with Image.open(tmp_path / "out" / "login-again.png") as result, \
+            Image.open(new / "login-again.png") as original:
+        assert len(result.crop((20, 60, 36, 76)).getcolors()) == 1  # one pixelation cell
+        assert result.crop((0, 0, 10, 10)).tobytes() != original.crop((0, 0, 10, 10)).tobytes()  # and the recipe
+    assert len(RecipeIndex(index)) == 2  # the unmatched image was added with the default recipe
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.image_processor import ImageProcessor
+from src.core.operations import Operation
+from src.core.pixelate import block_means, pixelate_array, pixelate_image
+
+
+def _reference(pixels, block, offset):
+    """Averages every grid cell one pixel at a time."""
+    result = np.empty_like(pixels)
+    height, width = pixels.shape[:2]
+    for y in range(height):
+        for x in range(width):
+            top = max(0, (y + offset[1]) // block * block - offset[1])
+            left = max(0, (x + offset[0]) // block * block - offset[0])
+            bottom = (y + offset[1]) // block * block + block - offset[1]
+            right = (x + offset[0]) // block * block + block - offset[0]
+            cell = pixels[top:bottom, left:right].reshape(-1, pixels.shape[2]).astype(np.int64)
+            result[y, x] = (cell.sum(axis=0) + len(cell) // 2) // len(cell)
+    return result
+
+@pytest.mark.parametrize("shape,block,offset", [
+    ((40, 40), 8, (0, 0)),     # whole cells only
+    ((37, 29), 5, (0, 0)),     # ragged trailing cells
+    ((37, 29), 5, (3, 2)),     # ragged leading and trailing cells
+    ((4, 3), 5, (1, 1)),       # smaller than one cell
+    ((20, 33), 300, (7, 9)),   # large blocks
+])
+def test_pixelate_array_matches_reference(shape, block, offset):
+    pixels = np.random.default_rng(0).integers(0, 256, shape + (3,), dtype=np.uint8)
+    assert np.array_equal(pixelate_array(pixels, block, offset), _reference(pixels, block, offset))
+
+def test_block_means_shape():
+    pixels = np.zeros((10, 11), dtype=np.uint8)
+    assert block_means(pixels, 3).shape == (4, 4)
+    assert block_means(pixels, 3, (2, 0)).shape == (4, 5)  # ragged cells on both sides of each row
+
+def test_pixelate_image_bands_match_array(monkeypatch):
+    import src.core.pixelate
+    monkeypatch.setattr(src.core.pixelate, "BAND_BYTES", 2000)
+    pixels = np.random.default_rng(1).integers(0, 256, (153, 71, 4), dtype=np.uint8)
+    image = Image.fromarray(pixels, 'RGBA')
+    for offset in [(0, 0), (5, 8)]:
+        result = pixelate_image(image, 6, offset)
+        assert np.array_equal(np.asarray(result), pixelate_array(pixels, 6, offset))
+
+@pytest.mark.parametrize("mode", ['P', '1', 'I;16'])
+def test_pixelate_image_keeps_mode(mode):
+    image = Image.new('RGB', (30, 20), (10, 200, 30)).convert(mode)
+    result = pixelate_image(image, 4)
+    assert result.mode == mode and result.size == image.size
+
+def test_pixelate_region_averages():
+    processor = ImageProcessor()
+    processor._current_image = Image.new('RGBA', (8, 8), (0, 0, 0, 255))
+    processor._current_image.paste((200, 100, 50, 255), (0, 0, 2, 4))
+    assert processor.pixelate_region((0, 0, 4, 4), 4)
+    assert processor.get_current_image().getpixel((3, 3)) == (100, 50, 25, 255)
+
+def test_pixelate_region_aligned_grid():
+    pixels = np.random.default_rng(2).integers(0, 256, (40, 40, 4), dtype=np.uint8)
+    whole = ImageProcessor()
+    whole._current_image = Image.fromarray(pixels, 'RGBA')
+    whole.pixelate_region((0, 0, 40, 40), 8)
+    halves = ImageProcessor()
+    halves._current_image = Image.fromarray(pixels, 'RGBA')
+    halves.pixelate_region((0, 0, 13, 40), 8, aligned=True)
+    halves.pixelate_region((13, 0, 40, 40), 8, aligned=True)
+    left = np.asarray(halves.get_current_image())[:, :8]
+    right = np.asarray(halves.get_current_image())[:, 16:]
+    assert np.array_equal(left, np.asarray(whole.get_current_image())[:, :8])
+    assert np.array_equal(right, np.asarray(whole.get_current_image())[:, 16:])
+
+def test_aligned_operation_round_trip():
+    operation = Operation("pixelate", (1, 2, 30, 40), pixel_size=8, aligned=True)
+    assert operation.to_dict()["aligned"] is True
+    assert Operation.from_dict(operation.to_dict()) == operation
+    assert "aligned" not in Operation("pixelate", (1, 2, 30, 40), pixel_size=8).to_dict()
@@ -0,0 +1,82 @@
+import json
+import pstats
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.image_processor import ImageProcessor
+from src.core.profiling import PROFILER, Profiler, profiled
+
+
+@pytest.fixture
+def profiler():
+    PROFILER.clear()
+    yield PROFILER
+    PROFILER.disable()
+    PROFILER.clear()
+
+@pytest.fixture
+def processor(tmp_path):
+    path = tmp_path / "noise.png"
+    Image.effect_noise((200, 100), 40).convert('RGB').save(path)
+    processor = ImageProcessor()
+    processor.open_image(str(path))
+    return processor
+
+def test_disabled_records_nothing(profiler, processor):
+    processor.apply_blur((0, 0, 50, 50), 3)
+    assert len(profiler.records) == 0
+
+def test_records_operations(profiler, processor):
+    profiler.enable()
+    processor.apply_blur((0, 0, 50, 40), 3)
+    processor.pixelate_region((50, 0, 100, 100), 8)
+    names = [record.name for record in profiler.records]
+    assert names == ["apply_blur", "pixelate_region"]
+    blur = profiler.records[0]
+    assert blur.pixels == 2000 and blur.seconds > 0 and blur.category == "processor"
+    assert blur.peak_bytes is None  # memory not traced
+    assert profiler.last("processor").name == "pixelate_region"
+
+def test_memory_and_errors(profiler):
+    @profiled("allocate")
+    def allocate(fail=False):
+        data = np.ones(1 << 20, dtype=np.uint8)
+        if fail:
+            raise ValueError("boom")
+        return data
+
+    profiler.enable(memory=True)
+    kept = allocate()
+    with pytest.raises(ValueError):
+        allocate(fail=True)
+    ok, failed = profiler.records
+    assert ok.allocated_bytes >= kept.nbytes and ok.peak_bytes >= kept.nbytes
+    assert failed.error == "ValueError: boom"
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="resident memory is read from /proc")
+def test_memory_includes_pillow_buffers(profiler, tmp_path):
+    path = tmp_path / "large.png"
+    Image.new("RGB", (3000, 3000), "white").save(path)
+    processor = ImageProcessor()
+    profiler.enable(memory=True)
+    processor.open_image(str(path))
+    record = profiler.last("processor")
+    assert record.name == "open_image"
+    # tracemalloc alone sees a few hundred kilobytes of the 27 MB of decoded pixels.
+    assert record.peak_bytes >= 3000 * 3000 * 3 * 0.9
+
+def test_ring_buffer_and_dumps(tmp_path):
+    profiler = Profiler(capacity=3)
+    profiler.enable(cprofile=True)
+    work = profiler.call
+    for index in range(5):
+        work(f"step{index}", "processor", sum, (range(1000),), {})
+    assert [record.name for record in profiler.records] == ["step2", "step3", "step4"]
+    assert profiler.dump_jsonl(str(tmp_path / "profile.jsonl")) == 3
+    lines = (tmp_path / "profile.jsonl").read_text().splitlines()
+    assert json.loads(lines[0])["name"] == "step2"
+    assert profiler.dump_cprofile(str(tmp_path / "profile.prof"))
+    assert pstats.Stats(str(tmp_path / "profile.prof")).total_calls > 0
@@ -0,0 +1,146 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.image_processor import ImageProcessor
+from src.core.operations import Operation
+from src.core.proxy import ProxyPyramid, scale_box
+
+
+@pytest.fixture
+def noise_image(tmp_path):
+    pixels = np.random.default_rng(0).integers(0, 256, (700, 1001, 3), dtype=np.uint8)
+    img_path = tmp_path / "noise.png"
+    Image.fromarray(pixels).save(img_path)
+    return str(img_path)
+
+def test_pyramid_levels():
+    pyramid = ProxyPyramid(Image.new('RGBA', (1001, 700)))
+    assert [level.size for level in pyramid.levels] == [(501, 350), (251, 175)]
+    assert pyramid.level_for((2000, 2000)) == 0
+    assert pyramid.level_for((600, 600)) == 0  # half size would be smaller than the fitted image
+    assert pyramid.level_for((500, 500)) == 1
+    assert pyramid.level_for((100, 100)) == 2
+
+def test_scale_box():
+    assert scale_box((3, 5, 9, 10), 2, (100, 100)) == (1, 2, 5, 5)
+    assert scale_box((3, 5, 4, 6), 4, (100, 100)) == (0, 1, 1, 2)
+
+def test_pyramid_update_matches_rebuild():
+    image = Image.fromarray(np.random.default_rng(1).integers(0, 256, (700, 1001, 4), dtype=np.uint8))
+    pyramid = ProxyPyramid(image)
+    image.paste((255, 0, 0, 255), (301, 99, 777, 411))
+    pyramid.update(image, (301, 99, 777, 411))
+    rebuilt = ProxyPyramid(image)
+    for updated, expected in zip(pyramid.levels, rebuilt.levels):
+        assert updated.tobytes() == expected.tobytes()
+
+def test_display_image_previews_pending_edits(noise_image):
+    processor = ImageProcessor()
+    processor.set_deferred(True)
+    processor.open_image(noise_image)
+    before = processor.get_display_image((400, 400))
+    assert before.size == (501, 350)
+    processor.pixelate_region((100, 100, 500, 400), 20)
+    after = processor.get_display_image((400, 400))
+    assert after.crop((50, 50, 250, 200)).tobytes() != before.crop((50, 50, 250, 200)).tobytes()
+    assert after.crop((300, 250, 500, 350)).tobytes() == before.crop((300, 250, 500, 350)).tobytes()
+    assert processor.pending_operations()  # nothing rendered at full resolution
+    assert not processor._history.can_undo()
+
+    processor.undo()
+    assert processor.get_display_image((400, 400)).tobytes() == before.tobytes()
+
+def test_proxies_follow_render_and_undo(noise_image):
+    processor = ImageProcessor()
+    processor.open_image(noise_image)
+    processor.get_display_image((300, 300))
+    processor.apply_blur((10, 10, 300, 200), 6.0)
+    expected = ProxyPyramid(processor.get_current_image())
+    assert processor._pyramid.levels[-1].tobytes() == expected.levels[-1].tobytes()
+    processor.undo()
+    original = ProxyPyramid(processor.get_current_image())
+    assert processor.get_display_image((300, 300)).tobytes() == original.image(1).tobytes()
+
+def test_display_update_reports_changed_boxes(noise_image):
+    processor = ImageProcessor()
+    processor.set_deferred(True)
+    processor.open_image(noise_image)
+    _, boxes = processor.display_update((400, 400))
+    assert boxes is None  # first display
+    assert processor.display_update((400, 400))[1] == []
+    processor.apply_blur((100, 100, 300, 200), 4.0)
+    assert processor.get_display_image((400, 400)) is not None  # does not consume the change
+    _, boxes = processor.display_update((400, 400))
+    assert boxes == [(50, 50, 150, 100)]
+    processor.render()
+    _, boxes = processor.display_update((400, 400))
+    assert boxes == [(50, 50, 150, 100)]
+    assert processor.display_update((200, 200))[1] is None  # another level
+
+def test_preview_effect_matches_applied_display(noise_image):
+    processor = ImageProcessor()
+    processor.set_deferred(True)
+    processor.open_image(noise_image)
+    operation = Operation("pixelate", (100, 100, 500, 400), pixel_size=20)
+    patch, box = processor.preview_effect(operation, (400, 400))
+    coarse, coarse_box = processor.preview_effect(operation, (400, 400), coarse=True)
+    assert box == coarse_box == (50, 50, 250, 200)
+    assert patch.size == coarse.size == (200, 150)
+    assert not processor.pending_operations()  # nothing recorded
+    assert processor.display_update((400, 400))[1] is None
+
+    processor.pixelate_region((100, 100, 500, 400), 20)
+    assert processor.get_display_image((400, 400)).crop(box).tobytes() == patch.tobytes()
+
+def test_preview_effect_reuses_computed_values(noise_image):
+    processor = ImageProcessor()
+    processor.set_deferred(True)
+    processor.open_image(noise_image)
+    previews = {}
+    for radius in (4.0, 8.0, 4.0):  # scrubbing the dial back to a value already shown
+        for coarse in (True, False):
+            operation = Operation("blur", (100, 100, 500, 400), radius=radius)
+            patch, _ = processor.preview_effect(operation, (400, 400), coarse=coarse)
+            previews.setdefault((radius, coarse), []).append(patch.tobytes())
+    assert processor.effect_cache.misses == 4
+    assert processor.effect_cache.hits == 2
+    first, again = previews[(4.0, False)]
+    assert first == again == previews[(4.0, True)][1]  # the revisited coarse pass gets the full preview
+
+    processor.apply_blur((0, 0, 50, 50), 2.0)
+    processor.render()
+    processor.get_display_image((400, 400))
+    misses = processor.effect_cache.misses
+    processor.preview_effect(Operation("blur", (100, 100, 500, 400), radius=4.0), (400, 400))
+    assert processor.effect_cache.misses == misses + 1  # the image changed, so it is computed again
+
+def test_coarse_preview_uses_cached_full_preview(noise_image):
+    processor = ImageProcessor()
+    processor.set_deferred(True)
+    processor.open_image(noise_image)
+    operation = Operation("pixelate", (100, 100, 500, 400), pixel_size=12)
+    fine, _ = processor.preview_effect(operation, (400, 400))
+    misses = processor.effect_cache.misses
+    coarse, _ = processor.preview_effect(operation, (400, 400), coarse=True)
+    assert coarse.tobytes() == fine.tobytes()
+    assert processor.effect_cache.misses == misses
+
+@pytest.mark.parametrize("blur_engine", ["pillow", "downsample"])
+def test_display_tiles_match_rendered_image(noise_image, blur_engine):
+    def edited(render):
+        processor = ImageProcessor(blur_engine=blur_engine)
+        processor.open_image(noise_image)
+        processor.set_deferred(True)
+        processor.apply_blur((100, 80, 700, 500), 30.0)
+        processor.pixelate_region((300, 50, 900, 650), 12)
+        processor.pixelate_region((5, 3, 77, 90), 8, aligned=True)
+        return processor.get_current_image() if render else processor
+    expected, processor = edited(True), edited(False)
+    for left in range(0, 1001, 128):
+        for upper in range(0, 700, 128):
+            box = (left, upper, min(left + 128, 1001), min(upper + 128, 700))
+            assert processor.display_tile(0, box).tobytes() == expected.crop(box).tobytes()
+    display = processor.get_display_image((500, 500))
+    assert display.size == (501, 350)
+    assert processor.display_tile(1, (200, 100, 501, 350)).tobytes() == display.crop((200, 100, 501, 350)).tobytes()
@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def offscreen_env():
+    return dict(os.environ, QT_QPA_PLATFORM="offscreen")
+
+def test_main_window_defers_image_libraries(offscreen_env):
+    script = (
+        "import sys; from PyQt6.QtWidgets import QApplication; app = QApplication([]); "
+        "from src.gui.main_window import MainWindow; window = MainWindow(); "
+        "assert window.collapsed_sidebar is None; "
+        "assert not {'PIL', 'numpy'} & set(sys.modules), 'image libraries imported'; "
+        "window.toggle_sidebar(); assert window.collapsed_sidebar is not None; "
+        "window.preload(); window.effect_runner.wait(); assert 'PIL' in sys.modules"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, cwd=ROOT,
+                            env=offscreen_env, timeout=60)
+    assert result.returncode == 0, result.stderr
+
+def test_startup_timing_reports_stages(offscreen_env):
+    result = subprocess.run([sys.executable, "Blurrify.py", "--startup-timing"], capture_output=True, text=True,
+                            cwd=ROOT, env=offscreen_env, timeout=60)
+    assert result.returncode == 0, result.stderr
+    for stage in ("Qt import", "main window built", "first paint", "image libraries loaded"):
+        assert stage in result.stderr
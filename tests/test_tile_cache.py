@@ -0,0 +1,40 @@
+from src.gui.tile_cache import (
+    TILE_SIZE,
+    TileCache,
+    level_for_scale,
+    level_size,
+    tile_box,
+    tile_image_box,
+    tiles_covering,
+)
+
+SIZE = (1001, 700)
+
+
+def test_levels():
+    assert level_size(SIZE, 2) == (251, 175)
+    assert level_for_scale(3.0, 4) == 0
+    assert level_for_scale(0.5, 4) == 1
+    assert level_for_scale(0.3, 4) == 1
+    assert level_for_scale(0.01, 4) == 4
+
+def test_tile_geometry():
+    assert tile_box((0, 3, 2), SIZE) == (768, 512, 1001, 700)
+    assert tile_box((1, 1, 0), SIZE) == (256, 0, 501, 256)
+    assert tile_image_box((1, 1, 0), SIZE) == (512, 0, 1001, 512)
+    assert list(tiles_covering((500, 10, 530.5, 20), 0, SIZE)) == [(0, 1, 0), (0, 2, 0)]
+    assert list(tiles_covering((0, 0) + SIZE, 1, SIZE)) == [(1, 0, 0), (1, 1, 0), (1, 0, 1), (1, 1, 1)]
+    assert list(tiles_covering((10, 10, 10, 20), 0, SIZE)) == []
+
+def test_cache_invalidates_overlapping_tiles_and_evicts():
+    cache = TileCache(max_bytes=3 * TILE_SIZE)
+    cache.reset(SIZE)
+    for key in [(0, 0, 0), (0, 1, 0), (1, 0, 0)]:
+        cache.put(key, object(), TILE_SIZE)
+    generation = cache.generation
+    cache.invalidate([(300, 10, 310, 20)])
+    assert (0, 1, 0) not in cache and (1, 0, 0) not in cache and (0, 0, 0) in cache
+    assert cache.generation == generation + 1
+    for key in [(0, 2, 0), (0, 3, 0), (0, 0, 1)]:
+        cache.put(key, object(), TILE_SIZE)
+    assert (0, 0, 0) not in cache and len(cache) == 3 and cache.nbytes == 3 * TILE_SIZE
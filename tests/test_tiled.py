@@ -0,0 +1,84 @@
+import pytest
+from PIL import Image, ImageFilter
+
+from src.core.image_processor import ImageProcessor
+from src.core.tiled import TiledImage
+
+
+@pytest.fixture
+def source():
+    return Image.effect_noise((300, 200), 64).convert('RGB')
+
+@pytest.mark.parametrize("ext,lazy", [("bmp", True), ("tif", True), ("ppm", True), ("png", False)])
+def test_open_reads_pixels(tmp_path, source, ext, lazy):
+    path = tmp_path / f"image.{ext}"
+    source.save(path)
+    tiled = TiledImage.open(str(path), tile_size=64, max_resident_tiles=4)
+    assert tiled.lazy is lazy
+    assert tiled.resident_tiles <= 4
+    assert tiled.to_image().tobytes() == source.convert('RGBA').tobytes()
+    box = (50, 30, 250, 170)
+    assert tiled.crop(box).tobytes() == source.convert('RGBA').crop(box).tobytes()
+
+def test_paste_spills_and_reloads(source):
+    tiled = TiledImage.from_image(source, tile_size=64, max_resident_tiles=2)
+    assert tiled.spilled_tiles > 0
+    patch = Image.new('RGBA', (100, 100), (1, 2, 3, 255))
+    tiled.paste(patch, (90, 40))
+    expected = source.convert('RGBA')
+    expected.paste(patch, (90, 40))
+    assert tiled.to_image().tobytes() == expected.tobytes()
+
+def test_cropped(source):
+    tiled = TiledImage.from_image(source, tile_size=64, max_resident_tiles=3)
+    cropped = tiled.cropped((10, 20, 210, 150))
+    assert cropped.size == (200, 130)
+    assert cropped.to_image().tobytes() == source.convert('RGBA').crop((10, 20, 210, 150)).tobytes()
+
+def test_tiled_processor_matches_in_memory(tmp_path, source):
+    path = tmp_path / "image.bmp"
+    source.save(path)
+    results = []
+    for tiled in (False, True):
+        processor = ImageProcessor(tiled=tiled, tile_size=64, max_resident_tiles=3)
+        processor.open_image(str(path))
+        processor.apply_blur((40, 40, 200, 160), 6.0)
+        processor.pixelate_region((0, 0, 100, 60), 8)
+        results.append(processor.get_current_image().tobytes())
+    assert results[0] == results[1]
+
+def test_tiled_undo_crop(tmp_path, source):
+    path = tmp_path / "image.bmp"
+    source.save(path)
+    processor = ImageProcessor(tiled=True, tile_size=64, max_resident_tiles=3)
+    processor.open_image(str(path))
+    processor.apply_crop((10, 10, 110, 90))
+    assert processor.get_current_image().size == (100, 80)
+    processor.undo()
+    assert processor.get_current_image().tobytes() == source.convert('RGBA').tobytes()
+
+def test_streamed_png_save(tmp_path, source):
+    path = tmp_path / "image.bmp"
+    source.save(path)
+    processor = ImageProcessor(tiled=True, tile_size=64, max_resident_tiles=3)
+    processor.open_image(str(path))
+    processor.apply_blur((40, 40, 200, 160), 6.0)
+    output = tmp_path / "out.png"
+    processor.save_image(str(output))
+    with Image.open(output) as saved:
+        assert saved.mode == 'RGBA'
+        assert saved.tobytes() == processor.get_current_image().tobytes()
+
+def test_png_writer_modes(tmp_path, source):
+    from src.core.pngwriter import PngWriter
+    for mode in ("RGBA", "RGB", "L"):
+        image = source.convert(mode)
+        path = tmp_path / f"{mode}.png"
+        with open(path, "wb") as f:
+            writer = PngWriter(f, image.size, mode)
+            for y in range(0, image.size[1], 64):
+                writer.write(image.crop((0, y, image.size[0], min(y + 64, image.size[1]))))
+            writer.close()
+        with Image.open(path) as saved:
+            assert saved.mode == mode
+            assert saved.tobytes() == image.tobytes()
@@ -0,0 +1,119 @@
+import json
+import os
+import time
+
+import pytest
+from PIL import Image
+
+from src.cli import watch
+from src.cli.batch import FileResult, process_file
+from src.cli.watch import Watcher, WatchStats, main
+from src.core.operations import Operation
+
+OPERATIONS = [Operation("blur", (0, 0, 32, 32), radius=3.0)]
+
+
+@pytest.fixture
+def inbox(tmp_path):
+    directory = tmp_path / "inbox"
+    directory.mkdir()
+    return directory
+
+def write_images(directory, count, size=(64, 48)):
+    for i in range(count):
+        Image.effect_noise(size, 64).convert('RGB').save(directory / f"shot{i}.png")
+
+def make_watcher(inbox, tmp_path, **kwargs):
+    options = dict(settle=0.0, poll_interval=0.01, retry_delay=0.0, stats_interval=3600.0,
+                   report=lambda line: None)
+    options.update(kwargs)
+    return Watcher(str(inbox), str(tmp_path / "out"), OPERATIONS, **options)
+
+def test_scan_waits_until_file_settles(inbox, tmp_path):
+    watcher = make_watcher(inbox, tmp_path, settle=1.0)
+    write_images(inbox, 1)
+    (inbox / ".partial.png").write_bytes(b"staged by a writer")
+    assert watcher.scan(now=100.0) == []
+    assert watcher.scan(now=100.5) == []
+    with open(inbox / "shot0.png", "ab") as f:
+        f.write(b"still copying")
+    assert watcher.scan(now=101.2) == []  # changed, so the settle time starts again
+    assert watcher.scan(now=102.0) == []
+    ready = watcher.scan(now=102.3)
+    assert [job.path for job in ready] == [str(inbox / "shot0.png")]
+    assert ready[0].first_seen == 100.0
+
+def test_watcher_processes_and_moves_originals(inbox, tmp_path):
+    write_images(inbox, 3)
+    stats = make_watcher(inbox, tmp_path).run(until_idle=True)
+    assert stats.processed == 3 and stats.quarantined == 0
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["shot0.png", "shot1.png", "shot2.png"]
+    assert sorted(p.name for p in (inbox / "processed").iterdir()) == ["shot0.png", "shot1.png", "shot2.png"]
+    assert not list(inbox.glob("*.png"))
+    assert stats.latency(50) is not None and stats.latency(95) >= stats.latency(50)
+
+def test_watcher_bounds_files_in_flight(inbox, tmp_path):
+    write_images(inbox, 6)
+    watcher = make_watcher(inbox, tmp_path, max_in_flight=2)
+    watcher.start()
+    watcher.step()
+    watcher.step()
+    assert watcher.stats.in_flight <= 2
+    assert watcher.stats.in_flight + watcher.stats.waiting + watcher.stats.processed == 6
+    stats = watcher.run(until_idle=True)
+    assert stats.processed == 6
+    assert stats.peak_in_flight == 2
+
+def test_watcher_retries_then_quarantines(inbox, tmp_path):
+    write_images(inbox, 1)
+    (inbox / "broken.png").write_bytes(b"not really a png")
+    stats = make_watcher(inbox, tmp_path, retries=2).run(until_idle=True)
+    assert stats.processed == 1
+    assert stats.retried == 2 and stats.quarantined == 1
+    assert (inbox / "quarantine" / "broken.png").exists()
+    assert "identify" in (inbox / "quarantine" / "broken.png.error.txt").read_text()
+    assert not [p for p in (tmp_path / "out").iterdir() if p.name.startswith(".writing-")]
+
+def crash_on_poison(path, *args, **kwargs):
+    if "poison" in os.path.basename(path):
+        os._exit(1)  # as if the worker was killed for running out of memory
+    return process_file(path, *args, **kwargs)
+
+def test_watcher_survives_a_dead_worker(inbox, tmp_path, monkeypatch):
+    monkeypatch.setattr(watch, "process_file", crash_on_poison)
+    write_images(inbox, 3)
+    os.rename(inbox / "shot0.png", inbox / "poison.png")
+    lines = []
+    stats = make_watcher(inbox, tmp_path, jobs=2, max_in_flight=4, retries=1,
+                         report=lines.append).run(until_idle=True)
+    assert stats.processed == 2 and stats.quarantined == 1
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["shot1.png", "shot2.png"]
+    assert "worker process died" in (inbox / "quarantine" / "poison.png.error.txt").read_text()
+    assert any("restarted the pool" in line for line in lines)
+
+def test_watcher_reports_stats_periodically(inbox, tmp_path):
+    lines = []
+    write_images(inbox, 2)
+    make_watcher(inbox, tmp_path, stats_interval=0.0, report=lines.append).run(until_idle=True)
+    assert lines
+    assert "2 processed" in lines[-1] and "files/s" in lines[-1] and "p95" in lines[-1]
+
+def test_stats_interval_rates():
+    stats = WatchStats(_interval_start=10.0)
+    for _ in range(4):
+        stats.record(FileResult("in.png", "out.png", 512 * 1024, 0.1), latency=0.2)
+    assert stats.interval(now=12.0) == (2.0, 1.0)
+    assert stats.interval(now=13.0) == (0.0, 0.0)
+    assert stats.latency(50) == pytest.approx(0.2)
+
+def test_watch_once_command(inbox, tmp_path, capsys):
+    recipe = tmp_path / "recipe.json"
+    recipe.write_text(json.dumps({"operations": [{"op": "blur", "region": [0, 0, 32, 32], "radius": 3}]}))
+    write_images(inbox, 2)
+    start = time.monotonic()
+    code = main([str(recipe), str(inbox), "-o", str(tmp_path / "out"), "-j", "1", "--once", "--settle", "0",
+                 "--poll", "0.01", "--delete-originals"])
+    assert code == 0
+    assert time.monotonic() - start < 30
+    assert "2 processed" in capsys.readouterr().out
+    assert not list(inbox.iterdir())